@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import QueuedEmail
+
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "from_email", "created_at", "available_at", "attempts", "failed_at")
+    list_filter = ("failed_at",)
+    readonly_fields = ("created_at", "attempts", "last_error")
@@ -0,0 +1,205 @@
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import Future, wait
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.smtp import EmailBackend as SMTPEmailBackend
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def is_connection_error(error: Exception) -> bool:
+    """Whether the connection broke, rather than the server refusing the message. SMTP errors are OSErrors too."""
+    return isinstance(error, smtplib.SMTPServerDisconnected) or (
+        isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+    )
+
+
+class SMTPPool:
+    """Persistent SMTP connections of one server, each owned by a thread sending messages from a bounded queue.
+
+    A connection is replaced after `messages_per_connection` messages, when it
+    breaks and after idling for `idle_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        connection_kwargs: dict,
+        size: int = 4,
+        queue_size: int = 100,
+        messages_per_connection: int = 100,
+        idle_timeout: float = 30,
+    ):
+        self.connection_kwargs = connection_kwargs
+        self.messages_per_connection = messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.counters = {"sent": 0, "failed": 0, "connections": 0, "reconnects": 0}
+        self.threads = [threading.Thread(target=self.work, daemon=True) for _ in range(size)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, message) -> Future:
+        """Queue `message`, waiting while the queue is full. The future's result is the number of messages sent."""
+        future = Future()
+        self.queue.put((message, future))
+        return future
+
+    def count(self, name: str, amount: int = 1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def stats(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+        elapsed = time.monotonic() - self.started
+        return {
+            **counters,
+            "queued": self.queue.qsize(),
+            "elapsed": elapsed,
+            "messages_per_second": counters["sent"] / elapsed if elapsed else 0,
+        }
+
+    def work(self):
+        connection, sent = None, 0
+        while True:
+            try:
+                item = self.queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                connection = self.close(connection)
+                continue
+            if item is None:
+                self.close(connection)
+                return
+            message, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            if connection is not None and sent >= self.messages_per_connection:
+                connection = self.close(connection)
+            try:
+                for attempt in range(2):
+                    if connection is None:
+                        connection, sent = self.open(reconnect=attempt > 0), 0
+                    try:
+                        result = connection.send_messages([message])
+                        break
+                    except OSError as error:
+                        if not is_connection_error(error):
+                            raise
+                        # Tried once more on a new connection.
+                        connection = self.close(connection)
+                        if attempt:
+                            raise
+            except Exception as error:
+                self.count("failed")
+                future.set_exception(error)
+            else:
+                sent += 1
+                self.count("sent", result)
+                future.set_result(result)
+
+    def open(self, reconnect: bool = False) -> SMTPEmailBackend:
+        connection = SMTPEmailBackend(fail_silently=False, **self.connection_kwargs)
+        connection.open()
+        self.count("reconnects" if reconnect else "connections")
+        return connection
+
+    def close(self, connection: SMTPEmailBackend | None) -> None:
+        if connection is not None:
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+    def shutdown(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+
+def get_pool(connection_kwargs: dict) -> SMTPPool:
+    key = tuple(sorted(connection_kwargs.items()))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SMTPPool(
+                connection_kwargs,
+                size=getattr(settings, "MAILER_SMTP_POOL_SIZE", 4),
+                queue_size=getattr(settings, "MAILER_SMTP_QUEUE_SIZE", 100),
+                messages_per_connection=getattr(settings, "MAILER_SMTP_MESSAGES_PER_CONNECTION", 100),
+                idle_timeout=getattr(settings, "MAILER_SMTP_IDLE_TIMEOUT", 30),
+            )
+        return _pools[key]
+
+
+def get_pool_stats() -> dict:
+    """Counters of the pools of this process, by `host:port`."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {f"{pool.connection_kwargs['host']}:{pool.connection_kwargs['port']}": pool.stats() for pool in pools}
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+class EmailBackend(BaseEmailBackend):
+    """SMTP backend sending through the process wide pool of connections to its server.
+
+    Takes the settings and arguments of Django's SMTP backend. Messages of one
+    call are sent concurrently, `send_messages` returns once all of them were.
+    """
+
+    def __init__(
+        self,
+        host=None,
+        port=None,
+        username=None,
+        password=None,
+        use_tls=None,
+        fail_silently=False,
+        use_ssl=None,
+        timeout=None,
+        ssl_keyfile=None,
+        ssl_certfile=None,
+        **kwargs,
+    ):
+        super().__init__(fail_silently=fail_silently)
+        self.connection_kwargs = {
+            "host": host or settings.EMAIL_HOST,
+            "port": port or settings.EMAIL_PORT,
+            "username": settings.EMAIL_HOST_USER if username is None else username,
+            "password": settings.EMAIL_HOST_PASSWORD if password is None else password,
+            "use_tls": settings.EMAIL_USE_TLS if use_tls is None else use_tls,
+            "use_ssl": settings.EMAIL_USE_SSL if use_ssl is None else use_ssl,
+            "timeout": settings.EMAIL_TIMEOUT if timeout is None else timeout,
+            "ssl_keyfile": settings.EMAIL_SSL_KEYFILE if ssl_keyfile is None else ssl_keyfile,
+            "ssl_certfile": settings.EMAIL_SSL_CERTFILE if ssl_certfile is None else ssl_certfile,
+        }
+
+    def submit(self, message) -> Future:
+        return get_pool(self.connection_kwargs).submit(message)
+
+    def send_messages(self, email_messages) -> int:
+        futures = [self.submit(message) for message in email_messages if message.recipients()]
+        # Errors are raised once every message is done with, none is left sending in the background.
+        wait(futures)
+        sent = 0
+        for future in futures:
+            error = future.exception()
+            if error is None:
+                sent += future.result()
+            elif not self.fail_silently:
+                raise error
+        return sent
@@ -0,0 +1,93 @@
+import asyncio
+import socket
+import time
+from typing import Any
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import BaseCommand, CommandError
+
+from mailer.backends import close_pools, get_pool_stats
+
+SMTP_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+POOLED_BACKEND = "mailer.backends.EmailBackend"
+
+
+class LatencyHandler:
+    """aiosmtpd handler accepting every message after `latency` seconds, like a distant server."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        self.received += 1
+        return "250 Message accepted for delivery"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the same messages with a connection per message, over a single connection and through the pooled"
+        " backend, to a local aiosmtpd server or to --host and --port, and compare their throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=200)
+        parser.add_argument("--latency", type=float, default=0.02, help="Seconds the local server takes per message.")
+        parser.add_argument("--host", help="Send to this server instead of starting a local one.")
+        parser.add_argument("--port", type=int, default=25)
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        controller = None
+        host, port = options["host"], options["port"]
+        if host is None:
+            try:
+                from aiosmtpd.controller import Controller
+            except ImportError:
+                raise CommandError("The local server needs aiosmtpd (pip install aiosmtpd), or pass --host.")
+            host, port = "127.0.0.1", free_port()
+            controller = Controller(LatencyHandler(options["latency"]), hostname=host, port=port)
+            controller.start()
+        messages = [
+            EmailMessage(f"Benchmark {number}", "Body", "noreply@unchained.com", [f"user{number}@example.com"])
+            for number in range(options["messages"])
+        ]
+        server = {"host": host, "port": port, "username": "", "password": "", "use_tls": False, "use_ssl": False}
+
+        def connection_per_message():
+            for message in messages:
+                get_connection(SMTP_BACKEND, **server).send_messages([message])
+
+        def single_connection():
+            with get_connection(SMTP_BACKEND, **server) as connection:
+                connection.send_messages(messages)
+
+        def pooled():
+            get_connection(POOLED_BACKEND, **server).send_messages(messages)
+
+        try:
+            self.stdout.write(f"{len(messages)} messages to {host}:{port}.")
+            for name, send in [
+                ("connection per message", connection_per_message),
+                ("single connection", single_connection),
+                ("pooled", pooled),
+            ]:
+                started = time.perf_counter()
+                send()
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"{name:<24} {elapsed:>8.3f}s {len(messages) / elapsed:>10.1f} messages/s")
+            stats = get_pool_stats()[f"{host}:{port}"]
+            self.stdout.write(
+                f"pool: {stats['sent']} sent, {stats['failed']} failed, {stats['connections']} connections,"
+                f" {stats['reconnects']} reconnects"
+            )
+        finally:
+            close_pools()
+            if controller is not None:
+                controller.stop()
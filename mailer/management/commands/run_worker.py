@@ -0,0 +1,29 @@
+import time
+from typing import Any
+from django.core.management import BaseCommand
+
+from mailer.queue import claim_batch, deliver
+
+
+class Command(BaseCommand):
+    help = "Send queued emails. Several workers can run in parallel, each one claims batches of its own."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to wait when no email is due.")
+        parser.add_argument("--once", action="store_true", help="Exit once no email is due.")
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        sent = 0
+        try:
+            while True:
+                emails = claim_batch(options["batch_size"])
+                if emails:
+                    sent += deliver(emails)
+                elif options["once"]:
+                    break
+                else:
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"{sent} queued emails sent.")
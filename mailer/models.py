@@ -0,0 +1,31 @@
+from django.contrib.postgres.fields import ArrayField
+from django.core.mail import EmailMessage
+from django.db import models
+from django.utils import timezone
+
+
+class QueuedEmail(models.Model):
+    subject = models.TextField()
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = ArrayField(models.CharField(max_length=254))
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Not claimed by a worker before this time, pushed back by claims and retries.
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Set once the attempts ran out. Sent emails are deleted.
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["available_at", "id"], name="queued_email_due", condition=models.Q(failed_at__isnull=True)
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)}"
+
+    def message(self) -> EmailMessage:
+        return EmailMessage(self.subject, self.body, self.from_email, self.to)
@@ -0,0 +1,116 @@
+import random
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+SEND_ERRORS = (smtplib.SMTPException, OSError)
+
+
+def enqueue_messages(messages):
+    """Queue `messages` for the workers within the current transaction.
+
+    Workers only see the emails once it commits, and a rollback takes them back.
+    """
+    QueuedEmail.objects.bulk_create(
+        QueuedEmail(subject=message.subject, body=message.body, from_email=message.from_email, to=list(message.to))
+        for message in messages
+    )
+
+
+def enqueue_mail(subject: str, message: str, from_email: str, recipient_list):
+    """Queued counterpart of `send_mail`."""
+    enqueue_messages([EmailMessage(subject, message, from_email, recipient_list)])
+
+
+def claim_batch(size: int) -> list[QueuedEmail]:
+    """Claim up to `size` due emails for this worker.
+
+    Emails locked by another worker are skipped. Claimed emails are hidden from
+    other workers for `MAILER_LEASE` seconds, so an email whose worker died is
+    claimed again after that.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, "MAILER_LEASE", 300))
+    with transaction.atomic():
+        emails = list(
+            QueuedEmail.objects.filter(failed_at__isnull=True, available_at__lte=now)
+            .order_by("available_at", "id")
+            .select_for_update(skip_locked=True)[:size]
+        )
+        QueuedEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            available_at=now + lease, attempts=F("attempts") + 1
+        )
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before the next attempt, doubling from `MAILER_RETRY_DELAY` up to `MAILER_RETRY_MAX_DELAY`.
+
+    Half of it is random, so emails failed together don't come back together.
+    """
+    base_delay = getattr(settings, "MAILER_RETRY_DELAY", 30)
+    max_delay = getattr(settings, "MAILER_RETRY_MAX_DELAY", 3600)
+    delay = min(max_delay, base_delay * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _send_each(connection, emails: list[QueuedEmail]):
+    """Yields each email with the error sending it raised, or None."""
+    if hasattr(connection, "submit"):
+        # Pooled backends send the batch concurrently.
+        futures = [(email, connection.submit(email.message())) for email in emails]
+        for email, future in futures:
+            error = future.exception()
+            if error is not None and not isinstance(error, SEND_ERRORS):
+                raise error
+            yield email, error
+        return
+    for email in emails:
+        try:
+            connection.send_messages([email.message()])
+        except SEND_ERRORS as error:
+            yield email, error
+        else:
+            yield email, None
+
+
+def deliver(emails: list[QueuedEmail]) -> int:
+    """Send claimed `emails` over one connection, or the pool of a pooled backend, returns how many were sent.
+
+    Sent emails are deleted, failed ones are retried later or, after
+    `MAILER_MAX_ATTEMPTS` attempts, marked failed.
+    """
+    sent, errors = [], {}
+    try:
+        with get_connection() as connection:
+            for email, error in _send_each(connection, emails):
+                if error is None:
+                    sent.append(email.pk)
+                else:
+                    errors[email.pk] = error
+    except SEND_ERRORS as error:
+        # Opening the connection failed, or it broke down.
+        errors.update({email.pk: error for email in emails if email.pk not in errors and email.pk not in sent})
+
+    QueuedEmail.objects.filter(pk__in=sent).delete()
+    now = timezone.now()
+    max_attempts = getattr(settings, "MAILER_MAX_ATTEMPTS", 5)
+    for email in emails:
+        if email.pk not in errors:
+            continue
+        if email.attempts >= max_attempts:
+            email.failed_at = now
+        else:
+            email.available_at = now + timedelta(seconds=retry_delay(email.attempts))
+        email.last_error = str(errors[email.pk])
+        email.save(update_fields=["available_at", "failed_at", "last_error"])
+    return len(sent)
@@ -0,0 +1,59 @@
+import smtplib
+from io import StringIO
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from mailer.backends import close_pools, get_pool_stats
+from mailer.testing import SMTPStandIn
+
+
+def messages(count):
+    return [
+        EmailMessage(f"Email {number}", "Body", "noreply@a.com", [f"user{number}@a.com"]) for number in range(count)
+    ]
+
+
+class PooledEmailBackendTest(SimpleTestCase):
+    def setUp(self):
+        self.server = SMTPStandIn().__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.addCleanup(close_pools)
+
+    def get_connection(self, **kwargs):
+        settings = self.server.settings()
+        return get_connection(
+            "mailer.backends.EmailBackend", host=settings["EMAIL_HOST"], port=settings["EMAIL_PORT"], **kwargs
+        )
+
+    def stats(self):
+        return get_pool_stats()[f"127.0.0.1:{self.server.port}"]
+
+    @override_settings(MAILER_SMTP_POOL_SIZE=1, MAILER_SMTP_MESSAGES_PER_CONNECTION=3)
+    def test_connections_are_kept_and_replaced(self):
+        self.assertEqual(self.get_connection().send_messages(messages(5)), 5)
+        self.assertEqual(self.get_connection().send_messages(messages(5)), 5)
+        self.assertEqual(len(self.server.messages), 10)
+        stats = self.stats()
+        self.assertEqual((stats["sent"], stats["connections"], stats["reconnects"]), (10, 4, 0))
+        self.assertEqual(self.server.connections, 4)
+
+    @override_settings(MAILER_SMTP_POOL_SIZE=2)
+    def test_reconnect_and_failures(self):
+        self.server.drops = 1
+        self.assertEqual(self.get_connection().send_messages(messages(4)), 4)
+        self.assertEqual(self.stats()["reconnects"], 1)
+
+        self.server.failures = 1
+        with self.assertRaises(smtplib.SMTPSenderRefused):
+            self.get_connection().send_messages(messages(2))
+        self.server.failures = 1
+        self.assertEqual(self.get_connection(fail_silently=True).send_messages(messages(2)), 1)
+        stats = self.stats()
+        self.assertEqual((stats["sent"], stats["failed"]), (6, 2))
+
+    def test_benchmark(self):
+        out = StringIO()
+        call_command("benchmark_email_backend", messages=6, host="127.0.0.1", port=self.server.port, stdout=out)
+        self.assertIn("pooled", out.getvalue())
+        self.assertIn("pool: 6 sent, 0 failed", out.getvalue())
+        self.assertEqual(len(self.server.messages), 18)
@@ -0,0 +1,107 @@
+import threading
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from mailer.backends import close_pools
+from mailer.models import QueuedEmail
+from mailer.queue import claim_batch, enqueue_mail
+from mailer.testing import SMTPStandIn
+
+
+def queue_emails(count):
+    QueuedEmail.objects.bulk_create(
+        QueuedEmail(subject=f"Email {number}", body="Body", from_email="noreply@a.com", to=[f"user{number}@a.com"])
+        for number in range(count)
+    )
+
+
+class EnqueueTest(TestCase):
+    def test_enqueued_in_transaction(self):
+        with transaction.atomic():
+            enqueue_mail("Subject", "Body", "noreply@a.com", ["user@a.com"])
+        email = QueuedEmail.objects.get()
+        self.assertEqual((email.subject, email.to, email.attempts), ("Subject", ["user@a.com"], 0))
+
+    def test_rolled_back_with_transaction(self):
+        with transaction.atomic():
+            enqueue_mail("Subject", "Body", "noreply@a.com", ["user@a.com"])
+            transaction.set_rollback(True)
+        self.assertFalse(QueuedEmail.objects.exists())
+
+
+class WorkerTest(TestCase):
+    def run_worker(self):
+        out = StringIO()
+        call_command("run_worker", once=True, stdout=out)
+        return out.getvalue()
+
+    def test_delivery_and_retries(self):
+        queue_emails(2)
+        with SMTPStandIn() as server, override_settings(**server.settings(), MAILER_MAX_ATTEMPTS=2):
+            server.failures = 1
+            self.assertIn("1 queued emails sent.", self.run_worker())
+            retried = QueuedEmail.objects.get()
+            self.assertEqual(retried.attempts, 1)
+            self.assertIn("451", retried.last_error)
+            self.assertGreater(retried.available_at, timezone.now())
+            # Not due yet.
+            self.assertIn("0 queued emails sent.", self.run_worker())
+
+            server.failures = 1
+            QueuedEmail.objects.update(available_at=timezone.now())
+            self.assertIn("0 queued emails sent.", self.run_worker())
+            failed = QueuedEmail.objects.get()
+            self.assertEqual(failed.attempts, 2)
+            self.assertIsNotNone(failed.failed_at)
+
+            queue_emails(3)
+            self.assertIn("3 queued emails sent.", self.run_worker())
+            self.assertEqual(len(server.messages), 4)
+            # One connection per batch, none when nothing was due.
+            self.assertEqual(server.connections, 3)
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+
+    def test_pooled_backend(self):
+        queue_emails(5)
+        self.addCleanup(close_pools)
+        with SMTPStandIn() as server:
+            with override_settings(**server.settings()):
+                with override_settings(EMAIL_BACKEND="mailer.backends.EmailBackend"):
+                    server.failures = 1
+                    self.assertIn("4 queued emails sent.", self.run_worker())
+            self.assertEqual(len(server.messages), 4)
+        self.assertIn("451", QueuedEmail.objects.get().last_error)
+
+    def test_unreachable_server(self):
+        queue_emails(2)
+        with SMTPStandIn() as server:
+            settings = server.settings()
+        with override_settings(**settings):
+            self.assertIn("0 queued emails sent.", self.run_worker())
+        self.assertEqual(QueuedEmail.objects.filter(attempts=1, failed_at__isnull=True).count(), 2)
+
+
+class ParallelWorkersTest(TransactionTestCase):
+    def test_workers_claim_different_emails(self):
+        queue_emails(20)
+        claimed, barrier = [], threading.Barrier(2)
+
+        def claim():
+            barrier.wait(5)
+            claimed.append([email.pk for email in claim_batch(10)])
+            connection.close()
+
+        with transaction.atomic():
+            # Locked by a worker that has not finished its claim yet.
+            locked = list(QueuedEmail.objects.order_by("id").select_for_update()[:2])
+            threads = [threading.Thread(target=claim) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        ids = [pk for batch in claimed for pk in batch]
+        self.assertEqual(len(ids), 18)
+        self.assertEqual(len(set(ids)), 18)
+        self.assertFalse({email.pk for email in locked} & set(ids))
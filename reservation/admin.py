@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Comment, Rating, Reservation, Room
+from .search import search_query
 
 
 class CommentInlineAdmin(admin.TabularInline):
@@ -18,12 +19,15 @@ class RatingInlineAdmin(admin.TabularInline):
 class RoomAdmin(admin.ModelAdmin):
     list_display = ("name", "capacity", "is_active")
     list_filter = ("is_active",)
-    search_fields = (
-        "name__icontains",
-        "description__icontains",
-    )
+    # Only enables the search box, searches use the full text vector instead.
+    search_fields = ("name",)
     inlines = [CommentInlineAdmin, RatingInlineAdmin]
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(search_vector=search_query(search_term)), False
+
 
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 
 
 class ReservationConfig(AppConfig):
@@ -8,8 +8,61 @@ class ReservationConfig(AppConfig):
 
     def ready(self):
         from .signals import (
-            reservation_post_delete_cancell_email,
+            bump_all_feed_versions,
+            comment_post_delete_update_search_vector,
+            comment_post_save_update_search_vector,
+            comment_pre_save_remember_room,
+            post_save_bump_feed_versions_on_rename,
+            pre_save_remember_name,
+            rating_post_delete_update_room,
+            rating_post_save_update_room,
+            rating_pre_save_remember_value,
+            reservation_post_delete_bump_feed_version,
+            reservation_post_delete_exclude_occurrence,
+            reservation_post_delete_publish_change,
+            reservation_post_delete_record_change,
+            reservation_post_delete_update_index,
+            reservation_post_delete_update_occupancy,
+            reservation_post_delete_update_utilization,
+            reservation_post_save_bump_feed_version,
+            reservation_post_save_publish_change,
+            reservation_post_save_record_change,
+            reservation_post_save_reset_reminder,
+            reservation_post_save_update_index,
+            reservation_post_save_update_occupancy,
+            reservation_post_save_update_utilization,
+            reservation_pre_delete_cancell_email,
+            reservation_pre_save_remember_occupancy,
+            room_post_save_update_search_vector,
         )
-        from .models import Reservation
+        from users.models import Team
+        from .models import Comment, Rating, RecurringReservation, Reservation, Room
 
-        post_delete.connect(reservation_post_delete_cancell_email, sender=Reservation)
+        pre_delete.connect(reservation_pre_delete_cancell_email, sender=Reservation)
+        post_delete.connect(reservation_post_delete_update_index, sender=Reservation)
+        post_save.connect(reservation_post_save_update_index, sender=Reservation)
+        pre_save.connect(reservation_pre_save_remember_occupancy, sender=Reservation)
+        post_save.connect(reservation_post_save_update_occupancy, sender=Reservation)
+        post_save.connect(reservation_post_save_reset_reminder, sender=Reservation)
+        post_delete.connect(reservation_post_delete_update_occupancy, sender=Reservation)
+        post_save.connect(reservation_post_save_update_utilization, sender=Reservation)
+        post_delete.connect(reservation_post_delete_update_utilization, sender=Reservation)
+        post_delete.connect(reservation_post_delete_exclude_occurrence, sender=Reservation)
+        post_save.connect(reservation_post_save_bump_feed_version, sender=Reservation)
+        post_delete.connect(reservation_post_delete_bump_feed_version, sender=Reservation)
+        post_save.connect(reservation_post_save_publish_change, sender=Reservation)
+        post_delete.connect(reservation_post_delete_publish_change, sender=Reservation)
+        post_save.connect(reservation_post_save_record_change, sender=Reservation)
+        post_delete.connect(reservation_post_delete_record_change, sender=Reservation)
+        post_save.connect(bump_all_feed_versions, sender=RecurringReservation)
+        post_delete.connect(bump_all_feed_versions, sender=RecurringReservation)
+        for model in (Room, Team):
+            pre_save.connect(pre_save_remember_name, sender=model)
+            post_save.connect(post_save_bump_feed_versions_on_rename, sender=model)
+        post_save.connect(room_post_save_update_search_vector, sender=Room)
+        pre_save.connect(comment_pre_save_remember_room, sender=Comment)
+        post_save.connect(comment_post_save_update_search_vector, sender=Comment)
+        post_delete.connect(comment_post_delete_update_search_vector, sender=Comment)
+        pre_save.connect(rating_pre_save_remember_value, sender=Rating)
+        post_save.connect(rating_post_save_update_room, sender=Rating)
+        post_delete.connect(rating_post_delete_update_room, sender=Rating)
@@ -0,0 +1,197 @@
+import math
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import OPENING_TIME, SLOT_MINUTES, SLOTS_PER_DAY, Reservation, Room, RoomOccupancy
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def slot_datetime(day: date, slot: int) -> datetime:
+    return timezone.make_aware(datetime.combine(day, OPENING_TIME)) + timedelta(minutes=slot * SLOT_MINUTES)
+
+
+def as_datetime(value) -> datetime:
+    value = Reservation._meta.get_field("start_date").to_python(value)
+    if timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+
+def days_between(start: datetime, end: datetime) -> list[date]:
+    first_day = timezone.localdate(start)
+    last_day = timezone.localdate(end - timedelta(microseconds=1))
+    return [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+
+
+def local_epoch(value: datetime) -> float:
+    return (timezone.localtime(value).replace(tzinfo=None) - EPOCH).total_seconds()
+
+
+def flat_slots(epochs, first_day: date, round_up: bool = False) -> np.ndarray:
+    """Map local epoch seconds to indexes on a grid of business-hour slots starting at `first_day`.
+
+    Times before opening or after closing are clamped to the edges of their day, so
+    `[flat_slots(start), flat_slots(end, round_up=True))` covers every slot a
+    reservation touches, even when it spans several days.
+    """
+    seconds = np.asarray(epochs, dtype=np.float64) - (first_day - EPOCH.date()).days * 86400
+    days = np.floor(seconds / 86400)
+    minutes = (seconds - days * 86400) / 60 - (OPENING_TIME.hour * 60 + OPENING_TIME.minute)
+    slots = np.ceil(minutes / SLOT_MINUTES) if round_up else np.floor(minutes / SLOT_MINUTES)
+    return days.astype(np.int64) * SLOTS_PER_DAY + np.clip(slots, 0, SLOTS_PER_DAY).astype(np.int64)
+
+
+def _slot_mask(start: datetime, end: datetime, opening: datetime) -> int:
+    first = max(math.floor((start - opening).total_seconds() / (SLOT_MINUTES * 60)), 0)
+    last = min(math.ceil((end - opening).total_seconds() / (SLOT_MINUTES * 60)), SLOTS_PER_DAY)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << (SLOTS_PER_DAY - last)
+
+
+def slot_mask(start: datetime, end: datetime, day: date) -> int:
+    """Bitmap of the slots of `day` touched by `[start, end)`, slot 0 being the most significant bit."""
+    return _slot_mask(start, end, slot_datetime(day, 0))
+
+
+def occupancy_bitmaps(reservations) -> dict[tuple[int, date], int]:
+    """Occupancy bitmaps keyed by (room id, day) for `(room id, start, end)` rows."""
+    # Resolving the time zone and each day's opening time once keeps large rebuilds fast.
+    current_timezone = timezone.get_current_timezone()
+    openings = {}
+    bitmaps = {}
+    for room_id, start, end in reservations:
+        day = start.astimezone(current_timezone).date()
+        last_day = (end - timedelta(microseconds=1)).astimezone(current_timezone).date()
+        while day <= last_day:
+            if day not in openings:
+                openings[day] = slot_datetime(day, 0)
+            bitmaps[(room_id, day)] = bitmaps.get((room_id, day), 0) | _slot_mask(start, end, openings[day])
+            day += timedelta(days=1)
+    return bitmaps
+
+
+def refresh_room_occupancy(room_id: int, days):
+    """Recompute the occupancy bitmaps of a room from its reservations.
+
+    The room row is locked first so concurrent bookings of the same room rebuild
+    its bitmaps one after another, each seeing the other's committed reservations.
+    """
+    with transaction.atomic():
+        if not Room.objects.select_for_update().filter(pk=room_id).exists():
+            return
+        for day in days:
+            day_start, day_end = slot_datetime(day, 0), slot_datetime(day, SLOTS_PER_DAY)
+            slots = 0
+            for start, end in Reservation.objects.filter(
+                room_id=room_id, start_date__lt=day_end, end_date__gt=day_start
+            ).values_list("start_date", "end_date"):
+                slots |= slot_mask(start, end, day)
+            if slots:
+                RoomOccupancy.objects.update_or_create(room_id=room_id, date=day, defaults={"slots": slots})
+            else:
+                RoomOccupancy.objects.filter(room_id=room_id, date=day).delete()
+
+
+def refresh_room_occupancy_days(keys: set[tuple[int, date]]):
+    """Recompute the occupancy bitmaps of many `(room id, day)` pairs with one read and batched upserts.
+
+    Only meant for writes that can add reservations, never remove them, such as bulk imports.
+    """
+    if not keys:
+        return
+    days = [day for _, day in keys]
+    reservations = Reservation.objects.filter(
+        room_id__in={room_id for room_id, _ in keys},
+        start_date__lt=slot_datetime(max(days), SLOTS_PER_DAY),
+        end_date__gt=slot_datetime(min(days), 0),
+    ).values_list("room_id", "start_date", "end_date")
+    bitmaps = occupancy_bitmaps(reservations.order_by().iterator(chunk_size=2000))
+    RoomOccupancy.objects.bulk_create(
+        (
+            RoomOccupancy(room_id=room_id, date=day, slots=bitmaps[(room_id, day)])
+            for room_id, day in keys
+            if bitmaps.get((room_id, day))
+        ),
+        update_conflicts=True,
+        unique_fields=["room", "date"],
+        update_fields=["slots"],
+        batch_size=1000,
+    )
+
+
+def occupancy_mask(room_ids: list[int], first_day: date, day_count: int) -> np.ndarray:
+    """Boolean array of shape (rooms, days * SLOTS_PER_DAY), True where a slot is reserved."""
+    busy = np.zeros((len(room_ids), day_count, SLOTS_PER_DAY), dtype=bool)
+    rows = list(
+        RoomOccupancy.objects.filter(
+            room_id__in=room_ids, date__gte=first_day, date__lt=first_day + timedelta(days=day_count)
+        )
+        .annotate(bits=Cast("slots", CharField()))
+        .values_list("room_id", "date", "bits")
+    )
+    if rows:
+        positions = {room_id: position for position, room_id in enumerate(room_ids)}
+        room_positions = [positions[row[0]] for row in rows]
+        day_positions = [(row[1] - first_day).days for row in rows]
+        bits = np.frombuffer("".join(row[2] for row in rows).encode(), dtype=np.uint8).reshape(-1, SLOTS_PER_DAY)
+        busy[room_positions, day_positions] = bits == ord("1")
+    return busy.reshape(len(room_ids), -1)
+
+
+def find_free_rooms(capacity: int, duration: int, start: datetime, end: datetime) -> list[dict]:
+    """Active rooms with at least `capacity` seats and `duration` free minutes between `start` and `end`.
+
+    Each room is returned with its earliest free slot, earliest rooms first.
+    """
+    from .recurrence import expand_series  # recurrence imports this module
+
+    slot_span = -(-duration // SLOT_MINUTES)
+    if slot_span > SLOTS_PER_DAY:
+        return []
+    rooms = list(
+        Room.objects.filter(is_active=True, capacity__gte=capacity).order_by("id").values("id", "name", "capacity")
+    )
+    start = max(start, timezone.now())
+    if not rooms or end <= start:
+        return []
+
+    first_day = timezone.localdate(start)
+    day_count = (timezone.localdate(end) - first_day).days + 1
+    busy = occupancy_mask([room["id"] for room in rooms], first_day, day_count)
+    # Occurrences of recurring series past their materialized horizon have no bitmaps yet.
+    positions = {room["id"]: position for position, room in enumerate(rooms)}
+    occurrences = expand_series(first_day, first_day + timedelta(days=day_count - 1), room_ids=list(positions))
+    if occurrences:
+        first_slots = flat_slots([local_epoch(begin) for _, _, begin, _ in occurrences], first_day)
+        last_slots = flat_slots([local_epoch(finish) for _, _, _, finish in occurrences], first_day, round_up=True)
+        for (series, _, _, _), first_slot, last_slot in zip(occurrences, first_slots, last_slots):
+            busy[positions[series.room_id], first_slot:last_slot] = True
+    busy[:, : flat_slots([local_epoch(start)], first_day, round_up=True)[0]] = True
+    busy[:, flat_slots([local_epoch(end)], first_day)[0] :] = True
+
+    # A run of `slot_span` free slots starts at every position where the windowed sum of free slots is full.
+    free = (~busy).reshape(len(rooms), day_count, SLOTS_PER_DAY)
+    free_counts = np.concatenate(
+        [np.zeros((len(rooms), day_count, 1), dtype=np.int64), np.cumsum(free, axis=2)], axis=2
+    )
+    fits = ((free_counts[:, :, slot_span:] - free_counts[:, :, :-slot_span]) == slot_span).reshape(len(rooms), -1)
+    positions_per_day = SLOTS_PER_DAY - slot_span + 1
+    earliest = fits.argmax(axis=1)
+
+    results = []
+    for room, has_slot, position in zip(rooms, fits.any(axis=1), earliest):
+        if not has_slot:
+            continue
+        slot_start = slot_datetime(
+            first_day + timedelta(days=int(position // positions_per_day)), int(position % positions_per_day)
+        )
+        results.append({**room, "start": slot_start, "end": slot_start + timedelta(minutes=duration)})
+    results.sort(key=lambda result: (result["start"], result["capacity"]))
+    return results
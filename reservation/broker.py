@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """Messages published for any of `days` and `rooms`, an empty filter matching everything."""
+
+    def __init__(self, broker, days=(), rooms=(), max_size: int = 100):
+        self.broker = broker
+        self.days = {str(day) for day in days}
+        self.rooms = set(rooms)
+        self.queue = asyncio.Queue(maxsize=max_size)
+        self.loop = asyncio.get_running_loop()
+        self.overflowed = False
+
+    def matches(self, message: dict) -> bool:
+        return (not self.days or bool(self.days.intersection(message["days"]))) and (
+            not self.rooms or bool(self.rooms.intersection(message["rooms"]))
+        )
+
+    def deliver(self, message: dict):
+        if self.queue.full():
+            # A reader this far behind should reload the calendar rather than replay the backlog.
+            self.overflowed = True
+            return
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: float | None = None) -> dict | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """Delivers messages to the subscribers of the current process.
+
+    `publish` may be called from any thread, messages are handed to each
+    subscriber's event loop. Deployments running several processes need a broker
+    with the same interface backed by a shared channel.
+    """
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, days=(), rooms=()) -> Subscription:
+        subscription = Subscription(self, days=days, rooms=rooms)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, message: dict):
+        with self._lock:
+            subscriptions = [subscription for subscription in self._subscriptions if subscription.matches(message)]
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's event loop is closed.
+                self.unsubscribe(subscription)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, "RESERVATION_EVENT_BROKER", "reservation.broker.LocalBroker"))()
+
+
+def publish_on_commit(message: dict):
+    transaction.on_commit(lambda: get_broker().publish(message))
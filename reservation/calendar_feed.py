@@ -0,0 +1,111 @@
+import hashlib
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .models import FeedVersion
+
+FEED_VERSION_KEY_PREFIX = "reservation-feed-version"
+ALL_DAYS = "all"
+FEED_REBUILD_LOCK_TIMEOUT = 10
+FEED_REBUILD_WAIT = 0.5
+FEED_REBUILD_POLL_INTERVAL = 0.05
+
+
+def feed_version_key(scope: date | str) -> str:
+    return f"{FEED_VERSION_KEY_PREFIX}:{scope}"
+
+
+def room_scope(room_id: int) -> str:
+    return f"room-{room_id}"
+
+
+def team_scope(team_id: int) -> str:
+    return f"team-{team_id}"
+
+
+def bump_feed_versions(scopes=None):
+    """Mark the feeds of `scopes`, or every feed, as changed once the current transaction commits.
+
+    A scope is a day, for the calendar feed that always lists every room, or the
+    `room_scope`/`team_scope` of an iCalendar feed. Changes to rooms, teams or
+    recurring series are not tied to a scope and bump the stamp shared by all.
+    Stamps are kept in the database, so bumps by cron jobs and management
+    commands reach every server process.
+    """
+    scopes = sorted({str(scope) for scope in scopes}) if scopes is not None else [ALL_DAYS]
+    if scopes:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def _bump(scopes: list[str]):
+    # Stamps are whole seconds so they can double as Last-Modified, and always move forward so two
+    # changes within the same second still get different stamps. Sorted scopes keep writers from deadlocking.
+    table = FeedVersion._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (scope, stamp) SELECT scope, %s FROM unnest(%s::text[]) AS scope"
+            f" ON CONFLICT (scope) DO UPDATE SET stamp = GREATEST(EXCLUDED.stamp, {table}.stamp + 1)",
+            [int(time.time()), scopes],
+        )
+
+
+def get_version_stamps(scopes) -> dict[str, int]:
+    scopes = [ALL_DAYS, *(str(scope) for scope in scopes)]
+    stamps = dict(FeedVersion.objects.filter(scope__in=scopes).values_list("scope", "stamp"))
+    # A scope without a stamp has not changed since the migration that stamped ALL_DAYS.
+    return {feed_version_key(scope): stamps.get(scope, 0) for scope in scopes}
+
+
+def get_feed_versions(first_day: date, last_day: date) -> dict[str, int]:
+    return get_version_stamps(first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1))
+
+
+def feed_etag(versions: dict[str, int], *parts) -> str:
+    return hashlib.md5(repr((parts, sorted(versions.items()))).encode()).hexdigest()
+
+
+def feed_last_modified(versions: dict[str, int]) -> int:
+    return max(versions.values())
+
+
+def day_events_key(day: date, versions: dict[str, int]) -> str:
+    return f"reservation-feed-events:{day}:{versions[feed_version_key(day)]}:{versions[feed_version_key(ALL_DAYS)]}"
+
+
+def get_day_events(days: list[date], versions: dict[str, int], build) -> dict[date, list]:
+    """Calendar events of each day, from the cache or from `build(days)` on a miss.
+
+    Entries are keyed by the version stamps of their day, so a bump invalidates them.
+    A miss is rebuilt by a single caller: the others wait for its result, and
+    rebuild themselves if it does not show up within `FEED_REBUILD_WAIT` seconds.
+    """
+    keys = {day: day_events_key(day, versions) for day in days}
+    cached = cache.get_many(keys.values())
+    missing = [day for day in days if keys[day] not in cached]
+    owned = [day for day in missing if cache.add(f"{keys[day]}:lock", True, timeout=FEED_REBUILD_LOCK_TIMEOUT)]
+    if owned:
+        try:
+            built = build(owned)
+            cache.set_many({keys[day]: built[day] for day in owned}, timeout=_get_cache_timeout())
+            cached.update({keys[day]: built[day] for day in owned})
+        finally:
+            cache.delete_many([f"{keys[day]}:lock" for day in owned])
+
+    waiting = [day for day in missing if day not in owned]
+    deadline = time.monotonic() + FEED_REBUILD_WAIT
+    while waiting and time.monotonic() < deadline:
+        time.sleep(FEED_REBUILD_POLL_INTERVAL)
+        cached.update(cache.get_many([keys[day] for day in waiting]))
+        waiting = [day for day in waiting if keys[day] not in cached]
+    if waiting:
+        built = build(waiting)
+        cached.update({keys[day]: built[day] for day in waiting})
+    return {day: cached[keys[day]] for day in days}
+
+
+def _get_cache_timeout() -> int:
+    return getattr(settings, "RESERVATION_FEED_CACHE_TIMEOUT", 60 * 60)
@@ -0,0 +1,90 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage
+from django.db import connection, transaction
+from mailer.queue import enqueue_messages
+
+from .models import Reservation
+
+User = get_user_model()
+
+_local = threading.local()
+
+
+class CancellationBatch:
+    """Cancelled reservations of one transaction, their team members told once it commits."""
+
+    def __init__(self, transaction_block=None):
+        self.transaction_block = transaction_block
+        self.meetings = {}
+        # Looked up while the transaction still sees them, cascades may delete them before it commits.
+        self.rooms = {}
+        self.members = {}
+        self.savepoints = set()
+        self.sent = False
+
+    def add(self, reservation: Reservation):
+        if reservation.room_id not in self.rooms:
+            self.rooms[reservation.room_id] = str(reservation.room)
+        if reservation.team_id not in self.members:
+            self.members[reservation.team_id] = list(
+                User.objects.filter(team_id=reservation.team_id).values_list("first_name", "last_name", "email")
+            )
+        self.meetings[reservation.pk] = (
+            reservation.team_id,
+            reservation.start_date,
+            reservation.end_date,
+            reservation.room_id,
+        )
+
+    def messages(self) -> list[EmailMessage]:
+        """One email per member, listing every cancelled meeting of their team."""
+        meetings_by_recipient = {}
+        for team_id, start_date, end_date, room_id in self.meetings.values():
+            for first_name, last_name, email in self.members[team_id]:
+                name, meetings = meetings_by_recipient.setdefault(email, (f"{first_name} {last_name}", []))
+                meetings.append(f"from {start_date} to {end_date} in {self.rooms[room_id]}")
+        messages = []
+        for email, (name, meetings) in meetings_by_recipient.items():
+            if len(meetings) == 1:
+                message = f"""{name}, please note,
+        reservation for your team's meeting
+        {meetings[0]} has been CANCELLED."""
+            else:
+                listed = ",\n        ".join(meetings)
+                message = f"""{name}, please note,
+        reservations for your team's meetings
+        {listed} have been CANCELLED."""
+            messages.append(EmailMessage("Meeting Cancelled", message, "noreply@unchained.com", [email]))
+        return messages
+
+    def __call__(self):
+        # Registered once per savepoint, the first callback that survived sends the whole batch.
+        if self.sent:
+            return
+        self.sent = True
+        # Deletes rolled back with their savepoint left the reservations in place.
+        kept = set(Reservation.objects.filter(pk__in=self.meetings).values_list("pk", flat=True))
+        self.meetings = {pk: meeting for pk, meeting in self.meetings.items() if pk not in kept}
+        if self.meetings:
+            enqueue_messages(self.messages())
+
+
+def notify_cancellation(reservation: Reservation):
+    """Tell the team of `reservation` it was cancelled, together with the other cancellations of the transaction."""
+    if not connection.in_atomic_block:
+        batch = CancellationBatch()
+        batch.add(reservation)
+        enqueue_messages(batch.messages())
+        return
+    transaction_block = connection.atomic_blocks[0]
+    batch = getattr(_local, "batch", None)
+    if batch is None or batch.sent or batch.transaction_block is not transaction_block:
+        batch = _local.batch = CancellationBatch(transaction_block)
+    savepoint = tuple(connection.savepoint_ids)
+    if savepoint not in batch.savepoints:
+        # Django drops the callback with its savepoint, one per savepoint keeps the batch if any of them commits.
+        batch.savepoints.add(savepoint)
+        transaction.on_commit(batch)
+    batch.add(reservation)
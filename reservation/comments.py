@@ -0,0 +1,36 @@
+import base64
+from datetime import datetime
+
+from .models import Comment
+
+COMMENT_PAGE_SIZE = 20
+# Rendered the same by the room page and the comments endpoint.
+COMMENT_DATE_FORMAT = "F j, Y, g:i A"
+
+
+def encode_cursor(comment: Comment) -> str:
+    return base64.urlsafe_b64encode(f"{comment.created_at.isoformat()},{comment.id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Raises ValueError for a cursor that `encode_cursor` did not make."""
+    # Decoding errors are all ValueErrors.
+    created_at, comment_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(",")
+    created_at = datetime.fromisoformat(created_at)
+    if created_at.tzinfo is None:
+        raise ValueError(cursor)
+    return created_at, int(comment_id)
+
+
+def comment_page(room_id: int, after: tuple[datetime, int] | None = None, limit: int = COMMENT_PAGE_SIZE):
+    """Newest comments of a room with their users, following the `(created_at, id)` key `after` when given.
+
+    Returns the comments and the cursor of the next page, or None on the last page.
+    """
+    comments = Comment.objects.filter(room_id=room_id).select_related("user").order_by("-created_at", "-id")
+    if after:
+        created_at, comment_id = after
+        # The plain created_at bound lets the (room, created_at, id) index range scan start at the key.
+        comments = comments.filter(created_at__lte=created_at).exclude(created_at=created_at, id__gte=comment_id)
+    page = list(comments[: limit + 1])
+    return page[:limit], encode_cursor(page[limit - 1]) if len(page) > limit else None
@@ -0,0 +1,31 @@
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+# serialization_failure and deadlock_detected
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+
+def is_retryable(error: OperationalError) -> bool:
+    return getattr(error.__cause__, "sqlstate", None) in RETRYABLE_SQLSTATES
+
+
+def run_with_retry(func, attempts: int | None = None):
+    """Call `func`, which runs its own transaction, again after a serialization failure or deadlock.
+
+    Waits between attempts grow exponentially up to `RESERVATION_BOOKING_RETRY_MAX_DELAY`,
+    with full jitter. Inside an outer transaction the failure is raised at once,
+    since only the outer transaction could be retried.
+    """
+    attempts = attempts or getattr(settings, "RESERVATION_BOOKING_ATTEMPTS", 3)
+    base_delay = getattr(settings, "RESERVATION_BOOKING_RETRY_DELAY", 0.05)
+    max_delay = getattr(settings, "RESERVATION_BOOKING_RETRY_MAX_DELAY", 0.5)
+    for attempt in range(attempts):
+        try:
+            return func()
+        except OperationalError as error:
+            if connection.in_atomic_block or not is_retryable(error) or attempt == attempts - 1:
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2**attempt)))
@@ -1,11 +1,28 @@
 from datetime import datetime, timezone, time, timedelta
 from typing import Any
 from django import forms
+from django.contrib.postgres.forms import SimpleArrayField
+from django.utils.timezone import localdate, make_aware
 
-from .models import Comment, Rating, Reservation, Room
+from .models import (
+    CLOSING_TIME,
+    OPENING_TIME,
+    OVERLAPPING_RESERVATIONS_CONSTRAINT,
+    Comment,
+    Rating,
+    RecurringReservation,
+    Reservation,
+    Room,
+)
 from django.forms.widgets import NumberInput
-from django.db.models import Q
+from django.db import IntegrityError
 from shared.forms import BootstrapModelForm
+from .availability import SLOT_MINUTES, SLOTS_PER_DAY
+from .booking import book_reservation
+from .comments import COMMENT_PAGE_SIZE, decode_cursor
+from .interval_index import reservation_index
+from .ratings import rate_room
+from .recurrence import find_series_conflicts, materialize_series, overlapping_occurrences
 
 
 class SubmitRatingForm(forms.ModelForm):
@@ -23,13 +40,8 @@ class SubmitRatingForm(forms.ModelForm):
 
     def save(self, commit: bool = True) -> Any:
         rate = super().save(commit=False)
-        rate_db = Rating.objects.filter(user=rate.user, room=rate.room).first()
-        if rate_db:
-            value = rate.value
-            rate = rate_db
-            rate.value = value
         if commit:
-            rate.save()
+            rate = rate_room(rate)
         return rate
 
 
@@ -132,7 +144,7 @@ class ReservationForm(forms.ModelForm):
         end = cleaned_data.get("end_date")
         room = cleaned_data.get("room")
         now = datetime.now(timezone.utc)
-        overlapping_reservations = None
+        overlapping = False
 
         if start and end:
             start_time = start.time()
@@ -147,19 +159,34 @@ class ReservationForm(forms.ModelForm):
                 self.add_error("start_date", forms.ValidationError("End time should be between 7 am and 10 pm."))
             if end <= now:
                 self.add_error("end_date", forms.ValidationError("The reservation time is not valid."))
-            overlapping_reservations = Reservation.objects.filter(
-                Q(room=room)
-                & (
-                    Q(start_date__range=(start, end - timedelta(seconds=1)))
-                    | Q(end_date__range=(start + timedelta(seconds=1), end))
+            if room:
+                overlapping = reservation_index.overlaps(room.id, start, end, exclude_id=self.instance.pk) or bool(
+                    overlapping_occurrences(room.id, start, end)
                 )
-            ).all()
-            # for reservation in overlapping_reservations:
-            #     print(reservation)
-        if overlapping_reservations:
+        if overlapping:
             raise forms.ValidationError("Overlapping Reservation!")
         return cleaned_data
 
+    def _get_validation_exclusions(self):
+        # Overlaps are enforced by the exclusion constraint on save, skip its extra query in full_clean.
+        exclusions = super()._get_validation_exclusions()
+        exclusions.add("start_date")
+        return exclusions
+
+    def save(self, commit: bool = True) -> Any:
+        reservation = super().save(commit=False)
+        if commit:
+            try:
+                booked = book_reservation(reservation)
+            except IntegrityError as e:
+                if OVERLAPPING_RESERVATIONS_CONSTRAINT not in str(e):
+                    raise
+                booked = False
+            if not booked:
+                self.add_error(None, forms.ValidationError("Overlapping Reservation!"))
+                return None
+        return reservation
+
 
 class RoomCreateForm(BootstrapModelForm):
     def __init__(self, *args, **kwargs):
@@ -168,3 +195,191 @@ class RoomCreateForm(BootstrapModelForm):
     class Meta:
         model = Room
         fields = ["name", "capacity", "is_active", "description"]
+
+
+class RoomSearchForm(forms.Form):
+    MAX_WINDOW = timedelta(days=31)
+
+    capacity = forms.IntegerField(min_value=1)
+    duration = forms.IntegerField(min_value=SLOT_MINUTES, max_value=SLOTS_PER_DAY * SLOT_MINUTES)
+    start = forms.DateTimeField(required=False)
+    end = forms.DateTimeField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get("start") or datetime.now(timezone.utc)
+        end = cleaned_data.get("end") or start + timedelta(days=1)
+        if end <= start:
+            self.add_error("end", forms.ValidationError("End date must be greater than start date."))
+        elif end - start > self.MAX_WINDOW:
+            self.add_error("end", forms.ValidationError("Search window can not be longer than 31 days."))
+        cleaned_data["start"] = start
+        cleaned_data["end"] = end
+        return cleaned_data
+
+
+class RoomTextSearchForm(forms.Form):
+    q = forms.CharField(max_length=200)
+    limit = forms.IntegerField(min_value=1, max_value=50, required=False)
+
+    def clean_limit(self):
+        return self.cleaned_data.get("limit") or 20
+
+
+class RoomCommentsForm(forms.Form):
+    cursor = forms.CharField(max_length=200, required=False)
+    limit = forms.IntegerField(min_value=1, max_value=100, required=False)
+
+    def clean_cursor(self):
+        cursor = self.cleaned_data.get("cursor")
+        if not cursor:
+            return None
+        try:
+            return decode_cursor(cursor)
+        except ValueError:
+            raise forms.ValidationError("Invalid cursor.")
+
+    def clean_limit(self):
+        return self.cleaned_data.get("limit") or COMMENT_PAGE_SIZE
+
+
+class ReservationFeedForm(forms.Form):
+    MAX_WINDOW = timedelta(days=42)
+
+    date = forms.DateField(required=False)
+    start = forms.DateTimeField(required=False)
+    end = forms.DateTimeField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        day = cleaned_data.get("date") or localdate()
+        start = cleaned_data.get("start") or make_aware(datetime.combine(day, time.min))
+        end = cleaned_data.get("end") or start + timedelta(days=1)
+        if end <= start:
+            self.add_error("end", forms.ValidationError("End date must be greater than start date."))
+        elif end - start > self.MAX_WINDOW:
+            self.add_error("end", forms.ValidationError("Feed window can not be longer than 42 days."))
+        cleaned_data["start"] = start
+        cleaned_data["end"] = end
+        return cleaned_data
+
+
+class ReservationChangesForm(forms.Form):
+    MAX_LIMIT = 1000
+
+    since = forms.IntegerField(min_value=0)
+    limit = forms.IntegerField(min_value=1, max_value=MAX_LIMIT, required=False)
+
+
+class ReservationEventStreamForm(forms.Form):
+    MAX_WINDOW = ReservationFeedForm.MAX_WINDOW
+
+    start = forms.DateField(required=False)
+    end = forms.DateField(required=False)
+    rooms = SimpleArrayField(forms.IntegerField(), required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get("start"), cleaned_data.get("end")
+        cleaned_data["days"] = []
+        if start and end:
+            if end <= start:
+                self.add_error("end", forms.ValidationError("End date must be greater than start date."))
+            elif end - start > self.MAX_WINDOW:
+                self.add_error("end", forms.ValidationError("Window can not be longer than 42 days."))
+            else:
+                cleaned_data["days"] = [start + timedelta(days=offset) for offset in range((end - start).days)]
+        elif start:
+            cleaned_data["days"] = [start]
+        return cleaned_data
+
+
+class RoomUtilizationForm(forms.Form):
+    MAX_WINDOW = timedelta(days=366)
+    DEFAULT_WINDOW = timedelta(weeks=4)
+
+    start = forms.DateField(required=False)
+    end = forms.DateField(required=False)
+    rooms = SimpleArrayField(forms.IntegerField(), required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        end = cleaned_data.get("end") or localdate()
+        start = cleaned_data.get("start") or end - self.DEFAULT_WINDOW + timedelta(days=1)
+        if end < start:
+            self.add_error("end", forms.ValidationError("End date can not be before start date."))
+        elif end - start >= self.MAX_WINDOW:
+            self.add_error("end", forms.ValidationError("Window can not be longer than 366 days."))
+        cleaned_data["start"] = start
+        cleaned_data["end"] = end
+        return cleaned_data
+
+
+class RecurringReservationForm(BootstrapModelForm):
+    weekdays = forms.TypedMultipleChoiceField(
+        choices=RecurringReservation.WEEKDAY_CHOICES,
+        coerce=int,
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+        help_text="Weekly series only, defaults to the weekday of the first date.",
+    )
+
+    class Meta:
+        model = RecurringReservation
+        fields = [
+            "room",
+            "team",
+            "frequency",
+            "interval",
+            "weekdays",
+            "first_date",
+            "until",
+            "start_time",
+            "end_time",
+            "note",
+        ]
+        widgets = {
+            "first_date": forms.DateInput(attrs={"type": "date"}),
+            "until": forms.DateInput(attrs={"type": "date"}),
+            "start_time": forms.TimeInput(attrs={"type": "time"}),
+            "end_time": forms.TimeInput(attrs={"type": "time"}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop("user", None)
+        super().__init__(*args, **kwargs)
+        self.fields["room"].queryset = Room.objects.filter(is_active=True)
+        if not self.user.has_perm("reservation.add_reservation"):
+            del self.fields["team"]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_time = cleaned_data.get("start_time")
+        end_time = cleaned_data.get("end_time")
+        first_date = cleaned_data.get("first_date")
+        until = cleaned_data.get("until")
+        if start_time and end_time:
+            if end_time <= start_time:
+                self.add_error("end_time", forms.ValidationError("End time must be greater than start time."))
+            if start_time < OPENING_TIME or end_time > CLOSING_TIME:
+                self.add_error("start_time", forms.ValidationError("Reservations should be between 7 am and 10 pm."))
+        if first_date and until and until < first_date:
+            self.add_error("until", forms.ValidationError("Until date must not be before the first date."))
+        return cleaned_data
+
+    def _post_clean(self):
+        super()._post_clean()
+        if "team" not in self.fields:
+            self.instance.team = self.user.team
+        self.instance.reserver_user = self.user
+        if not self.errors:
+            conflicts = find_series_conflicts(self.instance)
+            if conflicts:
+                days = ", ".join(str(day) for day in conflicts[:5])
+                self.add_error(None, forms.ValidationError(f"Overlapping Reservation on {days}!"))
+
+    def save(self, commit: bool = True) -> Any:
+        series = super().save(commit=commit)
+        if commit:
+            materialize_series(series)
+        return series
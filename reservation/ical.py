@@ -0,0 +1,118 @@
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RecurringReservation
+
+ICS_DATETIME_FORMAT = "%Y%m%dT%H%M%S"
+ICS_WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+
+def ics_escape(value) -> str:
+    return (
+        str(value or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def ics_utc(value: datetime) -> str:
+    return value.astimezone(dt_timezone.utc).strftime(ICS_DATETIME_FORMAT) + "Z"
+
+
+def ics_local(day: date, value: time) -> str:
+    return datetime.combine(day, value).strftime(ICS_DATETIME_FORMAT)
+
+
+def ics_component(name: str, *properties: str) -> str:
+    """A component with its content lines folded at 75 octets, as RFC 5545 requires."""
+    lines = []
+    for line in (f"BEGIN:{name}", *properties, f"END:{name}"):
+        encoded = line.encode()
+        while len(encoded) > 75:
+            # Continuation lines start with a space, and no line may split a multi-byte character.
+            cut = 75
+            while cut and (encoded[cut] & 0xC0) == 0x80:
+                cut -= 1
+            lines.append(encoded[:cut].decode())
+            encoded = b" " + encoded[cut:]
+        lines.append(encoded.decode())
+    return "\r\n".join(lines) + "\r\n"
+
+
+def reservation_vevent(reservation: dict, stamp: str) -> str:
+    return ics_component(
+        "VEVENT",
+        f"UID:reservation-{reservation['id']}@unchained",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART:{ics_utc(reservation['start_date'])}",
+        f"DTEND:{ics_utc(reservation['end_date'])}",
+        f"SUMMARY:{ics_escape(reservation['team__name'])}",
+        f"LOCATION:{ics_escape(reservation['room__name'])}",
+        f"DESCRIPTION:{ics_escape(reservation['note'])}",
+    )
+
+
+def series_vevent(series: RecurringReservation, stamp: str) -> str | None:
+    """The occurrences of `series` that are not stored as reservations yet, as one recurring event."""
+    first_day = series.first_date
+    if series.materialized_until:
+        first_day = max(first_day, series.materialized_until + timedelta(days=1))
+    last_day = series.until or first_day + timedelta(days=366 * series.interval)
+    first_occurrence = next((day for day, _, _ in series.occurrences(first_day, last_day)), None)
+    if first_occurrence is None:
+        return None
+    rule = f"FREQ={series.frequency.upper()};INTERVAL={series.interval}"
+    if series.frequency == series.WEEKLY:
+        rule += ";BYDAY=" + ",".join(
+            ICS_WEEKDAYS[day] for day in sorted(series.weekdays or [series.first_date.weekday()])
+        )
+    if series.until:
+        rule += f";UNTIL={ics_utc(timezone.make_aware(datetime.combine(series.until, time.max)))}"
+    # A TZID needs a VTIMEZONE, except for UTC, written with a Z. Other zones are left to clients resolving the name.
+    utc = settings.TIME_ZONE == "UTC"
+    tzid, suffix = ("", "Z") if utc else (f";TZID={settings.TIME_ZONE}", "")
+    exdates = [ics_local(day, series.start_time) + suffix for day in sorted(series.exdates) if day > first_occurrence]
+    return ics_component(
+        "VEVENT",
+        f"UID:series-{series.id}@unchained",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART{tzid}:{ics_local(first_occurrence, series.start_time)}{suffix}",
+        f"DTEND{tzid}:{ics_local(first_occurrence, series.end_time)}{suffix}",
+        f"RRULE:{rule}",
+        *([f"EXDATE{tzid}:{','.join(exdates)}"] if exdates else []),
+        f"SUMMARY:{ics_escape(series.team.name)}",
+        f"LOCATION:{ics_escape(series.room.name)}",
+        f"DESCRIPTION:{ics_escape(series.note)}",
+    )
+
+
+def ics_calendar(name: str, reservations, series_list):
+    """Yield an iCalendar document one event at a time."""
+    stamp = ics_utc(timezone.now())
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Unchained//Reservations//EN\r\nCALSCALE:GREGORIAN\r\n"
+    yield f"X-WR-CALNAME:{ics_escape(name)}\r\n"
+    for reservation in reservations:
+        yield reservation_vevent(reservation, stamp)
+    for series in series_list:
+        vevent = series_vevent(series, stamp)
+        if vevent:
+            yield vevent
+    yield "END:VCALENDAR\r\n"
+
+
+async def iterate_in_chunks(iterator, size: int):
+    """Serve a sync iterator of strings to an ASGI server, reading `size` items per trip to the sync thread.
+
+    ASGI handlers would otherwise read a sync iterator to the end before sending anything.
+    """
+    iterator = iter(iterator)
+    read = sync_to_async(lambda: "".join(islice(iterator, size)))
+    while chunk := await read():
+        yield chunk
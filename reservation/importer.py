@@ -0,0 +1,225 @@
+import csv
+import json
+from datetime import datetime
+from typing import NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .availability import as_datetime, refresh_room_occupancy_days
+from .broker import publish_on_commit
+from .calendar_feed import bump_feed_versions, room_scope, team_scope
+from .interval_index import DayIntervals, reservation_index
+from .models import CLOSING_TIME, OPENING_TIME, Reservation, ReservationChange, Room
+from .recurrence import expand_series
+from .utilization import apply_utilization_changes
+from users.models import Team
+
+User = get_user_model()
+
+IMPORT_FIELDS = ["room", "team", "reserver_user", "start_date", "end_date", "note"]
+
+
+class ImportRow(NamedTuple):
+    line: int
+    room_id: int
+    team_id: int
+    reserver_user_id: int | None
+    start_date: datetime
+    end_date: datetime
+    note: str
+
+
+def read_rows(file, file_format: str):
+    """Yield `(line number, dict)` pairs from a CSV file with a header row or a JSON Lines file."""
+    if file_format == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line, text in enumerate(file, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except json.JSONDecodeError:
+                row = None
+            yield line, row if isinstance(row, dict) else None
+
+
+def _as_id(value) -> int | None:
+    if value in (None, ""):
+        return None
+    return int(value)
+
+
+def parse_row(line: int, row: dict | None, current_timezone) -> ImportRow:
+    if row is None:
+        raise ValidationError("Not a JSON object.")
+    try:
+        room_id, team_id, reserver_user_id = (_as_id(row.get(field)) for field in IMPORT_FIELDS[:3])
+    except (TypeError, ValueError):
+        raise ValidationError("Room, team and reserver user must be ids.")
+    if room_id is None or team_id is None:
+        raise ValidationError("Room and team are required.")
+    if not row.get("start_date") or not row.get("end_date"):
+        raise ValidationError("Start and end dates are required.")
+    if not isinstance(row["start_date"], str) or not isinstance(row["end_date"], str):
+        raise ValidationError("Enter a valid date/time.")
+    if not isinstance(row.get("note") or "", str):
+        raise ValidationError("Note must be text.")
+    start, end = as_datetime(row["start_date"]), as_datetime(row["end_date"])
+    if start is None or end is None:
+        raise ValidationError("Enter a valid date/time.")
+    if end <= start:
+        raise ValidationError("End date must be greater than start date.")
+    local_start, local_end = start.astimezone(current_timezone), end.astimezone(current_timezone)
+    if local_start.date() != local_end.date():
+        raise ValidationError("Start and end dates must be on the same day.")
+    if local_start.time() < OPENING_TIME or local_end.time() > CLOSING_TIME:
+        raise ValidationError(f"Reservations must be between {OPENING_TIME:%H:%M} and {CLOSING_TIME:%H:%M}.")
+    return ImportRow(line, room_id, team_id, reserver_user_id, start, end, row.get("note") or "")
+
+
+def _overlapping_lines(rows: list[ImportRow]) -> dict[int, str]:
+    """Rows overlapping an earlier row of the same room in the file, found with one sort and sweep."""
+    rejected = {}
+    previous = None
+    for row in sorted(rows, key=lambda row: (row.room_id, row.start_date, row.line)):
+        if previous and previous.room_id == row.room_id and row.start_date < previous.end_date:
+            first, second = sorted([previous, row], key=lambda row: row.line)
+            rejected[second.line] = f"Overlaps the reservation on line {first.line}."
+            if second is previous:
+                previous = row
+            continue
+        previous = row
+    return rejected
+
+
+def _series_overlapping_lines(rows: list[ImportRow], current_timezone) -> dict[int, str]:
+    """Rows overlapping an occurrence of a recurring series past its materialized horizon."""
+    if not rows:
+        return {}
+    days = [row.start_date.astimezone(current_timezone).date() for row in rows]
+    occurrences = {}
+    for series, day, start, end in expand_series(min(days), max(days), room_ids={row.room_id for row in rows}):
+        occurrences.setdefault((series.room_id, day), []).append((series.pk, start, end))
+    buckets = {key: DayIntervals(intervals) for key, intervals in occurrences.items()}
+    rejected = {}
+    for row, day in zip(rows, days):
+        bucket = buckets.get((row.room_id, day))
+        if bucket and bucket.overlaps(row.start_date, row.end_date):
+            rejected[row.line] = "Overlaps an occurrence of a recurring reservation."
+    return rejected
+
+
+def _rejected_references(rows: list[ImportRow]) -> dict[int, str]:
+    active_rooms = set(
+        Room.objects.filter(pk__in={row.room_id for row in rows}, is_active=True).values_list("pk", flat=True)
+    )
+    teams = set(Team.objects.filter(pk__in={row.team_id for row in rows}).values_list("pk", flat=True))
+    users = set(
+        User.objects.filter(pk__in={row.reserver_user_id for row in rows if row.reserver_user_id}).values_list(
+            "pk", flat=True
+        )
+    )
+    rejected = {}
+    for row in rows:
+        if row.room_id not in active_rooms:
+            rejected[row.line] = f"Room {row.room_id} does not exist or is not active."
+        elif row.team_id not in teams:
+            rejected[row.line] = f"Team {row.team_id} does not exist."
+        elif row.reserver_user_id and row.reserver_user_id not in users:
+            rejected[row.line] = f"User {row.reserver_user_id} does not exist."
+    return rejected
+
+
+def import_reservations(rows, dry_run: bool = False) -> tuple[int, dict[int, str]]:
+    """Validate and store `(line number, dict)` rows as reservations in one transaction.
+
+    Returns the number of imported reservations and the reason each rejected line
+    was left out. Rows are checked against each other, stored reservations and
+    recurring series set-wise, then written with COPY and a single INSERT ... SELECT,
+    which skip the model signals, so the occupancy bitmaps, calendar feeds,
+    change journal and live updates are brought up to date in bulk afterwards.
+    """
+    current_timezone = timezone.get_current_timezone()
+    parsed, rejected = [], {}
+    for line, row in rows:
+        try:
+            parsed.append(parse_row(line, row, current_timezone))
+        except ValidationError as error:
+            rejected[line] = " ".join(error.messages)
+    rejected |= _rejected_references(parsed)
+    parsed = [row for row in parsed if row.line not in rejected]
+    rejected |= _overlapping_lines(parsed)
+    parsed = [row for row in parsed if row.line not in rejected]
+
+    table = Reservation._meta.db_table
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Keep bookings from slipping in between the overlap check and the insert.
+            cursor.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+            cursor.execute(
+                "CREATE TEMPORARY TABLE reservation_import (line integer PRIMARY KEY, room_id bigint, team_id bigint,"
+                " reserver_user_id bigint, start_date timestamptz, end_date timestamptz, note text) ON COMMIT DROP"
+            )
+            with cursor.copy(
+                "COPY reservation_import (line, room_id, team_id, reserver_user_id, start_date, end_date, note)"
+                " FROM STDIN"
+            ) as copy:
+                for row in parsed:
+                    copy.write_row(row)
+            # Same range expression as the exclusion constraint, so its GiST index answers the probe.
+            cursor.execute(
+                f"DELETE FROM reservation_import i WHERE EXISTS (SELECT 1 FROM {table} r"
+                " WHERE r.room_id = i.room_id AND r.start_date < r.end_date"
+                " AND TSTZRANGE(r.start_date, r.end_date, '[)') && TSTZRANGE(i.start_date, i.end_date, '[)'))"
+                " RETURNING line"
+            )
+            for (line,) in cursor.fetchall():
+                rejected[line] = "Overlaps an existing reservation."
+            # Series occurrences past their horizon are not rows yet.
+            series_rejected = _series_overlapping_lines(
+                [row for row in parsed if row.line not in rejected], current_timezone
+            )
+            if series_rejected:
+                cursor.execute("DELETE FROM reservation_import WHERE line = ANY(%s)", [list(series_rejected)])
+                rejected |= series_rejected
+            # The journal entries are written by the same statement.
+            cursor.execute(
+                f"WITH imported AS (INSERT INTO {table} (room_id, team_id, reserver_user_id, start_date, end_date, note)"
+                " SELECT room_id, team_id, reserver_user_id, start_date, end_date, note FROM reservation_import"
+                " ORDER BY line RETURNING id, room_id, team_id, start_date, end_date),"
+                f" journal AS (INSERT INTO {ReservationChange._meta.db_table} (reservation_id, action, created_at)"
+                " SELECT id, %s, %s FROM imported ORDER BY id)"
+                " SELECT id, room_id, team_id, start_date, end_date FROM imported",
+                [ReservationChange.CREATED, timezone.now()],
+            )
+            imported = cursor.fetchall()
+            cursor.execute("DROP TABLE reservation_import")
+
+        room_days = {(room_id, start.astimezone(current_timezone).date()) for _, room_id, _, start, _ in imported}
+        refresh_room_occupancy_days(room_days)
+        apply_utilization_changes((room_id, start, end, 1) for _, room_id, _, start, end in imported)
+        rooms, teams = {room_id for _, room_id, _, _, _ in imported}, {team_id for _, _, team_id, _, _ in imported}
+        if imported:
+            bump_feed_versions(
+                {day for _, day in room_days}
+                | {room_scope(room_id) for room_id in rooms}
+                | {team_scope(team_id) for team_id in teams}
+            )
+            transaction.on_commit(reservation_index.clear)
+            publish_on_commit(
+                {
+                    "action": "imported",
+                    "id": None,
+                    "rooms": sorted(rooms),
+                    "days": sorted({str(day) for _, day in room_days}),
+                }
+            )
+        if dry_run:
+            transaction.set_rollback(True)
+    return len(imported), dict(sorted(rejected.items()))
@@ -0,0 +1,177 @@
+import threading
+import time as monotonic_time
+from collections import OrderedDict
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .availability import as_datetime, days_between
+from .models import Reservation
+
+
+def _day_bounds(day) -> tuple[datetime, datetime]:
+    day_start = timezone.make_aware(datetime.combine(day, time.min))
+    return day_start, day_start + timedelta(days=1)
+
+
+class DayIntervals:
+    """Reservations of a single room on a single day, sorted by start.
+
+    `max_ends[i]` is the latest end among the first `i + 1` intervals, so an
+    overlap check is a bisect on `starts` plus one comparison.
+    """
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+        self.max_ends = []
+        for reservation_id, start, end in sorted(intervals, key=lambda interval: interval[1]):
+            self.starts.append(start)
+            self.ends.append(end)
+            self.ids.append(reservation_id)
+        self._refresh_max_ends(0)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _refresh_max_ends(self, position: int):
+        del self.max_ends[position:]
+        for end in self.ends[position:]:
+            self.max_ends.append(max(end, self.max_ends[-1]) if self.max_ends else end)
+
+    def add(self, reservation_id: int, start: datetime, end: datetime):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, reservation_id)
+        self._refresh_max_ends(position)
+
+    def discard(self, reservation_id: int):
+        if reservation_id not in self.ids:
+            return
+        position = self.ids.index(reservation_id)
+        del self.starts[position]
+        del self.ends[position]
+        del self.ids[position]
+        self._refresh_max_ends(position)
+
+    def overlaps(self, start: datetime, end: datetime, exclude_id: int | None = None) -> bool:
+        # Only intervals starting before `end` can overlap, and one of them does iff its end is after `start`.
+        position = bisect_left(self.starts, end) - 1
+        while position >= 0 and self.max_ends[position] > start:
+            if self.ends[position] > start and self.ids[position] != exclude_id:
+                return True
+            position -= 1
+        return False
+
+
+class RoomIntervalIndex:
+    """Per-process cache of `DayIntervals` keyed by (room id, day).
+
+    Buckets are loaded from the database on first use and kept current by the
+    reservation signals once the writing transaction commits. Buckets read inside
+    an atomic block are not cached, since they may contain uncommitted rows, and
+    every bucket expires after `RESERVATION_INTERVAL_INDEX_TTL` seconds so writes
+    made by other processes (or by `update()`/`bulk_create()`) are picked up.
+    Beyond `RESERVATION_INTERVAL_INDEX_SIZE` buckets the least recently used go.
+    """
+
+    def __init__(self, ttl: float | None = None, size: int | None = None):
+        self.ttl = ttl
+        self.size = size
+        self._buckets = OrderedDict()
+        self._keys_by_id = {}
+        self._lock = threading.RLock()
+
+    def get_ttl(self) -> float:
+        if self.ttl is not None:
+            return self.ttl
+        return getattr(settings, "RESERVATION_INTERVAL_INDEX_TTL", 60)
+
+    def get_size(self) -> int:
+        if self.size is not None:
+            return self.size
+        return getattr(settings, "RESERVATION_INTERVAL_INDEX_SIZE", 10_000)
+
+    def _load(self, room_id: int, day) -> DayIntervals:
+        day_start, day_end = _day_bounds(day)
+        rows = Reservation.objects.filter(room_id=room_id, start_date__lt=day_end, end_date__gt=day_start).values_list(
+            "id", "start_date", "end_date"
+        )
+        return DayIntervals(rows)
+
+    def _bucket(self, room_id: int, day) -> DayIntervals:
+        key = (room_id, day)
+        with self._lock:
+            cached = self._buckets.get(key)
+            if cached and monotonic_time.monotonic() - cached[0] < self.get_ttl():
+                self._buckets.move_to_end(key)
+                return cached[1]
+        bucket = self._load(room_id, day)
+        if not connection.in_atomic_block:
+            with self._lock:
+                self._forget_key(key)
+                self._buckets[key] = (monotonic_time.monotonic(), bucket)
+                for reservation_id in bucket.ids:
+                    self._keys_by_id.setdefault(reservation_id, set()).add(key)
+                while len(self._buckets) > self.get_size():
+                    self._forget_key(next(iter(self._buckets)))
+        return bucket
+
+    def _forget_key(self, key):
+        cached = self._buckets.pop(key, None)
+        if cached:
+            for reservation_id in cached[1].ids:
+                keys = self._keys_by_id.get(reservation_id)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self._keys_by_id[reservation_id]
+
+    def overlaps(
+        self, room_id: int, start: datetime, end: datetime, exclude_id: int | None = None, fresh: bool = False
+    ) -> bool:
+        """`fresh` reads the buckets from the database, for checks that must see every committed write."""
+        start, end = as_datetime(start), as_datetime(end)
+        if end <= start:
+            return False
+        load = self._load if fresh else self._bucket
+        for day in days_between(start, end):
+            bucket = load(room_id, day)
+            # Cached buckets are changed in place by the commits of other threads.
+            with self._lock:
+                if bucket.overlaps(start, end, exclude_id=exclude_id):
+                    return True
+        return False
+
+    def discard(self, reservation_id: int):
+        with self._lock:
+            for key in self._keys_by_id.pop(reservation_id, ()):
+                cached = self._buckets.get(key)
+                if cached:
+                    cached[1].discard(reservation_id)
+
+    def update(self, reservation_id: int, room_id: int, start, end):
+        with self._lock:
+            self.discard(reservation_id)
+            start, end = as_datetime(start), as_datetime(end)
+            if end <= start:
+                return
+            for day in days_between(start, end):
+                key = (room_id, day)
+                cached = self._buckets.get(key)
+                if cached:
+                    cached[1].add(reservation_id, start, end)
+                    self._keys_by_id.setdefault(reservation_id, set()).add(key)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._keys_by_id.clear()
+
+
+reservation_index = RoomIntervalIndex()
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import ReservationChange, ReservationChangeCompaction
+
+JOURNAL_LOCK_ID = 7_300_001
+
+
+def record_changes(changes: list[tuple[str, int]]):
+    """Append `(action, reservation id)` entries to the change journal.
+
+    Entries get their sequence numbers when the transaction commits, from a
+    deferred trigger that takes the journal lock (`JOURNAL_LOCK_ID`) right
+    before the commit. So entries become visible in sequence order, and a reader
+    that has seen entry N can never later find a smaller one, while open
+    transactions don't hold up each other's journal writes.
+    """
+    ReservationChange.objects.bulk_create(
+        [ReservationChange(action=action, reservation_id=reservation_id) for action, reservation_id in changes]
+    )
+
+
+def get_journal_floor() -> int:
+    """Sequence number below which entries may have been dropped by compaction."""
+    return ReservationChangeCompaction.objects.aggregate(floor=Max("compacted_through"))["floor"] or 0
+
+
+def get_latest_sequence() -> int:
+    return ReservationChange.objects.aggregate(latest=Max("sequence"))["latest"] or 0
+
+
+def get_changes(since: int, limit: int) -> tuple[list[ReservationChange], bool]:
+    """The latest change of each reservation among the `limit` entries following `since`."""
+    entries = list(ReservationChange.objects.filter(sequence__gt=since).order_by("sequence")[: limit + 1])
+    has_more = len(entries) > limit
+    latest = {entry.reservation_id: entry for entry in entries[:limit]}
+    return sorted(latest.values(), key=lambda entry: entry.sequence), has_more
+
+
+def compact_changes(tombstones_older_than: timedelta | None = None) -> int:
+    """Drop entries superseded by a later change of the same reservation.
+
+    Superseded entries can go at any time, since readers only need the latest
+    change of each reservation. Deletions older than `tombstones_older_than` are
+    dropped too, and clients that have not synced since then must start over.
+    """
+    latest = (
+        ReservationChange.objects.filter(reservation_id=OuterRef("reservation_id")).order_by("-sequence").values("id")
+    )
+    deleted, _ = ReservationChange.objects.exclude(id=Subquery(latest[:1])).delete()
+    if tombstones_older_than is not None:
+        with transaction.atomic():
+            tombstones = ReservationChange.objects.filter(
+                action=ReservationChange.DELETED, created_at__lt=timezone.now() - tombstones_older_than
+            )
+            compacted_through = tombstones.aggregate(last=Max("sequence"))["last"]
+            if compacted_through:
+                ReservationChangeCompaction.objects.create(compacted_through=compacted_through)
+                deleted += tombstones.filter(sequence__lte=compacted_through).delete()[0]
+    return deleted
@@ -0,0 +1,210 @@
+import datetime
+import json
+import statistics
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reservation.models import Reservation, Room
+from reservation.partitions import add_months, create_partition, get_partition_months
+from users.models import OTP, Team
+
+User = get_user_model()
+
+INDEXED_MODELS = (Reservation, OTP)
+
+
+def plan_indexes(node: dict) -> list[str]:
+    names = [node["Index Name"]] if "Index Name" in node else []
+    for child in node.get("Plans", ()):
+        names.extend(name for name in plan_indexes(child) if name not in names)
+    return names
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a realistic data set in a rolled back transaction and compare the EXPLAIN ANALYZE timings of the hot"
+        " reservation queries without and with the model indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=40)
+        parser.add_argument("--teams", type=int, default=200)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--days", type=int, default=730, help="Days of reservations, a quarter in the future.")
+        parser.add_argument("--occupancy", type=float, default=0.5, help="Share of the daily slots that are booked.")
+        parser.add_argument("--otps", type=int, default=50, help="One time passwords per user.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument(
+            "--i-know",
+            action="store_true",
+            help="Run even though dropping the indexes locks the reservation and one time password tables.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        if not options["i_know"]:
+            raise CommandError(
+                "The benchmark drops and recreates the reservation and one time password indexes, which locks both"
+                " tables until it finishes. Run it against a copy of the database and pass --i-know."
+            )
+        with transaction.atomic():
+            seeded = self.seed(options)
+            queries = self.get_queries(seeded)
+            indexes = [(model, index) for model in INDEXED_MODELS for index in model._meta.indexes]
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.remove_index(model, index)
+            before = {name: self.explain(queryset, options["repeat"]) for name, queryset in queries.items()}
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.add_index(model, index)
+            self.analyze()
+            after = {name: self.explain(queryset, options["repeat"]) for name, queryset in queries.items()}
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{seeded['reservations']} reservations, {seeded['otps']} one time passwords,"
+            f" {options['repeat']} runs per query (median execution time)."
+        )
+        self.stdout.write(f"{'query':<18} {'before':>10} {'after':>10}  indexes after")
+        for name in queries:
+            self.stdout.write(
+                f"{name:<18} {before[name]['ms']:>8.3f}ms {after[name]['ms']:>8.3f}ms"
+                f"  {', '.join(after[name]['indexes']) or after[name]['node']}"
+            )
+        if options["output"]:
+            results = {
+                "reservations": seeded["reservations"],
+                "otps": seeded["otps"],
+                "queries": {name: {"before": before[name], "after": after[name]} for name in queries},
+            }
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+
+    def seed(self, options: dict) -> dict:
+        rooms = Room.objects.bulk_create(
+            Room(name=f"Benchmark room {number}", capacity=10) for number in range(options["rooms"])
+        )
+        teams = Team.objects.bulk_create(Team(name=f"Benchmark team {number}") for number in range(options["teams"]))
+        users = User.objects.bulk_create(
+            User(
+                username=f"benchmark{number}",
+                email=f"benchmark{number}@example.com",
+                phone=f"0{number:010d}",
+                password="!",
+                team=teams[number % len(teams)],
+            )
+            for number in range(options["users"])
+        )
+        today = timezone.localdate()
+        first_day = today - datetime.timedelta(days=options["days"] * 3 // 4)
+        first_midnight = timezone.make_aware(datetime.datetime.combine(first_day, datetime.time.min))
+        # Partitions come first, moving rows out of the default partition would leave it full of dead tuples.
+        month, last_month = (
+            first_day.replace(day=1),
+            (first_day + datetime.timedelta(days=options["days"])).replace(day=1),
+        )
+        existing = set(get_partition_months())
+        while month <= last_month:
+            if month not in existing:
+                create_partition(month)
+            month = add_months(month, 1)
+        with connection.cursor() as cursor:
+            # Hour long meetings on the hour, in every room, for the business hours of every day.
+            cursor.execute(
+                f"INSERT INTO {Reservation._meta.db_table} (room_id, team_id, start_date, end_date, note)"
+                " SELECT room_id, (%s::bigint[])[1 + floor(random() * %s)::int],"
+                " day + make_interval(hours => hour), day + make_interval(hours => hour + 1), ''"
+                " FROM unnest(%s::bigint[]) AS room_id,"
+                " generate_series(0, %s - 1) AS offset_days,"
+                " LATERAL (SELECT %s::timestamptz + make_interval(days => offset_days) AS day) AS days,"
+                " generate_series(8, 20) AS hour"
+                " WHERE random() < %s",
+                [
+                    [team.id for team in teams],
+                    len(teams),
+                    [room.id for room in rooms],
+                    options["days"],
+                    first_midnight,
+                    options["occupancy"],
+                ],
+            )
+            reservations = cursor.rowcount
+            cursor.execute(
+                f"INSERT INTO {OTP._meta.db_table} (user_id, otp, created_at)"
+                " SELECT user_id, lpad(floor(random() * 1000000)::text, 6, '0'),"
+                " now() - random() * interval '90 days'"
+                " FROM unnest(%s::bigint[]) AS user_id, generate_series(1, %s)",
+                [[user.id for user in users], options["otps"]],
+            )
+            otps = cursor.rowcount
+            # Pending foreign key checks would keep the indexes from being created in this transaction.
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        self.analyze()
+        return {"rooms": rooms, "teams": teams, "users": users, "reservations": reservations, "otps": otps}
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def get_queries(self, seeded: dict) -> dict:
+        now = timezone.now()
+        tomorrow = timezone.make_aware(
+            datetime.datetime.combine(timezone.localdate() + datetime.timedelta(days=1), datetime.time.min)
+        )
+        week_start = tomorrow - datetime.timedelta(days=timezone.localdate().weekday() + 1)
+        room, team, user = seeded["rooms"][0], seeded["teams"][0], seeded["users"][0]
+        return {
+            # UserReservationListView
+            "user_reservations": Reservation.objects.filter(team=team, end_date__gte=now),
+            # Conflict checks load one room day into the interval index.
+            "conflict_check": Reservation.objects.filter(
+                room_id=room.id, start_date__lt=tomorrow + datetime.timedelta(days=1), end_date__gt=tomorrow
+            ).values_list("id", "start_date", "end_date"),
+            # send_reminders
+            "reminder": Reservation.objects.filter(
+                start_date__gt=now,
+                start_date__lte=now + datetime.timedelta(hours=2),
+                end_date__gt=now,
+                reminded_at__isnull=True,
+            ),
+            # A week of the calendar feed.
+            "calendar_feed": Reservation.objects.filter(
+                start_date__lt=week_start + datetime.timedelta(days=7), end_date__gt=week_start
+            ).order_by("start_date", "id"),
+            # EnterOTPForm
+            "latest_otp": OTP.objects.filter(user=user).order_by("-created_at")[:1],
+        }
+
+    def explain(self, queryset, repeat: int) -> dict:
+        sql, params = queryset.query.sql_with_params()
+        timings = []
+        with connection.cursor() as cursor:
+            for _ in range(repeat):
+                cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", params)
+                (result,) = cursor.fetchone()
+                plan = (json.loads(result) if isinstance(result, str) else result)[0]
+                timings.append(plan["Execution Time"])
+        return {
+            "ms": statistics.median(timings),
+            "node": plan["Plan"]["Node Type"],
+            "indexes": self.parent_indexes(plan_indexes(plan["Plan"])),
+        }
+
+    def parent_indexes(self, names: list[str]) -> list[str]:
+        """Names of the partitioned indexes the partition indexes belong to."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname, parent.relname FROM pg_inherits"
+                " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+                " JOIN pg_class parent ON parent.oid = pg_inherits.inhparent"
+                " WHERE child.relname = ANY(%s)",
+                [names],
+            )
+            parents = dict(cursor.fetchall())
+        return sorted({parents.get(name, name) for name in names})
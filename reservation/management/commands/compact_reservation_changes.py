@@ -0,0 +1,21 @@
+from datetime import timedelta
+from typing import Any
+from django.core.management import BaseCommand
+
+from reservation.journal import compact_changes
+
+
+class Command(BaseCommand):
+    help = "Drop superseded reservation change journal entries, and optionally old deletions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tombstone-days",
+            type=int,
+            help="Also drop deletions older than this many days. Clients that have not synced since must reload.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        tombstone_days = options["tombstone_days"]
+        deleted = compact_changes(timedelta(days=tombstone_days) if tombstone_days is not None else None)
+        self.stdout.write(f"{deleted} reservation change journal entries compacted.")
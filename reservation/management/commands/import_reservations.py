@@ -0,0 +1,32 @@
+from pathlib import Path
+from typing import Any
+from django.core.management import BaseCommand, CommandError
+
+from reservation.importer import IMPORT_FIELDS, import_reservations, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Import reservations from a CSV file with a header row or a JSON Lines file, "
+        f"with the fields {', '.join(IMPORT_FIELDS)}. Rows that fail validation are reported and left out."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import.")
+        parser.add_argument(
+            "--format", choices=["csv", "jsonl"], help="File format. Guessed from the file extension by default."
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Validate the file without storing anything.")
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        path = Path(options["path"])
+        file_format = options["format"] or ("csv" if path.suffix.lower() == ".csv" else "jsonl")
+        try:
+            with path.open(newline="", encoding="utf-8") as file:
+                imported, rejected = import_reservations(read_rows(file, file_format), dry_run=options["dry_run"])
+        except OSError as error:
+            raise CommandError(f"Cannot read {path}: {error}")
+        for line, reason in rejected.items():
+            self.stderr.write(f"Line {line} rejected: {reason}")
+        verb = "would be imported" if options["dry_run"] else "imported"
+        self.stdout.write(f"{imported} reservations {verb}, {len(rejected)} rows rejected.")
@@ -0,0 +1,24 @@
+from typing import Any
+from django.core.management import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from reservation.models import RecurringReservation
+from reservation.recurrence import get_horizon_end, materialize_series
+
+
+class Command(BaseCommand):
+    help = "Create the reservations of recurring series up to the materialization horizon."
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        horizon_end = get_horizon_end()
+        series_list = RecurringReservation.objects.filter(
+            Q(materialized_until__isnull=True) | Q(materialized_until__lt=horizon_end)
+        ).exclude(until__lt=timezone.localdate())
+        created_count = 0
+        for series in series_list:
+            created, skipped = materialize_series(series, horizon_end)
+            created_count += created
+            for day in skipped:
+                self.stdout.write(f"Skipped {day} of series {series.pk}: the room is already reserved.")
+        self.stdout.write(f"{created_count} reservations materialized until {horizon_end}.")
@@ -0,0 +1,35 @@
+from typing import Any
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from reservation.partitions import ARCHIVE_SCHEMA, add_months, archive_partitions, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = "Create the monthly reservation partitions ahead of time and archive the old ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=getattr(settings, "RESERVATION_PARTITION_MONTHS_AHEAD", 3),
+            help="Number of future months to create partitions for.",
+        )
+        parser.add_argument(
+            "--archive-after",
+            type=int,
+            help="Archive the partitions of reservations that ended more than this many months ago.",
+        )
+        parser.add_argument(
+            "--drop", action="store_true", help=f"Drop old partitions instead of moving them to {ARCHIVE_SCHEMA}."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        for month in ensure_partitions(options["ahead"]):
+            self.stdout.write(f"Created the reservation partition of {month:%Y-%m}.")
+        if options["archive_after"] is not None:
+            before = add_months(timezone.localdate().replace(day=1), -options["archive_after"])
+            archived = archive_partitions(before, drop=options["drop"])
+            verb = "dropped" if options["drop"] else f"moved to {ARCHIVE_SCHEMA}"
+            self.stdout.write(f"{len(archived)} reservation partitions before {before:%Y-%m} {verb}.")
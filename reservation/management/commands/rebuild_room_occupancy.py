@@ -0,0 +1,38 @@
+from typing import Any
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+
+from reservation.availability import occupancy_bitmaps
+from reservation.models import Reservation, RoomOccupancy
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-room, per-day occupancy bitmaps from reservations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--room", type=int, action="append", dest="rooms", help="Only rebuild the given room id.")
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        reservations = Reservation.objects.filter(start_date__lt=F("end_date"))
+        occupancies = RoomOccupancy.objects.all()
+        if options["rooms"]:
+            reservations = reservations.filter(room_id__in=options["rooms"])
+            occupancies = occupancies.filter(room_id__in=options["rooms"])
+
+        with transaction.atomic():
+            # Bookings committed between the read and the write would be overwritten with stale bitmaps.
+            with connection.cursor() as cursor:
+                cursor.execute(f"LOCK TABLE {Reservation._meta.db_table} IN SHARE MODE")
+            rows = reservations.order_by().values_list("room_id", "start_date", "end_date")
+            bitmaps = occupancy_bitmaps(rows.iterator(chunk_size=2000))
+            occupancies.delete()
+            RoomOccupancy.objects.bulk_create(
+                (
+                    RoomOccupancy(room_id=room_id, date=day, slots=slots)
+                    for (room_id, day), slots in bitmaps.items()
+                    if slots
+                ),
+                batch_size=1000,
+            )
+        self.stdout.write(f"{sum(1 for slots in bitmaps.values() if slots)} room occupancy rows rebuilt.")
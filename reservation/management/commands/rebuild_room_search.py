@@ -0,0 +1,15 @@
+from typing import Any
+from django.core.management import BaseCommand
+
+from reservation.search import update_room_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full text search vectors of rooms from their names, descriptions and comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--room", type=int, action="append", dest="rooms", help="Only rebuild the given room id.")
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        updated = update_room_search_vectors(options["rooms"])
+        self.stdout.write(f"{updated} room search vectors rebuilt.")
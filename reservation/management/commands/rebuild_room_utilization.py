@@ -0,0 +1,37 @@
+from typing import Any
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+
+from reservation.models import Reservation, RoomUtilization
+from reservation.utilization import rollup_minutes
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-room, per-hour utilization rollup from reservations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--room", type=int, action="append", dest="rooms", help="Only rebuild the given room id.")
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        reservations = Reservation.objects.filter(start_date__lt=F("end_date"))
+        rollups = RoomUtilization.objects.all()
+        if options["rooms"]:
+            reservations = reservations.filter(room_id__in=options["rooms"])
+            rollups = rollups.filter(room_id__in=options["rooms"])
+
+        with transaction.atomic():
+            # Bookings committed between the read and the write would be overwritten with stale minutes.
+            with connection.cursor() as cursor:
+                cursor.execute(f"LOCK TABLE {Reservation._meta.db_table} IN SHARE MODE")
+            rows = reservations.order_by().values_list("room_id", "start_date", "end_date")
+            minutes = rollup_minutes(rows.iterator(chunk_size=2000))
+            rollups.delete()
+            RoomUtilization.objects.bulk_create(
+                (
+                    RoomUtilization(room_id=room_id, date=day, hour=hour, minutes=booked)
+                    for (room_id, day, hour), booked in minutes.items()
+                ),
+                batch_size=1000,
+            )
+        self.stdout.write(f"{len(minutes)} room utilization rows rebuilt.")
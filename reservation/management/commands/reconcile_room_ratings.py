@@ -0,0 +1,27 @@
+from typing import Any
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from reservation.models import Rating, Room
+
+
+class Command(BaseCommand):
+    help = "Recount the rating aggregates of rooms whose stored values drifted from their ratings."
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        ratings = Rating.objects.filter(room=OuterRef("pk")).order_by().values("room")
+        count = Coalesce(Subquery(ratings.annotate(count=Count("id")).values("count")), Value(0))
+        total = Coalesce(Subquery(ratings.annotate(total=Sum("value")).values("total")), Value(0))
+        with transaction.atomic():
+            # Ratings written meanwhile would be missed by the recount but not by the F() updates.
+            with connection.cursor() as cursor:
+                cursor.execute(f"LOCK TABLE {Rating._meta.db_table} IN SHARE MODE")
+            drifted = list(
+                Room.objects.annotate(actual_count=count, actual_total=total)
+                .exclude(rating_count=F("actual_count"), rating_sum=F("actual_total"))
+                .values_list("id", flat=True)
+            )
+            Room.objects.filter(pk__in=drifted).update(rating_count=count, rating_sum=total)
+        self.stdout.write(f"{len(drifted)} room rating aggregates repaired.")
@@ -0,0 +1,62 @@
+import time
+import traceback
+from typing import Any
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from reservation.scheduler import ReminderScheduler
+
+RETRY_DELAY = 1
+MAX_RETRY_DELAY = 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Stay running and send reservation reminders as they become due. Of several schedulers only the one holding"
+        " the scheduler lock sends them, another one takes over when it stops."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=5.0, help="Seconds between checks for changed reservations."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        scheduler = ReminderScheduler()
+        retry_delay = RETRY_DELAY
+        try:
+            while True:
+                try:
+                    wait = self.run_once(scheduler, options["interval"])
+                    retry_delay = RETRY_DELAY
+                except Exception:
+                    # The lock went with the session, the next round reconnects and competes for it again.
+                    self.stderr.write(
+                        f"{timezone.now():%Y-%m-%d %H:%M:%S} Scheduler failed, retrying in {retry_delay:g} seconds.\n"
+                        + traceback.format_exc()
+                    )
+                    scheduler.step_down()
+                    wait, retry_delay = retry_delay, min(retry_delay * 2, MAX_RETRY_DELAY)
+                time.sleep(wait)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            scheduler.resign()
+
+    def run_once(self, scheduler: ReminderScheduler, interval: float) -> float:
+        """Lead if possible and send what is due, returns the seconds to wait for the next round."""
+        wait = interval
+        if not scheduler.is_leader and scheduler.try_lead():
+            self.stdout.write(f"Leading, {len(scheduler.heap)} reminders scheduled.")
+        if scheduler.is_leader:
+            scheduler.refresh()
+            now = timezone.now()
+            sent = scheduler.run_due(now)
+            if sent is not None:
+                self.stdout.write(
+                    f"{now:%Y-%m-%d %H:%M:%S} {sent[0]} reminder email sent, {sent[1]} cancellation email sent."
+                )
+            due_at = scheduler.heap.next_due()
+            if due_at is not None:
+                wait = min(wait, max(0.0, (due_at - timezone.now()).total_seconds()))
+        return wait
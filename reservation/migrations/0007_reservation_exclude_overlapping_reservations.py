@@ -0,0 +1,57 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:50
+
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+import django.contrib.postgres.fields.ranges
+from django.db import migrations, models
+import reservation.models
+
+OVERLAPPING_SQL = """
+SELECT earlier.room_id, earlier.id, earlier.start_date, earlier.end_date, later.id, later.start_date, later.end_date
+FROM reservation_reservation AS earlier
+JOIN reservation_reservation AS later ON later.room_id = earlier.room_id AND later.id > earlier.id
+    AND later.start_date < earlier.end_date AND later.end_date > earlier.start_date
+WHERE earlier.start_date < earlier.end_date AND later.start_date < later.end_date
+ORDER BY earlier.room_id, earlier.start_date
+"""
+
+
+def check_overlapping_reservations(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(OVERLAPPING_SQL)
+        overlapping = cursor.fetchall()
+    if overlapping:
+        rows = "\n".join(
+            f"  room {room}: reservation {first} ({first_start} - {first_end})"
+            f" overlaps reservation {second} ({second_start} - {second_end})"
+            for room, first, first_start, first_end, second, second_start, second_end in overlapping
+        )
+        raise RuntimeError(f"Overlapping reservations must be moved or removed before migrating:\n{rows}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0006_alter_reservation_options"),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.RunPython(check_overlapping_reservations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="reservation",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(("start_date__lt", models.F("end_date"))),
+                expressions=[
+                    (
+                        reservation.models.TsTzRange(
+                            "start_date", "end_date", django.contrib.postgres.fields.ranges.RangeBoundary()
+                        ),
+                        "&&",
+                    ),
+                    ("room", "="),
+                ],
+                name="exclude_overlapping_reservations",
+                violation_error_message="Overlapping Reservation!",
+            ),
+        ),
+    ]
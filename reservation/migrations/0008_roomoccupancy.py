@@ -0,0 +1,30 @@
+# Generated by Django 4.2.11 on 2026-10-18 12:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+import utils.db.fields
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0007_reservation_exclude_overlapping_reservations"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoomOccupancy",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("slots", utils.db.fields.BitStringField(default=0, length=180)),
+                ("room", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="reservation.room")),
+            ],
+            options={
+                "verbose_name_plural": "room occupancies",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="roomoccupancy",
+            constraint=models.UniqueConstraint(fields=("room", "date"), name="unique_room_occupancy"),
+        ),
+    ]
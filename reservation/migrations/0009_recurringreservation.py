@@ -0,0 +1,99 @@
+# Generated by Django 4.2.11 on 2026-10-18 12:14
+
+from django.conf import settings
+import django.contrib.postgres.fields
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("users", "0011_alter_customuser_first_name_and_more"),
+        ("reservation", "0008_roomoccupancy"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecurringReservation",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "frequency",
+                    models.CharField(
+                        choices=[("daily", "Daily"), ("weekly", "Weekly")], default="weekly", max_length=10
+                    ),
+                ),
+                (
+                    "interval",
+                    models.PositiveSmallIntegerField(
+                        default=1, validators=[django.core.validators.MinValueValidator(1)]
+                    ),
+                ),
+                (
+                    "weekdays",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.PositiveSmallIntegerField(
+                            choices=[
+                                (0, "Monday"),
+                                (1, "Tuesday"),
+                                (2, "Wednesday"),
+                                (3, "Thursday"),
+                                (4, "Friday"),
+                                (5, "Saturday"),
+                                (6, "Sunday"),
+                            ]
+                        ),
+                        blank=True,
+                        default=list,
+                        size=None,
+                    ),
+                ),
+                ("start_time", models.TimeField()),
+                ("end_time", models.TimeField()),
+                ("first_date", models.DateField()),
+                ("until", models.DateField(blank=True, null=True)),
+                (
+                    "exdates",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.DateField(), blank=True, default=list, size=None
+                    ),
+                ),
+                ("materialized_until", models.DateField(blank=True, null=True)),
+                ("note", models.TextField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="recurringreservation",
+            name="reserver_user",
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL
+            ),
+        ),
+        migrations.AddField(
+            model_name="recurringreservation",
+            name="room",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="reservation.room"),
+        ),
+        migrations.AddField(
+            model_name="recurringreservation",
+            name="team",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="users.team"),
+        ),
+        migrations.AddField(
+            model_name="reservation",
+            name="series",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reservations",
+                to="reservation.recurringreservation",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="reservation",
+            constraint=models.UniqueConstraint(fields=("series", "start_date"), name="unique_series_occurrence"),
+        ),
+    ]
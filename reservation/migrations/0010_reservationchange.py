@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0009_recurringreservation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReservationChangeCompaction",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("compacted_through", models.BigIntegerField()),
+                ("compacted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ReservationChange",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("reservation_id", models.BigIntegerField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[("created", "Created"), ("updated", "Updated"), ("deleted", "Deleted")], max_length=10
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["reservation_id", "id"], name="reservation_change_latest")],
+            },
+        ),
+    ]
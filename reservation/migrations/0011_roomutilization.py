@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-18 12:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0010_reservationchange"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoomUtilization",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("hour", models.PositiveSmallIntegerField()),
+                ("minutes", models.SmallIntegerField(default=0)),
+                ("room", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="reservation.room")),
+            ],
+            options={
+                "verbose_name_plural": "room utilization",
+                "indexes": [models.Index(fields=["date", "room"], name="room_utilization_date")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="roomutilization",
+            constraint=models.UniqueConstraint(fields=("room", "date", "hour"), name="unique_room_utilization"),
+        ),
+    ]
@@ -0,0 +1,81 @@
+from django.db import migrations
+
+COLUMNS = "id, note, team_id, reserver_user_id, room_id, end_date, start_date, series_id"
+
+COLUMN_DEFINITIONS = """
+    note text NULL,
+    team_id bigint NOT NULL,
+    reserver_user_id bigint NULL,
+    room_id bigint NOT NULL,
+    end_date timestamp with time zone NOT NULL,
+    start_date timestamp with time zone NOT NULL,
+    series_id bigint NULL
+"""
+
+FOREIGN_KEYS_AND_INDEXES = """
+ALTER TABLE reservation_reservation
+    ADD CONSTRAINT reservation_reservat_reserver_user_id_7f047588_fk_users_cus
+        FOREIGN KEY (reserver_user_id) REFERENCES users_customuser (id) DEFERRABLE INITIALLY DEFERRED,
+    ADD CONSTRAINT reservation_reservat_series_id_cf327965_fk_reservati
+        FOREIGN KEY (series_id) REFERENCES reservation_recurringreservation (id) DEFERRABLE INITIALLY DEFERRED,
+    ADD CONSTRAINT reservation_reservation_room_id_788b373e_fk_reservation_room_id
+        FOREIGN KEY (room_id) REFERENCES reservation_room (id) DEFERRABLE INITIALLY DEFERRED,
+    ADD CONSTRAINT reservation_reservation_team_id_ef712e1b_fk_users_team_id
+        FOREIGN KEY (team_id) REFERENCES users_team (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX reservation_reservation_room_id_788b373e ON reservation_reservation (room_id);
+CREATE INDEX reservation_reservation_series_id_cf327965 ON reservation_reservation (series_id);
+CREATE INDEX reservation_reservation_team_id_ef712e1b ON reservation_reservation (team_id);
+CREATE INDEX reservation_reservation_user_id_261c5876 ON reservation_reservation (reserver_user_id);
+"""
+
+# Exclusion and unique constraints on a partitioned table must compare the partition key for
+# equality, so the overlap and series occurrence constraints live on every partition instead.
+PARTITION_SQL = f"""
+ALTER TABLE reservation_reservation RENAME TO reservation_reservation_unpartitioned;
+ALTER TABLE reservation_reservation_unpartitioned ALTER COLUMN id DROP IDENTITY;
+CREATE SEQUENCE reservation_reservation_id_seq;
+CREATE TABLE reservation_reservation (
+    id bigint NOT NULL DEFAULT nextval('reservation_reservation_id_seq'),
+    {COLUMN_DEFINITIONS}
+) PARTITION BY RANGE (end_date);
+ALTER SEQUENCE reservation_reservation_id_seq OWNED BY reservation_reservation.id;
+CREATE TABLE reservation_reservation_default PARTITION OF reservation_reservation DEFAULT;
+INSERT INTO reservation_reservation ({COLUMNS}) SELECT {COLUMNS} FROM reservation_reservation_unpartitioned;
+SELECT setval('reservation_reservation_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM reservation_reservation;
+DROP TABLE reservation_reservation_unpartitioned;
+ALTER TABLE reservation_reservation ADD CONSTRAINT reservation_reservation_pkey PRIMARY KEY (id, end_date);
+{FOREIGN_KEYS_AND_INDEXES}
+ALTER TABLE reservation_reservation_default
+    ADD CONSTRAINT exclude_overlapping_reservations_default
+        EXCLUDE USING gist (TSTZRANGE(start_date, end_date, '[)') WITH &&, room_id WITH =) WHERE (start_date < end_date),
+    ADD CONSTRAINT unique_series_occurrence_default UNIQUE (series_id, start_date);
+"""
+
+UNPARTITION_SQL = f"""
+CREATE TABLE reservation_reservation_unpartitioned (
+    id bigint NOT NULL,
+    {COLUMN_DEFINITIONS}
+);
+INSERT INTO reservation_reservation_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM reservation_reservation;
+DROP TABLE reservation_reservation CASCADE;
+ALTER TABLE reservation_reservation_unpartitioned RENAME TO reservation_reservation;
+ALTER TABLE reservation_reservation ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY;
+SELECT setval(pg_get_serial_sequence('reservation_reservation', 'id'), COALESCE(MAX(id), 0) + 1, false)
+    FROM reservation_reservation;
+ALTER TABLE reservation_reservation ADD CONSTRAINT reservation_reservation_pkey PRIMARY KEY (id);
+{FOREIGN_KEYS_AND_INDEXES}
+ALTER TABLE reservation_reservation
+    ADD CONSTRAINT exclude_overlapping_reservations
+        EXCLUDE USING gist (TSTZRANGE(start_date, end_date, '[)') WITH &&, room_id WITH =) WHERE (start_date < end_date),
+    ADD CONSTRAINT unique_series_occurrence UNIQUE (series_id, start_date);
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0011_roomutilization"),
+    ]
+
+    operations = [
+        migrations.RunSQL(PARTITION_SQL, UNPARTITION_SQL),
+    ]
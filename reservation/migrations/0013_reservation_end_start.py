@@ -0,0 +1,16 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0012_partition_reservation"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(fields=["end_date", "start_date"], name="reservation_end_start"),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:31
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Same weights and configuration as reservation.search.room_search_vector().
+BACKFILL_SQL = """
+UPDATE reservation_room SET search_vector =
+    setweight(to_tsvector('english', name), 'A')
+    || setweight(to_tsvector('english', description), 'B')
+    || strip(to_tsvector('english', COALESCE(
+        (SELECT string_agg(content, ' ') FROM reservation_comment WHERE room_id = reservation_room.id), ''
+    )))
+"""
+
+# Ranking reads the vector of every matching room, uncompressed values save decompressing each of them.
+STORAGE_SQL = "ALTER TABLE reservation_room ALTER COLUMN search_vector SET STORAGE EXTERNAL"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0013_reservation_end_start"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="room",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="room",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="room_search_vector"),
+        ),
+        migrations.RunSQL(STORAGE_SQL, migrations.RunSQL.noop),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
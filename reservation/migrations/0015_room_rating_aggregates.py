@@ -0,0 +1,30 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:39
+
+from django.db import migrations, models
+
+
+BACKFILL_SQL = """
+UPDATE reservation_room SET rating_count = ratings.count, rating_sum = ratings.sum
+FROM (SELECT room_id, COUNT(*) AS count, SUM(value) AS sum FROM reservation_rating GROUP BY room_id) AS ratings
+WHERE ratings.room_id = reservation_room.id
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0014_room_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="room",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="room",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0015_room_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["room", "-created_at", "-id"], name="comment_room_latest"),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:55
+
+from django.db import migrations, models
+
+# Meetings that already started need no reminder, marking them keeps history out of the partial index.
+BACKFILL_SQL = "UPDATE reservation_reservation SET reminded_at = start_date WHERE start_date <= now()"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0016_comment_room_latest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reservation",
+            name="reminded_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                condition=models.Q(("reminded_at__isnull", True)),
+                fields=["start_date"],
+                name="reservation_reminder_due",
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.11 on 2026-10-18 14:34
+
+from django.db import migrations, models
+
+# Entries get their sequence number when the writing transaction commits. A deferred trigger takes the journal
+# lock (reservation.journal.JOURNAL_LOCK_ID), which is then held only until that commit, and numbers the
+# transaction's entries in insertion order.
+SEQUENCE_SQL = """
+CREATE SEQUENCE reservation_change_sequence_seq;
+UPDATE reservation_reservationchange SET sequence = id;
+SELECT setval('reservation_change_sequence_seq', COALESCE(MAX(id), 0) + 1, false) FROM reservation_reservationchange;
+
+CREATE FUNCTION reservation_change_assign_sequence() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(7300001);
+    -- Only entries of the current transaction are visible without a sequence number.
+    UPDATE reservation_reservationchange AS change SET sequence = pending.sequence
+    FROM (
+        SELECT id, nextval('reservation_change_sequence_seq') AS sequence
+        FROM (SELECT id FROM reservation_reservationchange WHERE sequence IS NULL ORDER BY id) AS ordered
+    ) AS pending
+    WHERE change.id = pending.id;
+    RETURN NULL;
+END;
+$$;
+
+CREATE CONSTRAINT TRIGGER reservation_change_sequence
+AFTER INSERT ON reservation_reservationchange
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION reservation_change_assign_sequence();
+"""
+
+UNSEQUENCE_SQL = """
+DROP TRIGGER reservation_change_sequence ON reservation_reservationchange;
+DROP FUNCTION reservation_change_assign_sequence();
+DROP SEQUENCE reservation_change_sequence_seq;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0017_reservation_reminded_at"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="reservationchange",
+            name="reservation_change_latest",
+        ),
+        migrations.AddField(
+            model_name="reservationchange",
+            name="sequence",
+            field=models.BigIntegerField(editable=False, null=True, unique=True),
+        ),
+        migrations.RunSQL(SEQUENCE_SQL, UNSEQUENCE_SQL),
+        migrations.AddIndex(
+            model_name="reservationchange",
+            index=models.Index(fields=["reservation_id", "sequence"], name="reservation_change_latest"),
+        ),
+        migrations.AddIndex(
+            model_name="reservationchange",
+            index=models.Index(
+                condition=models.Q(("sequence__isnull", True)), fields=["id"], name="reservation_change_pending"
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations, models
+import django.db.models.functions.datetime
+import django.db.models.lookups
+
+
+def check_reservations_within_month(apps, schema_editor):
+    Reservation = apps.get_model("reservation", "Reservation")
+    crossing = (
+        Reservation.objects.exclude(
+            start_date__month=models.F("end_date__month"), start_date__year=models.F("end_date__year")
+        )
+        .order_by("start_date")
+        .values_list("id", "room_id", "start_date", "end_date")
+    )
+    if crossing:
+        rows = "\n".join(f"  reservation {id} in room {room}: {start} - {end}" for id, room, start, end in crossing)
+        raise RuntimeError(f"Reservations spanning two months must be split or removed before migrating:\n{rows}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0018_reservationchange_sequence"),
+    ]
+
+    operations = [
+        # 0012 replaced these with per-partition constraints, drop them from the migration state only.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name="reservation",
+                    name="exclude_overlapping_reservations",
+                ),
+                migrations.RemoveConstraint(
+                    model_name="reservation",
+                    name="unique_series_occurrence",
+                ),
+            ],
+        ),
+        migrations.RunPython(check_reservations_within_month, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="reservation",
+            constraint=models.CheckConstraint(
+                check=django.db.models.lookups.Exact(
+                    django.db.models.functions.datetime.TruncMonth("start_date"),
+                    django.db.models.functions.datetime.TruncMonth("end_date"),
+                ),
+                name="reservation_within_month",
+                violation_error_message="Start and end dates must be in the same month.",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-18 15:06
+
+import time
+
+from django.db import migrations, models
+
+
+def stamp_all_feeds(apps, schema_editor):
+    # Stamps used to live in the cache, feeds may have changed at any time before now.
+    FeedVersion = apps.get_model("reservation", "FeedVersion")
+    FeedVersion.objects.create(scope="all", stamp=int(time.time()))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservation", "0019_reservation_within_month"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedVersion",
+            fields=[
+                ("scope", models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ("stamp", models.BigIntegerField()),
+            ],
+        ),
+        migrations.RunPython(stamp_all_feeds, migrations.RunPython.noop),
+    ]
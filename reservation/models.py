@@ -1,6 +1,43 @@
+from datetime import date, datetime, time, timedelta
+
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import ArrayField, DateTimeRangeField, RangeBoundary, RangeOperators
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.functions import TruncMonth
+from django.db.models.lookups import Exact
+from django.utils import timezone
+from utils.db.fields import BitStringField
+
+OVERLAPPING_RESERVATIONS_CONSTRAINT = "exclude_overlapping_reservations"
+OPENING_TIME = time(7)
+CLOSING_TIME = time(22)
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = (CLOSING_TIME.hour - OPENING_TIME.hour) * 60 // SLOT_MINUTES
+
+
+class TsTzRange(models.Func):
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
+
+# Created on every partition of reservation_reservation (see partitions.py), validated by Reservation itself.
+PARTITION_CONSTRAINTS = [
+    ExclusionConstraint(
+        name=OVERLAPPING_RESERVATIONS_CONSTRAINT,
+        expressions=[
+            (TsTzRange("start_date", "end_date", RangeBoundary()), RangeOperators.OVERLAPS),
+            ("room", RangeOperators.EQUAL),
+        ],
+        condition=models.Q(start_date__lt=models.F("end_date")),
+        violation_error_message="Overlapping Reservation!",
+    ),
+    models.UniqueConstraint(fields=["series", "start_date"], name="unique_series_occurrence"),
+]
 
 
 class Reservation(models.Model):
@@ -10,12 +47,57 @@ class Reservation(models.Model):
     start_date = models.DateTimeField()
     end_date = models.DateTimeField()
     note = models.TextField(blank=True, null=True)
+    series = models.ForeignKey(
+        "RecurringReservation", on_delete=models.CASCADE, null=True, blank=True, related_name="reservations"
+    )
+    # Set by send_reminders once the team got its email, cleared when the start date changes.
+    reminded_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         permissions = [
             ("add_reservation_self_team", "Can add reservation to their team"),
             ("delete_reservation_self_team", "Can delete reservation of their team"),
         ]
+        # The table is partitioned by month on end_date, PARTITION_CONSTRAINTS only see every reservation a row
+        # could overlap as long as reservations stay within one month.
+        constraints = [
+            models.CheckConstraint(
+                check=Exact(TruncMonth("start_date"), TruncMonth("end_date")),
+                name="reservation_within_month",
+                violation_error_message="Start and end dates must be in the same month.",
+            ),
+        ]
+        # Chosen with the benchmark_reservation_queries command, see the README.
+        indexes = [
+            models.Index(fields=["end_date", "start_date"], name="reservation_end_start"),
+            models.Index(
+                fields=["start_date"], name="reservation_reminder_due", condition=models.Q(reminded_at__isnull=True)
+            ),
+        ]
+
+    def validate_constraints(self, exclude=None):
+        errors = {}
+        try:
+            super().validate_constraints(exclude=exclude)
+        except ValidationError as error:
+            errors = error.update_error_dict(errors)
+        for constraint in PARTITION_CONSTRAINTS:
+            try:
+                constraint.validate(Reservation, self, exclude=exclude)
+            except ValidationError as error:
+                errors = error.update_error_dict(errors)
+        if errors:
+            raise ValidationError(errors)
+
+    def save(self, *args, **kwargs):
+        # reminded_at only changes through queryset updates, don't write back a value read before the reminder.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "reminded_at"
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Reservation for {self.team.name} on {self.start_date.strftime('%Y-%m-%d')} from {self.start_date.strftime('%H:%M:%S')} to {self.end_date.strftime('%H:%M:%S')} by {self.reserver_user}"
@@ -27,6 +109,9 @@ class Comment(models.Model):
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
     room = models.ForeignKey("Room", on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [models.Index(fields=["room", "-created_at", "-id"], name="comment_room_latest")]
+
     def __str__(self):
         return f"Comment by {self.user} on {self.created_at} in Room {self.room}"
 
@@ -48,12 +133,156 @@ class Room(models.Model):
     capacity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
     description = models.TextField()
     is_active = models.BooleanField(default=True)
+    # Name, description and comments, kept current by signals (see search.py).
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Kept current by the rating signals, reconcile_room_ratings repairs drift.
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [GinIndex(fields=["search_vector"], name="room_search_vector")]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # The rating aggregates only change through F() updates, don't write back values read earlier.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ("rating_count", "rating_sum")
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def avg_rating(self) -> float:
+        if not self.rating_count:
+            return 0
+        return self.rating_sum / self.rating_count
+
     def get_avg_rating(self) -> float:
-        avg_rate = Rating.objects.filter(room=self).aggregate(avg_rate=models.Avg("value")).get("avg_rate")
-        if not avg_rate:
-            avg_rate = 0
-        return avg_rate
+        return self.avg_rating
+
+
+class RoomOccupancy(models.Model):
+    room = models.ForeignKey("Room", on_delete=models.CASCADE)
+    date = models.DateField()
+    slots = BitStringField(length=SLOTS_PER_DAY, default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["room", "date"], name="unique_room_occupancy")]
+        verbose_name_plural = "room occupancies"
+
+    def __str__(self):
+        return f"Occupancy of Room {self.room} on {self.date}"
+
+
+class RoomUtilization(models.Model):
+    room = models.ForeignKey("Room", on_delete=models.CASCADE)
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    minutes = models.SmallIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["room", "date", "hour"], name="unique_room_utilization")]
+        indexes = [models.Index(fields=["date", "room"], name="room_utilization_date")]
+        verbose_name_plural = "room utilization"
+
+    def __str__(self):
+        return f"Utilization of Room {self.room} on {self.date} at {self.hour}:00"
+
+
+class FeedVersion(models.Model):
+    # Written by reservation.calendar_feed.
+    scope = models.CharField(max_length=50, primary_key=True)
+    stamp = models.BigIntegerField()
+
+    def __str__(self):
+        return f"Feed version {self.stamp} of {self.scope}"
+
+
+class RecurringReservation(models.Model):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    FREQUENCY_CHOICES = [(DAILY, "Daily"), (WEEKLY, "Weekly")]
+    WEEKDAY_CHOICES = [
+        (0, "Monday"),
+        (1, "Tuesday"),
+        (2, "Wednesday"),
+        (3, "Thursday"),
+        (4, "Friday"),
+        (5, "Saturday"),
+        (6, "Sunday"),
+    ]
+
+    room = models.ForeignKey("Room", on_delete=models.CASCADE)
+    reserver_user = models.ForeignKey(get_user_model(), on_delete=models.SET_NULL, null=True)
+    team = models.ForeignKey("users.Team", on_delete=models.CASCADE)
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default=WEEKLY)
+    interval = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1)])
+    weekdays = ArrayField(models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES), blank=True, default=list)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    first_date = models.DateField()
+    until = models.DateField(blank=True, null=True)
+    exdates = ArrayField(models.DateField(), blank=True, default=list)
+    materialized_until = models.DateField(blank=True, null=True)
+    note = models.TextField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.get_frequency_display()} reservation for {self.team.name} in {self.room} from {self.start_time.strftime('%H:%M')} to {self.end_time.strftime('%H:%M')}"
+
+    def occurs_on(self, day: date) -> bool:
+        if day < self.first_date or (self.until and day > self.until) or day in self.exdates:
+            return False
+        if self.frequency == self.DAILY:
+            return (day - self.first_date).days % self.interval == 0
+        first_week = self.first_date - timedelta(days=self.first_date.weekday())
+        weekdays = self.weekdays or [self.first_date.weekday()]
+        return day.weekday() in weekdays and (day - first_week).days // 7 % self.interval == 0
+
+    def occurrences(self, first_day: date, last_day: date) -> list[tuple[date, datetime, datetime]]:
+        first_day = max(first_day, self.first_date)
+        if self.until:
+            last_day = min(last_day, self.until)
+        return [
+            (
+                day,
+                timezone.make_aware(datetime.combine(day, self.start_time)),
+                timezone.make_aware(datetime.combine(day, self.end_time)),
+            )
+            for day in (first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1))
+            if self.occurs_on(day)
+        ]
+
+
+class ReservationChange(models.Model):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    ACTION_CHOICES = [(CREATED, "Created"), (UPDATED, "Updated"), (DELETED, "Deleted")]
+
+    id = models.BigAutoField(primary_key=True)
+    # Assigned when the writing transaction commits, see record_changes.
+    sequence = models.BigIntegerField(null=True, unique=True, editable=False)
+    reservation_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["reservation_id", "sequence"], name="reservation_change_latest"),
+            models.Index(fields=["id"], condition=models.Q(sequence__isnull=True), name="reservation_change_pending"),
+        ]
+
+    def __str__(self):
+        return f"Change {self.sequence}: reservation {self.reservation_id} {self.action}"
+
+
+class ReservationChangeCompaction(models.Model):
+    compacted_through = models.BigIntegerField()
+    compacted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Reservation changes compacted through {self.compacted_through}"
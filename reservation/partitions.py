@@ -0,0 +1,148 @@
+import re
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .calendar_feed import bump_feed_versions
+from .models import OVERLAPPING_RESERVATIONS_CONSTRAINT, Reservation
+
+ARCHIVE_SCHEMA = "reservation_archive"
+PARTITION_NAME = re.compile(r"_(\d{4})_(\d{2})$")
+
+
+def get_parent_table() -> str:
+    return Reservation._meta.db_table
+
+
+def get_default_partition() -> str:
+    return f"{get_parent_table()}_default"
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{get_parent_table()}_{month:%Y_%m}"
+
+
+def partition_bounds(month: date) -> tuple[datetime, datetime]:
+    """Local midnights starting `month` and the month after it."""
+    return (
+        timezone.make_aware(datetime(month.year, month.month, 1)),
+        timezone.make_aware(datetime.combine(add_months(month, 1), datetime.min.time())),
+    )
+
+
+def add_partition_constraints(cursor, table: str, suffix: str):
+    """Overlap and series occurrence constraints of one partition.
+
+    Partitions only see their own rows, which is enough since the
+    reservation_within_month check keeps reservations within the local month
+    of their partition.
+    """
+    cursor.execute(
+        f"ALTER TABLE {table}"
+        f" ADD CONSTRAINT {OVERLAPPING_RESERVATIONS_CONSTRAINT}_{suffix} EXCLUDE USING gist"
+        " (TSTZRANGE(start_date, end_date, '[)') WITH &&, room_id WITH =) WHERE (start_date < end_date),"
+        f" ADD CONSTRAINT unique_series_occurrence_{suffix} UNIQUE (series_id, start_date)"
+    )
+
+
+def get_partition_months() -> list[date]:
+    """Months that have their own partition, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+            " WHERE pg_inherits.inhparent = %s::regclass",
+            [get_parent_table()],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+    matches = (PARTITION_NAME.search(name) for name in names)
+    return sorted(date(int(match[1]), int(match[2]), 1) for match in matches if match)
+
+
+def get_default_partition_months() -> list[date]:
+    """Months of the reservations that fell into the default partition."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', end_date AT TIME ZONE %s)::date FROM {get_default_partition()}",
+            [settings.TIME_ZONE],
+        )
+        return sorted(month for (month,) in cursor.fetchall())
+
+
+def create_partition(month: date) -> int:
+    """Create the partition of `month`, moving its reservations out of the default partition.
+
+    Returns the number of moved reservations.
+    """
+    name, (lower, upper) = partition_name(month), partition_bounds(month)
+    parent, default = get_parent_table(), get_default_partition()
+    bounds = f"FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Attaching locks the default partition anyway, taking it first keeps rows from landing there meanwhile.
+        cursor.execute(f"LOCK TABLE {default} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        add_partition_constraints(cursor, name, f"{month:%Y_%m}")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {default} WHERE end_date >= %s AND end_date < %s RETURNING *)"
+            f" INSERT INTO {name} SELECT * FROM moved",
+            [lower, upper],
+        )
+        moved = cursor.rowcount
+        # A matching check constraint lets the attach skip scanning the new partition.
+        cursor.execute(
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds"
+            f" CHECK (end_date >= '{lower.isoformat()}' AND end_date < '{upper.isoformat()}')"
+        )
+        cursor.execute(f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES {bounds}")
+        cursor.execute(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds")
+    return moved
+
+
+def ensure_partitions(months_ahead: int) -> list[date]:
+    """Create the partitions of the current month, the next `months_ahead` months and every month
+    found in the default partition. Returns the created months."""
+    current = timezone.localdate().replace(day=1)
+    wanted = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    wanted.update(get_default_partition_months())
+    existing = set(get_partition_months())
+    created = sorted(wanted - existing)
+    for month in created:
+        create_partition(month)
+    return created
+
+
+def archive_partitions(before: date, drop: bool = False) -> list[str]:
+    """Detach the partitions of months before `before`, then move them to the archive schema or drop them.
+
+    Archived tables keep their rows but lose their foreign keys, so rooms, teams
+    and users can still be deleted.
+    """
+    archived = []
+    parent = get_parent_table()
+    for month in get_partition_months():
+        if month >= before:
+            break
+        name = partition_name(month)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {parent} DETACH PARTITION {name}")
+            if drop:
+                cursor.execute(f"DROP TABLE {name}")
+            else:
+                cursor.execute(
+                    "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", [name]
+                )
+                for (constraint,) in cursor.fetchall():
+                    cursor.execute(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"')
+                cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+                cursor.execute(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}")
+        archived.append(name)
+    if archived:
+        # Cached calendar days of the archived months no longer match the table.
+        bump_feed_versions()
+    return archived
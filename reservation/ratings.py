@@ -0,0 +1,45 @@
+from django.db import connection, transaction
+
+from .db import run_with_retry
+from .models import Rating, Room
+
+UPSERT_RATING_SQL = f"""
+WITH previous AS (
+    SELECT value FROM {Rating._meta.db_table} WHERE user_id = %(user_id)s AND room_id = %(room_id)s
+), upserted AS (
+    INSERT INTO {Rating._meta.db_table} (user_id, room_id, value) VALUES (%(user_id)s, %(room_id)s, %(value)s)
+    ON CONFLICT (user_id, room_id) DO UPDATE SET value = EXCLUDED.value
+    RETURNING id, value
+)
+UPDATE {Room._meta.db_table} SET
+    rating_count = rating_count + (previous.value IS NULL)::integer,
+    rating_sum = rating_sum + upserted.value - COALESCE(previous.value, 0)
+FROM upserted LEFT JOIN previous ON true
+WHERE {Room._meta.db_table}.id = %(room_id)s
+RETURNING upserted.id, rating_count, rating_sum
+"""
+
+
+def rate_room(rating: Rating) -> Rating:
+    """Insert or replace the rating of `rating.user` for `rating.room` and update the room's aggregates.
+
+    Raises Room.DoesNotExist when the room is gone. The room of the returned
+    rating only holds the new aggregates, other fields load on access.
+    """
+
+    def upsert():
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Every rating of a room ends in an update of its row, holding that lock first orders them, so the
+            # previous value read by the upsert is the one it replaces.
+            cursor.execute(f"SELECT 1 FROM {Room._meta.db_table} WHERE id = %s FOR UPDATE", [rating.room_id])
+            if cursor.fetchone() is None:
+                raise Room.DoesNotExist(f"Room {rating.room_id} does not exist.")
+            cursor.execute(
+                UPSERT_RATING_SQL, {"user_id": rating.user_id, "room_id": rating.room_id, "value": rating.value}
+            )
+            return cursor.fetchone()
+
+    rating.pk, count, total = run_with_retry(upsert)
+    rating._state.adding = False
+    rating.room = Room.from_db(None, ["id", "rating_count", "rating_sum"], [rating.room_id, count, total])
+    return rating
@@ -0,0 +1,183 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.postgres.fields import RangeBoundary
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from mailer.queue import enqueue_mail
+
+from .availability import refresh_room_occupancy
+from .broker import publish_on_commit
+from .calendar_feed import bump_feed_versions, room_scope, team_scope
+from .journal import record_changes
+from .models import RecurringReservation, Reservation, ReservationChange, TsTzRange
+from .utilization import apply_utilization_changes
+
+MAX_CONFLICT_CHECK_DAYS = 366
+
+
+def get_horizon_end() -> date:
+    return timezone.localdate() + timedelta(weeks=getattr(settings, "RECURRING_RESERVATION_HORIZON_WEEKS", 4))
+
+
+def find_series_conflicts(series: RecurringReservation) -> list[date]:
+    """Dates of upcoming occurrences of `series` that overlap an existing reservation or another series.
+
+    All occurrences are sent as a single `tstzmultirange`, so the whole series is
+    checked against stored reservations with one query whatever its length.
+    """
+    first_day = max(series.first_date, timezone.localdate())
+    occurrences = series.occurrences(first_day, first_day + timedelta(days=MAX_CONFLICT_CHECK_DAYS))
+    if not occurrences:
+        return []
+    multirange = "{%s}" % ",".join(f'["{start.isoformat()}","{end.isoformat()}")' for _, start, end in occurrences)
+    reservations = Reservation.objects.filter(room_id=series.room_id, start_date__lt=F("end_date"))
+    if series.pk:
+        reservations = reservations.exclude(series_id=series.pk)
+    conflicts = list(
+        reservations.annotate(period=TsTzRange("start_date", "end_date", RangeBoundary()))
+        .filter(period__overlap=RawSQL("%s::tstzmultirange", (multirange,)))
+        .values_list("start_date", "end_date")
+    )
+    # Occurrences of the room's other series that are not stored yet.
+    conflicts.extend(
+        (start, end)
+        for _, _, start, end in expand_series(
+            occurrences[0][0], occurrences[-1][0], room_ids=[series.room_id], exclude_series_id=series.pk
+        )
+    )
+    return [
+        day
+        for day, start, end in occurrences
+        if any(conflict_start < end and conflict_end > start for conflict_start, conflict_end in conflicts)
+    ]
+
+
+def materialize_series(series: RecurringReservation, horizon_end: date | None = None) -> tuple[int, list[date]]:
+    """Create the reservations of `series` up to `horizon_end`.
+
+    Occurrences clashing with an existing reservation are skipped and returned.
+    They are added to the series' exdates, so the calendar stops showing them,
+    and the reserver is emailed about them.
+    """
+    horizon_end = horizon_end or get_horizon_end()
+    first_day = timezone.localdate()
+    if series.materialized_until:
+        first_day = max(first_day, series.materialized_until + timedelta(days=1))
+    occurrences = series.occurrences(first_day, horizon_end)
+    occurrence_starts = Reservation.objects.filter(series=series, start_date__in=[start for _, start, _ in occurrences])
+    with transaction.atomic():
+        existing_starts = set(occurrence_starts.values_list("start_date", flat=True))
+        # ignore_conflicts covers both an already materialized occurrence and the overlap exclusion constraint.
+        Reservation.objects.bulk_create(
+            [
+                Reservation(
+                    room_id=series.room_id,
+                    reserver_user_id=series.reserver_user_id,
+                    team_id=series.team_id,
+                    start_date=start,
+                    end_date=end,
+                    note=series.note,
+                    series=series,
+                )
+                for _, start, end in occurrences
+            ],
+            ignore_conflicts=True,
+        )
+        materialized = dict(occurrence_starts.values_list("start_date", "id"))
+        materialized_starts = set(materialized)
+        # bulk_create skips the model signals.
+        record_changes(
+            [(ReservationChange.CREATED, materialized[start]) for start in materialized_starts - existing_starts]
+        )
+        skipped = [day for day, start, _ in occurrences if start not in materialized_starts]
+        if skipped:
+            series.exdates = sorted(set(series.exdates) | set(skipped))
+            RecurringReservation.objects.filter(pk=series.pk).update(exdates=series.exdates)
+            report_skipped_occurrences(series, skipped)
+        if horizon_end > (series.materialized_until or date.min):
+            RecurringReservation.objects.filter(pk=series.pk).update(materialized_until=horizon_end)
+            series.materialized_until = horizon_end
+        created_days = [
+            day for day, start, _ in occurrences if start in materialized_starts and start not in existing_starts
+        ]
+        if created_days:
+            refresh_room_occupancy(series.room_id, created_days)
+            apply_utilization_changes(
+                [
+                    (series.room_id, start, end, 1)
+                    for _, start, end in occurrences
+                    if start in materialized_starts and start not in existing_starts
+                ]
+            )
+        # Days up to the horizon switch from lazily expanded occurrences to stored ones, or lose a skipped one.
+        bump_feed_versions(
+            {day for day, _, _ in occurrences} | {room_scope(series.room_id), team_scope(series.team_id)}
+        )
+        if occurrences:
+            publish_on_commit(
+                {
+                    "action": "materialized",
+                    "id": None,
+                    "series": series.pk,
+                    "rooms": [series.room_id],
+                    "days": [str(day) for day, _, _ in occurrences],
+                }
+            )
+    return len(created_days), skipped
+
+
+def report_skipped_occurrences(series: RecurringReservation, days: list[date]):
+    recipient = series.reserver_user.email if series.reserver_user else None
+    if not recipient:
+        return
+    listed = ", ".join(str(day) for day in days)
+    enqueue_mail(
+        "Recurring Meeting Not Booked",
+        f"""{series.reserver_user.first_name} {series.reserver_user.last_name}, please note,
+        your team's recurring meeting in {series.room} could not be booked on {listed}
+        because the room is already reserved.""",
+        "noreply@unchained.com",
+        [recipient],
+    )
+
+
+def expand_series(
+    first_day: date, last_day: date, room_ids=None, exclude_series_id: int | None = None
+) -> list[tuple[RecurringReservation, date, object, object]]:
+    """Occurrences between two days, both included, that have not been materialized yet."""
+    series_list = (
+        RecurringReservation.objects.filter(first_date__lte=last_day)
+        .filter(Q(until__isnull=True) | Q(until__gte=first_day))
+        .filter(Q(materialized_until__isnull=True) | Q(materialized_until__lt=last_day))
+        .select_related("room", "team", "reserver_user")
+    )
+    if room_ids is not None:
+        series_list = series_list.filter(room_id__in=room_ids)
+    if exclude_series_id is not None:
+        series_list = series_list.exclude(pk=exclude_series_id)
+    occurrences = []
+    for series in series_list:
+        lazy_first_day = first_day
+        if series.materialized_until:
+            lazy_first_day = max(first_day, series.materialized_until + timedelta(days=1))
+        occurrences.extend(
+            (series, day, start, end) for day, start, end in series.occurrences(lazy_first_day, last_day)
+        )
+    return occurrences
+
+
+def overlapping_occurrences(room_id: int, start, end, exclude_series_id: int | None = None) -> list[tuple]:
+    """Occurrences of the room's series past their materialized horizon that overlap `[start, end)`."""
+    return [
+        occurrence
+        for occurrence in expand_series(
+            timezone.localdate(start),
+            timezone.localdate(end - timedelta(microseconds=1)),
+            room_ids=[room_id],
+            exclude_series_id=exclude_series_id,
+        )
+        if occurrence[2] < end and occurrence[3] > start
+    ]
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from django.core.mail import EmailMessage
+from django.db import transaction
+
+from mailer.queue import enqueue_messages
+
+from .models import Reservation
+
+REMINDER_WINDOW = timedelta(hours=2)
+
+
+def send_reminders(now: datetime) -> tuple[int, int]:
+    """Email the teams of meetings starting within `REMINDER_WINDOW` of `now`, once per reservation.
+
+    Returns the number of reminder and cancellation emails queued.
+    """
+    reminder_email_sent = 0
+    cancellation_email_sent = 0
+    with transaction.atomic():
+        # Rows locked by an overlapping run are left to it. The end date bound lets PostgreSQL skip the
+        # partitions of past months.
+        rows = (
+            Reservation.objects.filter(
+                start_date__gt=now,
+                start_date__lte=now + REMINDER_WINDOW,
+                end_date__gt=now,
+                reminded_at__isnull=True,
+            )
+            .select_for_update(skip_locked=True, of=("self",))
+            .order_by("start_date", "id")
+            .values_list(
+                "id",
+                "start_date",
+                "end_date",
+                "room__name",
+                "room__is_active",
+                "team__customuser__first_name",
+                "team__customuser__last_name",
+                "team__customuser__email",
+            )
+        )
+        due = {}
+        for reservation_id, start_date, end_date, room, is_active, first_name, last_name, email in rows:
+            reservation = due.setdefault(reservation_id, (start_date, end_date, room, is_active, []))
+            if email:
+                reservation[4].append((first_name, last_name, email))
+
+        messages = []
+        for start_date, end_date, room, is_active, recipients in due.values():
+            messages.extend(
+                reminder_message(first_name, last_name, email, start_date, end_date, room, is_active)
+                for first_name, last_name, email in recipients
+            )
+            if is_active:
+                reminder_email_sent += len(recipients)
+            else:
+                cancellation_email_sent += len(recipients)
+        # Queued as the reservations are marked, when this transaction commits. Workers send them.
+        enqueue_messages(messages)
+        Reservation.objects.filter(id__in=list(due), end_date__gt=now).update(reminded_at=now)
+    return reminder_email_sent, cancellation_email_sent
+
+
+def reminder_message(first_name, last_name, email, start_date, end_date, room, is_active) -> EmailMessage:
+    if is_active:
+        subject = "Meeting time reminder..."
+        message = f"""{first_name} {last_name}, please note,
+                    reservation for your team's meeting will be held
+                    from {start_date} to {end_date} in {room}."""
+    else:
+        subject = "Meeting Cancelled"
+        message = f"""{first_name} {last_name}, please note,
+                    reservation for your team's meeting
+                    from {start_date} to {end_date} in {room} has been CANCELLED."""
+    return EmailMessage(subject, message, "noreply@unchained.com", [email])
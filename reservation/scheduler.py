@@ -0,0 +1,127 @@
+import heapq
+from datetime import datetime
+
+from django.db import connection
+from django.utils import timezone
+
+from .journal import get_changes, get_journal_floor, get_latest_sequence
+from .models import Reservation
+from .reminders import REMINDER_WINDOW, send_reminders
+
+SCHEDULER_LOCK_ID = 7_300_002
+
+
+class ReminderHeap:
+    """Reservations by the time their reminder is due, earliest first.
+
+    Rescheduled and discarded reservations leave their old entries behind, which
+    are skipped when they reach the top.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.due_at = {}
+
+    def __len__(self) -> int:
+        return len(self.due_at)
+
+    def schedule(self, reservation_id: int, due_at: datetime):
+        if self.due_at.get(reservation_id) == due_at:
+            return
+        self.due_at[reservation_id] = due_at
+        heapq.heappush(self.entries, (due_at, reservation_id))
+        if len(self.entries) > 2 * len(self.due_at) + 64:
+            self.entries = [(due_at, reservation_id) for reservation_id, due_at in self.due_at.items()]
+            heapq.heapify(self.entries)
+
+    def discard(self, reservation_id: int):
+        self.due_at.pop(reservation_id, None)
+
+    def next_due(self) -> datetime | None:
+        while self.entries and self.due_at.get(self.entries[0][1]) != self.entries[0][0]:
+            heapq.heappop(self.entries)
+        return self.entries[0][0] if self.entries else None
+
+    def pop_due(self, now: datetime) -> list[int]:
+        due = []
+        while (due_at := self.next_due()) is not None and due_at <= now:
+            _, reservation_id = heapq.heappop(self.entries)
+            del self.due_at[reservation_id]
+            due.append(reservation_id)
+        return due
+
+
+class ReminderScheduler:
+    """Sends each reminder when it is due, on the one process holding the scheduler lock.
+
+    The lock is a session-level advisory lock, released when the leader's
+    connection closes so another scheduler can take over. The leader keeps the
+    unreminded reservations in a heap and follows the change journal, which the
+    reservation signals write, to pick up new, moved and deleted reservations.
+    """
+
+    def __init__(self):
+        self.heap = ReminderHeap()
+        self.is_leader = False
+        self.since = 0
+
+    def try_lead(self) -> bool:
+        if not self.is_leader:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", [SCHEDULER_LOCK_ID])
+                self.is_leader = cursor.fetchone()[0]
+            if self.is_leader:
+                self.load()
+        return self.is_leader
+
+    def resign(self):
+        if self.is_leader:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [SCHEDULER_LOCK_ID])
+            self.is_leader = False
+
+    def step_down(self):
+        """Close the connection after an error, which releases the lock if its session is still alive."""
+        self.is_leader = False
+        connection.close()
+
+    def pending(self, now: datetime):
+        # The end date bound lets PostgreSQL skip the partitions of past months.
+        return Reservation.objects.filter(start_date__gt=now, end_date__gt=now, reminded_at__isnull=True)
+
+    def load(self):
+        """Schedule every reservation whose reminder is still to be sent."""
+        # Read before the reservations, changes in between are applied again by the next refresh.
+        self.since = get_latest_sequence()
+        self.heap = ReminderHeap()
+        for reservation_id, start_date in self.pending(timezone.now()).values_list("id", "start_date"):
+            self.heap.schedule(reservation_id, start_date - REMINDER_WINDOW)
+
+    def refresh(self, batch_size: int = 500):
+        """Apply the journal entries written since the last refresh."""
+        if self.since < get_journal_floor():
+            self.load()
+            return
+        has_more = True
+        while has_more:
+            changes, has_more = get_changes(self.since, batch_size)
+            if not changes:
+                break
+            reservation_ids = [change.reservation_id for change in changes]
+            pending = dict(self.pending(timezone.now()).filter(id__in=reservation_ids).values_list("id", "start_date"))
+            for reservation_id in reservation_ids:
+                if reservation_id in pending:
+                    self.heap.schedule(reservation_id, pending[reservation_id] - REMINDER_WINDOW)
+                else:
+                    self.heap.discard(reservation_id)
+            self.since = changes[-1].sequence
+
+    def run_due(self, now: datetime) -> tuple[int, int] | None:
+        """Send the reminders due at `now`, returns the emails queued or None when none was due."""
+        due_at = self.heap.next_due()
+        if due_at is None or due_at > now:
+            return None
+        # Sends every reminder due, including those of reservations changed since the last refresh.
+        sent = send_reminders(now)
+        self.heap.pop_due(now)
+        return sent
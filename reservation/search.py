@@ -0,0 +1,70 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorCombinable,
+    SearchVectorField,
+)
+from django.db import transaction
+from django.db.models import F, Func, OuterRef, QuerySet, Subquery
+
+from .models import Comment, Room
+
+SEARCH_CONFIG = "english"
+
+
+class Strip(SearchVectorCombinable, Func):
+    function = "strip"
+    output_field = SearchVectorField()
+
+
+def room_search_vector() -> SearchVector:
+    """Weighted vector of a room's name, description and the words of all its comments.
+
+    Comment words are stored without positions: positions in text joined from many
+    comments mean nothing, and leaving them out keeps the vector small enough for
+    ranking every room to stay cheap. Words without positions rank with the lowest weight.
+    """
+    comments = (
+        Comment.objects.filter(room=OuterRef("pk"))
+        .order_by()
+        .values("room")
+        .annotate(text=StringAgg("content", delimiter=" "))
+        .values("text")
+    )
+    return (
+        SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+        + Strip(SearchVector(Subquery(comments), config=SEARCH_CONFIG))
+    )
+
+
+def update_room_search_vectors(room_ids=None) -> int:
+    """Recompute the search vectors of `room_ids`, or of every room. Returns the number of rooms updated.
+
+    Each call reads all comments of the rooms again, so a comment write costs time
+    linear in the comments of its room; after a bulk load run `rebuild_room_search`
+    once instead. The rooms are locked before the update reads the comments, so a
+    write waiting for another one to commit sees its comment.
+    """
+    rooms = Room.objects.all()
+    if room_ids is not None:
+        rooms = rooms.filter(pk__in=room_ids)
+    with transaction.atomic():
+        # An UPDATE that waits for the row lock keeps the snapshot it started with, the SELECT takes a new one after.
+        locked = list(rooms.order_by("pk").select_for_update(no_key=True).values_list("pk", flat=True))
+        return Room.objects.filter(pk__in=locked).update(search_vector=room_search_vector())
+
+
+def search_query(text: str) -> SearchQuery:
+    return SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+
+
+def search_rooms(text: str, rooms: QuerySet | None = None) -> QuerySet:
+    """Rooms matching `text`, best ranked first. Matching and ranking read only the GIN-indexed vector."""
+    query = search_query(text)
+    rooms = Room.objects.all() if rooms is None else rooms
+    return (
+        rooms.filter(search_vector=query).annotate(rank=SearchRank(F("search_vector"), query)).order_by("-rank", "id")
+    )
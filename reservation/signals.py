@@ -1,20 +1,208 @@
-from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-
-User = get_user_model()
-
-
-def reservation_post_delete_cancell_email(sender, instance, **kwargs):
-    users = User.objects.filter(team=instance.team).all()
-    for user in users:
-        subject = "Meeting Cancelled"
-        message = f"""{user.first_name} {user.last_name}, please note,
-        reservation for your team's meeting
-        from {instance.start_date} to {instance.end_date} in {instance.room} has been CANCELLED."""
-        recipient = user.email
-        send_mail(
-            subject,
-            message,
-            recipient_list=(recipient,),
-            from_email="noreply@unchained.com",
+from django.db import transaction
+from django.db.models import F, Func, Value
+from django.utils import timezone
+
+from .availability import as_datetime, days_between, refresh_room_occupancy
+from .broker import publish_on_commit
+from .calendar_feed import bump_feed_versions, room_scope, team_scope
+from .cancellations import notify_cancellation
+from .interval_index import reservation_index
+from .journal import record_changes
+from .models import Comment, Rating, RecurringReservation, Reservation, ReservationChange, Room
+from .search import update_room_search_vectors
+from .utilization import apply_utilization_changes
+
+
+def reservation_pre_delete_cancell_email(sender, instance, **kwargs):
+    # Before the delete, a team delete has not yet unset its members' team.
+    notify_cancellation(instance)
+
+
+def reservation_post_save_update_index(sender, instance, **kwargs):
+    reservation_id, room_id, start, end = instance.pk, instance.room_id, instance.start_date, instance.end_date
+    transaction.on_commit(lambda: reservation_index.update(reservation_id, room_id, start, end))
+
+
+def reservation_post_delete_update_index(sender, instance, **kwargs):
+    reservation_id = instance.pk
+    transaction.on_commit(lambda: reservation_index.discard(reservation_id))
+
+
+def reservation_pre_save_remember_occupancy(sender, instance, **kwargs):
+    instance._previous_occupancy = None
+    instance._previous_team_id = None
+    if instance.pk and not instance._state.adding:
+        previous = (
+            Reservation.objects.filter(pk=instance.pk)
+            .values_list("room_id", "start_date", "end_date", "team_id")
+            .first()
         )
+        if previous:
+            instance._previous_occupancy, instance._previous_team_id = previous[:3], previous[3]
+
+
+def _days_by_room(*reservations) -> dict[int, set]:
+    days_by_room = {}
+    for room_id, start, end in reservations:
+        start, end = as_datetime(start), as_datetime(end)
+        if end > start:
+            days_by_room.setdefault(room_id, set()).update(days_between(start, end))
+    return days_by_room
+
+
+def _saved_reservations(instance) -> list[tuple]:
+    reservations = [(instance.room_id, instance.start_date, instance.end_date)]
+    if getattr(instance, "_previous_occupancy", None):
+        reservations.append(instance._previous_occupancy)
+    return reservations
+
+
+def _refresh_occupancy(*reservations):
+    for room_id, days in _days_by_room(*reservations).items():
+        refresh_room_occupancy(room_id, sorted(days))
+
+
+def _bump_feed_versions(team_ids, *reservations):
+    days_by_room = _days_by_room(*reservations)
+    bump_feed_versions(
+        set().union(*days_by_room.values())
+        | {room_scope(room_id) for room_id, _, _ in reservations}
+        | {team_scope(team_id) for team_id in team_ids if team_id}
+    )
+
+
+def reservation_post_save_update_occupancy(sender, instance, **kwargs):
+    _refresh_occupancy(*_saved_reservations(instance))
+
+
+def reservation_post_save_reset_reminder(sender, instance, **kwargs):
+    # A moved meeting gets a new reminder.
+    previous = getattr(instance, "_previous_occupancy", None)
+    if previous and previous[1] != instance.start_date:
+        Reservation.objects.filter(pk=instance.pk, end_date=instance.end_date).update(reminded_at=None)
+        instance.reminded_at = None
+
+
+def reservation_post_delete_update_occupancy(sender, instance, **kwargs):
+    _refresh_occupancy((instance.room_id, instance.start_date, instance.end_date))
+
+
+def reservation_post_save_update_utilization(sender, instance, **kwargs):
+    changes = [(instance.room_id, as_datetime(instance.start_date), as_datetime(instance.end_date), 1)]
+    if getattr(instance, "_previous_occupancy", None):
+        room_id, start, end = instance._previous_occupancy
+        changes.append((room_id, start, end, -1))
+    apply_utilization_changes(changes)
+
+
+def reservation_post_delete_update_utilization(sender, instance, **kwargs):
+    apply_utilization_changes(
+        [(instance.room_id, as_datetime(instance.start_date), as_datetime(instance.end_date), -1)]
+    )
+
+
+def reservation_post_save_bump_feed_version(sender, instance, **kwargs):
+    _bump_feed_versions(
+        {instance.team_id, getattr(instance, "_previous_team_id", None)}, *_saved_reservations(instance)
+    )
+
+
+def reservation_post_delete_bump_feed_version(sender, instance, **kwargs):
+    _bump_feed_versions({instance.team_id}, (instance.room_id, instance.start_date, instance.end_date))
+
+
+def _publish_change(action: str, reservation_id: int, *reservations):
+    days_by_room = _days_by_room(*reservations)
+    publish_on_commit(
+        {
+            "action": action,
+            "id": reservation_id,
+            "rooms": sorted(days_by_room),
+            "days": sorted({str(day) for days in days_by_room.values() for day in days}),
+        }
+    )
+
+
+def reservation_post_save_publish_change(sender, instance, created, **kwargs):
+    _publish_change("created" if created else "updated", instance.pk, *_saved_reservations(instance))
+
+
+def reservation_post_delete_publish_change(sender, instance, **kwargs):
+    _publish_change("deleted", instance.pk, (instance.room_id, instance.start_date, instance.end_date))
+
+
+def reservation_post_save_record_change(sender, instance, created, **kwargs):
+    record_changes([(ReservationChange.CREATED if created else ReservationChange.UPDATED, instance.pk)])
+
+
+def reservation_post_delete_record_change(sender, instance, **kwargs):
+    record_changes([(ReservationChange.DELETED, instance.pk)])
+
+
+def bump_all_feed_versions(sender, **kwargs):
+    bump_feed_versions()
+
+
+def pre_save_remember_name(sender, instance, **kwargs):
+    instance._previous_name = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_name = sender.objects.filter(pk=instance.pk).values_list("name", flat=True).first()
+
+
+def post_save_bump_feed_versions_on_rename(sender, instance, created, **kwargs):
+    # Room and team names are part of every calendar event, other fields are not.
+    if not created and getattr(instance, "_previous_name", None) != instance.name:
+        bump_feed_versions()
+
+
+def reservation_post_delete_exclude_occurrence(sender, instance, **kwargs):
+    if not instance.series_id:
+        return
+    day = timezone.localdate(instance.start_date)
+    # Keep a cancelled occurrence from being materialized or shown again.
+    RecurringReservation.objects.filter(pk=instance.series_id).exclude(exdates__contains=[day]).update(
+        exdates=Func(F("exdates"), Value(day), function="array_append")
+    )
+
+
+def room_post_save_update_search_vector(sender, instance, **kwargs):
+    update_room_search_vectors([instance.pk])
+
+
+def comment_pre_save_remember_room(sender, instance, **kwargs):
+    instance._previous_room_id = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_room_id = Comment.objects.filter(pk=instance.pk).values_list("room_id", flat=True).first()
+
+
+def comment_post_save_update_search_vector(sender, instance, **kwargs):
+    room_ids = {instance.room_id, getattr(instance, "_previous_room_id", None)} - {None}
+    update_room_search_vectors(room_ids)
+
+
+def comment_post_delete_update_search_vector(sender, instance, **kwargs):
+    update_room_search_vectors([instance.room_id])
+
+
+def _add_room_ratings(room_id: int, count: int, total: int):
+    Room.objects.filter(pk=room_id).update(rating_count=F("rating_count") + count, rating_sum=F("rating_sum") + total)
+
+
+def rating_pre_save_remember_value(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_rating = Rating.objects.filter(pk=instance.pk).values_list("room_id", "value").first()
+
+
+def rating_post_save_update_room(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_rating", None)
+    if previous and previous[0] == instance.room_id:
+        _add_room_ratings(instance.room_id, 0, instance.value - previous[1])
+        return
+    if previous:
+        _add_room_ratings(previous[0], -1, -previous[1])
+    _add_room_ratings(instance.room_id, 1, instance.value)
+
+
+def rating_post_delete_update_room(sender, instance, **kwargs):
+    _add_room_ratings(instance.room_id, -1, -instance.value)
@@ -0,0 +1,155 @@
+import threading
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from reservation.booking import (
+    book_reservation,
+    get_lock_wait_metrics,
+    lock_room_days,
+    room_day_keys,
+)
+from reservation.forms import ReservationForm
+from reservation.interval_index import reservation_index
+from reservation.models import Reservation, ReservationChange, Room
+from users.models import Team
+
+User = get_user_model()
+
+
+def next_day(hour):
+    return timezone.now().replace(hour=hour, minute=0, second=0, microsecond=0) + timedelta(days=2)
+
+
+class BookingLockTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        reservation_index.clear()
+        call_command("create_groups_and_permissions")
+        self.team = Team.objects.create(name="Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.other_room = Room.objects.create(name="Other Room", capacity=4)
+        self.user = User.objects.create_user(username="admin", password="password", is_superuser=True)
+
+    def tearDown(self):
+        reservation_index.clear()
+
+    def test_rooms_do_not_block_each_other(self):
+        day = timezone.localdate(next_day(9))
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            with transaction.atomic():
+                lock_room_days([(self.room.id, day)])
+                locked.set()
+                release.wait(5)
+            connection.close()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        locked.wait(5)
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL lock_timeout = '100ms'")
+                lock_room_days([(self.other_room.id, day), (self.room.id, day + timedelta(days=1))])
+            with self.assertRaises(OperationalError) as raised, transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL lock_timeout = '100ms'")
+                lock_room_days([(self.room.id, day)])
+            self.assertEqual(raised.exception.__cause__.sqlstate, "55P03")
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(get_lock_wait_metrics()["count"], 3)
+
+    def test_open_booking_does_not_block_other_rooms(self):
+        start = next_day(9)
+        booked, release = threading.Event(), threading.Event()
+
+        def book(room):
+            return book_reservation(
+                Reservation(
+                    team=self.team,
+                    room=room,
+                    reserver_user=self.user,
+                    start_date=start,
+                    end_date=start + timedelta(hours=1),
+                )
+            )
+
+        def hold_booking():
+            # Saved and journaled, the transaction stays open.
+            with transaction.atomic():
+                book(self.room)
+                booked.set()
+                release.wait(5)
+            connection.close()
+
+        thread = threading.Thread(target=hold_booking)
+        thread.start()
+        booked.wait(5)
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL lock_timeout = '100ms'")
+                self.assertTrue(book(self.other_room))
+        finally:
+            release.set()
+            thread.join()
+        # Numbered in commit order.
+        self.assertEqual(
+            list(ReservationChange.objects.order_by("sequence").values_list("reservation_id", flat=True)),
+            list(Reservation.objects.order_by("room_id").reverse().values_list("id", flat=True)),
+        )
+
+    def test_booking_reads_writes_the_index_has_not_seen(self):
+        start = next_day(9)
+        self.assertFalse(reservation_index.overlaps(self.room.id, start, start + timedelta(hours=1)))
+        # Written by another process, the cached bucket of this one doesn't know about it yet.
+        Reservation.objects.bulk_create(
+            [Reservation(team=self.team, room=self.room, start_date=start, end_date=start + timedelta(hours=1))]
+        )
+        data = {
+            "room": self.room.id,
+            "team": self.team.id,
+            "reserver_user": self.user.id,
+            "start_date": start.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_date": (start + timedelta(minutes=30)).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        form = ReservationForm(data, user=self.user)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertIsNone(form.save())
+        self.assertIn("Overlapping Reservation!", form.non_field_errors())
+        self.assertEqual(Reservation.objects.count(), 1)
+
+
+class BookingLockMetricsJsonTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command("create_groups_and_permissions")
+        self.team = Team.objects.create(name="Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.admin = User.objects.create_superuser(
+            username="admin", password="password", email="admin@a.com", phone="09123456789"
+        )
+        self.user = User.objects.create_user(
+            username="user", password="password", email="user@a.com", phone="09123456780", team=self.team
+        )
+
+    def test_metrics(self):
+        start = next_day(9)
+        with transaction.atomic():
+            lock_room_days(room_day_keys(self.room.id, start, start + timedelta(hours=1)))
+        self.client.login(username="admin", password="password")
+        data = self.client.get(reverse("reservation:booking_lock_metrics")).json()
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["buckets"]["+Inf"], 1)
+        self.assertEqual(list(data["buckets"]), ["0.001", "0.01", "0.1", "1.0", "10.0", "+Inf"])
+
+        self.client.login(username="user", password="password")
+        self.assertEqual(self.client.get(reverse("reservation:booking_lock_metrics")).status_code, 403)
@@ -0,0 +1,121 @@
+import asyncio
+import json
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from reservation.broker import LocalBroker
+from reservation.models import Reservation, Room
+from reservation.views import reservation_event_stream
+from users.models import Team
+
+User = get_user_model()
+
+
+class LocalBrokerTest(TestCase):
+    async def test_publish_to_matching_subscriptions(self):
+        broker = LocalBroker()
+        everything = broker.subscribe()
+        monday = broker.subscribe(days=["2030-01-07"])
+        other_room = broker.subscribe(days=["2030-01-07"], rooms=[2])
+        message = {"action": "created", "id": 1, "rooms": [1], "days": ["2030-01-07"]}
+        broker.publish(message)
+        self.assertEqual(await everything.get(timeout=1), message)
+        self.assertEqual(await monday.get(timeout=1), message)
+        self.assertIsNone(await other_room.get(timeout=0.1))
+
+    async def test_closed_subscription(self):
+        broker = LocalBroker()
+        subscription = broker.subscribe()
+        subscription.close()
+        broker.publish({"action": "deleted", "id": 1, "rooms": [1], "days": ["2030-01-07"]})
+        self.assertIsNone(await subscription.get(timeout=0.1))
+
+    async def test_overflow(self):
+        broker = LocalBroker()
+        subscription = broker.subscribe()
+        for reservation_id in range(101):
+            subscription.deliver({"action": "created", "id": reservation_id, "rooms": [1], "days": []})
+        self.assertTrue(subscription.overflowed)
+
+
+class ReservationEventStreamTest(TransactionTestCase):
+    def setUp(self):
+        call_command("create_groups_and_permissions")
+        self.team = Team.objects.create(name="Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.user = User.objects.create_user(
+            username="user", password="password", email="user@a.com", phone="09123456789", team=self.team
+        )
+
+    async def test_stream_reservation_changes(self):
+        response = await self.async_client.get(
+            reverse("reservation:reservation_events"), {"start": "2030-01-07", "end": "2030-01-08"}
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+        reservation = await sync_to_async(Reservation.objects.create)(
+            room=self.room,
+            team=self.team,
+            reserver_user=self.user,
+            start_date=timezone.make_aware(datetime(2030, 1, 7, 9)),
+            end_date=timezone.make_aware(datetime(2030, 1, 7, 10)),
+        )
+        chunk = (await asyncio.wait_for(anext(chunks), timeout=5)).decode()
+        self.assertTrue(chunk.startswith("event: reservation\n"))
+        self.assertEqual(
+            json.loads(chunk.split("data: ")[1]),
+            {"action": "created", "id": reservation.id, "rooms": [self.room.id], "days": ["2030-01-07"]},
+        )
+
+    async def test_stream_delivers_changes_of_subscribed_rooms(self):
+        other_room = await sync_to_async(Room.objects.create)(name="Other Room", capacity=4)
+        response = await self.async_client.get(
+            reverse("reservation:reservation_events"), {"start": "2030-01-07", "rooms": str(other_room.id)}
+        )
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+        for room in [self.room, other_room]:
+            reservation = await sync_to_async(Reservation.objects.create)(
+                room=room,
+                team=self.team,
+                reserver_user=self.user,
+                start_date=timezone.make_aware(datetime(2030, 1, 7, 9)),
+                end_date=timezone.make_aware(datetime(2030, 1, 7, 10)),
+            )
+        chunk = (await asyncio.wait_for(anext(chunks), timeout=5)).decode()
+        self.assertEqual(json.loads(chunk.split("data: ")[1])["id"], reservation.id)
+
+    async def test_no_stream_without_asgi(self):
+        params = {"start": "2030-01-07", "end": "2030-01-08"}
+        response = await sync_to_async(self.client.get)(reverse("reservation:reservation_events"), params)
+        self.assertEqual(response.status_code, 204)
+        with override_settings(RESERVATION_EVENT_STREAM=False):
+            response = await self.async_client.get(reverse("reservation:reservation_events"), params)
+        self.assertEqual(response.status_code, 204)
+
+    async def test_calendar_polls_without_stream(self):
+        response = await sync_to_async(self.client.get)(reverse("reservation:reservation_list"))
+        self.assertNotContains(response, "new EventSource")
+        self.assertContains(response, "setInterval")
+        response = await self.async_client.get(reverse("reservation:reservation_list"))
+        self.assertContains(response, "new EventSource")
+        self.assertNotContains(response, "setInterval")
+
+    async def test_stream_ends_after_lifetime(self):
+        broker = LocalBroker()
+        subscription = broker.subscribe()
+        chunks = [chunk async for chunk in reservation_event_stream(subscription, lifetime=0.2, keepalive=0.1)]
+        self.assertEqual(chunks[0], "retry: 5000\n\n")
+        self.assertIn(": keepalive\n\n", chunks)
+        self.assertEqual(broker._subscriptions, set())
+
+    def test_invalid_window(self):
+        response = self.client.get(
+            reverse("reservation:reservation_events"), {"start": "2030-01-08", "end": "2030-01-07"}
+        )
+        self.assertEqual(response.status_code, 400)
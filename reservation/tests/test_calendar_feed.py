@@ -0,0 +1,68 @@
+import threading
+import time
+from datetime import date
+from django.core.cache import cache
+from django.test import TestCase
+from reservation.calendar_feed import (
+    FEED_REBUILD_WAIT,
+    bump_feed_versions,
+    day_events_key,
+    feed_version_key,
+    get_day_events,
+    get_feed_versions,
+)
+from reservation.models import FeedVersion
+
+DAY = date(2030, 1, 7)
+
+
+class CalendarFeedCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.built = []
+
+    def build(self, days):
+        self.built.append(days)
+        return {day: [{"id": str(day)}] for day in days}
+
+    def test_versions_are_stable_until_bumped(self):
+        versions = get_feed_versions(DAY, DAY)
+        self.assertEqual(get_feed_versions(DAY, DAY), versions)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_feed_versions([DAY])
+        key = feed_version_key(DAY)
+        self.assertGreater(get_feed_versions(DAY, DAY)[key], versions[key])
+
+    def test_versions_are_shared_through_the_database(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_feed_versions([DAY])
+        versions = get_feed_versions(DAY, DAY)
+        cache.clear()
+        self.assertEqual(get_feed_versions(DAY, DAY), versions)
+        self.assertEqual(FeedVersion.objects.get(scope=str(DAY)).stamp, versions[feed_version_key(DAY)])
+
+    def test_events_are_built_once_per_version(self):
+        versions = get_feed_versions(DAY, DAY)
+        self.assertEqual(get_day_events([DAY], versions, self.build), {DAY: [{"id": "2030-01-07"}]})
+        get_day_events([DAY], versions, self.build)
+        self.assertEqual(self.built, [[DAY]])
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_feed_versions()
+        get_day_events([DAY], get_feed_versions(DAY, DAY), self.build)
+        self.assertEqual(len(self.built), 2)
+
+    def test_waits_for_concurrent_rebuild(self):
+        versions = get_feed_versions(DAY, DAY)
+        key = day_events_key(DAY, versions)
+        cache.add(f"{key}:lock", True)
+        threading.Timer(0.2, lambda: cache.set(key, [{"id": "other"}])).start()
+        self.assertEqual(get_day_events([DAY], versions, self.build), {DAY: [{"id": "other"}]})
+        self.assertEqual(self.built, [])
+
+    def test_rebuilds_when_concurrent_rebuild_is_slow(self):
+        versions = get_feed_versions(DAY, DAY)
+        cache.add(f"{day_events_key(DAY, versions)}:lock", True)
+        started = time.monotonic()
+        self.assertEqual(get_day_events([DAY], versions, self.build), {DAY: [{"id": "2030-01-07"}]})
+        self.assertLess(time.monotonic() - started, FEED_REBUILD_WAIT + 0.5)
+        self.assertEqual(self.built, [[DAY]])
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mailer.models import QueuedEmail
+from reservation.models import Reservation, Room
+from users.models import Team
+
+User = get_user_model()
+
+
+class CancellationEmailTest(TestCase):
+    def setUp(self):
+        call_command("create_groups_and_permissions")
+        self.room = Room.objects.create(name="Room1", capacity=10)
+        self.team = Team.objects.create(name="Team")
+        for number in range(2):
+            User.objects.create_user(
+                username=f"user{number}",
+                password="password",
+                email=f"user{number}@a.com",
+                phone=f"0912345678{number}",
+                first_name="User",
+                last_name=str(number),
+                team=self.team,
+            )
+        start = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        self.reservations = [
+            Reservation.objects.create(
+                room=self.room,
+                team=self.team,
+                start_date=start + timedelta(days=day),
+                end_date=start + timedelta(days=day, hours=1),
+            )
+            for day in range(3)
+        ]
+
+    def test_one_email_per_member(self):
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Reservation.objects.filter(pk__in=[reservation.pk for reservation in self.reservations]).delete()
+        self.assertEqual(len([query for query in queries if 'FROM "users_customuser"' in query["sql"]]), 1)
+        emails = QueuedEmail.objects.order_by("to")
+        self.assertEqual([email.to for email in emails], [["user0@a.com"], ["user1@a.com"]])
+        self.assertTrue(emails[0].body.startswith("User 0, please note,"))
+        self.assertIn("reservations for your team's meetings", emails[0].body)
+        self.assertEqual(emails[0].body.count(" in Room1"), 3)
+
+    def test_team_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.delete()
+        self.assertEqual(QueuedEmail.objects.count(), 2)
+
+    def test_single_cancellation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reservations[0].delete()
+        email = QueuedEmail.objects.filter(to=["user1@a.com"]).get()
+        self.assertIn("reservation for your team's meeting\n", email.body)
+        self.assertIn("in Room1 has been CANCELLED.", email.body)
+
+    def test_rolled_back_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.reservations[0].delete()
+                transaction.set_rollback(True)
+            self.reservations[1].delete()
+        self.assertEqual(QueuedEmail.objects.count(), 2)
+        self.assertNotIn(str(self.reservations[0].start_date), QueuedEmail.objects.first().body)
+
+    def test_rolled_back_savepoint(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Reservation.objects.filter(pk=self.reservations[1].pk).delete()
+                with transaction.atomic():
+                    self.reservations[0].delete()
+                    transaction.set_rollback(True)
+                self.reservations[2].delete()
+        email = QueuedEmail.objects.filter(to=["user0@a.com"]).get()
+        self.assertEqual(email.body.count(" in Room1"), 2)
+        self.assertNotIn(str(self.reservations[0].start_date), email.body)
+        self.assertEqual(Reservation.objects.get().start_date, self.reservations[0].start_date)
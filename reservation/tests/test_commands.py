@@ -1,11 +1,16 @@
+import json
 from io import StringIO
 import sys
+import tempfile
 from django.contrib.auth import get_user_model
-from django.core.management import call_command
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
-from reservation.models import Reservation, Room
-from users.models import Team
+from reservation.models import Reservation, Room, RoomOccupancy
+from users.models import OTP, Team
 
 User = get_user_model()
 
@@ -55,3 +60,119 @@ class YourCommandTestCase(TestCase):
         sys.stdout = sys.__stdout__
         self.assertIn("1 reminder email sent.", output)
         self.assertIn("0 cancellation email sent.", output)
+
+
+class ReservationEmailReminderCommandTest(TestCase):
+    def setUp(self):
+        call_command("create_groups_and_permissions")
+        self.room = Room.objects.create(name="Room1", capacity=10)
+        self.team = Team.objects.create(name="Team")
+        for number in range(3):
+            User.objects.create_user(
+                username=f"user{number}",
+                password="password",
+                email=f"user{number}@a.com",
+                phone=f"0912345678{number}",
+                team=self.team,
+            )
+        now = timezone.now()
+        self.upcoming = Reservation.objects.create(
+            room=self.room,
+            team=self.team,
+            start_date=now + timezone.timedelta(minutes=30),
+            end_date=now + timezone.timedelta(minutes=90),
+        )
+        Reservation.objects.create(
+            room=self.room,
+            team=self.team,
+            start_date=now - timezone.timedelta(minutes=30),
+            end_date=now + timezone.timedelta(minutes=20),
+        )
+
+    def remind(self):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("reservation_email_reminder", stdout=out)
+        call_command("run_worker", once=True, stdout=StringIO())
+        return out.getvalue()
+
+    def test_reminds_once(self):
+        with self.assertNumQueries(5):
+            # Savepoint, due reminders with their recipients, marking them, release, queueing the emails.
+            out = StringIO()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("reservation_email_reminder", stdout=out)
+        self.assertIn("3 reminder email sent.", out.getvalue())
+        call_command("run_worker", once=True, stdout=StringIO())
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox), ["user0@a.com", "user1@a.com", "user2@a.com"]
+        )
+        self.assertIn("0 reminder email sent.", self.remind())
+        self.assertEqual(len(mail.outbox), 3)
+
+        self.upcoming.start_date += timezone.timedelta(minutes=5)
+        self.upcoming.save()
+        self.assertIn("3 reminder email sent.", self.remind())
+        self.upcoming.note = "Agenda"
+        self.upcoming.save()
+        self.assertIn("0 reminder email sent.", self.remind())
+
+
+class RebuildRoomOccupancyCommandTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name="Room1", capacity=10)
+        self.team = Team.objects.create(name="Team")
+        start = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        for day in range(3):
+            Reservation.objects.create(
+                room=self.room,
+                team=self.team,
+                start_date=start + timezone.timedelta(days=day),
+                end_date=start + timezone.timedelta(days=day, hours=1),
+            )
+
+    def test_rebuild(self):
+        expected = {(row.room_id, row.date): row.slots for row in RoomOccupancy.objects.all()}
+        RoomOccupancy.objects.update(slots=0)
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command("rebuild_room_occupancy", stdout=out)
+        self.assertIn("3 room occupancy rows rebuilt.", out.getvalue())
+        statements = [query["sql"] for query in queries]
+        lock = next(position for position, sql in enumerate(statements) if sql.startswith("LOCK TABLE"))
+        reads = [position for position, sql in enumerate(statements) if 'FROM "reservation_reservation"' in sql]
+        self.assertTrue(reads and min(reads) > lock)
+        self.assertEqual({(row.room_id, row.date): row.slots for row in RoomOccupancy.objects.all()}, expected)
+
+
+class BenchmarkReservationQueriesCommandTest(TestCase):
+    def test_benchmark(self):
+        out = StringIO()
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "benchmark_reservation_queries",
+                rooms=2,
+                teams=2,
+                users=2,
+                days=8,
+                occupancy=1,
+                otps=3,
+                repeat=1,
+                output=output.name,
+                i_know=True,
+                stdout=out,
+            )
+            results = json.load(output)
+        self.assertIn("208 reservations, 6 one time passwords, 1 runs per query", out.getvalue())
+        self.assertEqual(
+            list(results["queries"]), ["user_reservations", "conflict_check", "reminder", "calendar_feed", "latest_otp"]
+        )
+        self.assertEqual(set(results["queries"]["reminder"]["after"]), {"ms", "node", "indexes"})
+        self.assertEqual(Reservation.objects.count(), 0)
+        self.assertEqual(OTP.objects.count(), 0)
+        self.assertEqual(Room.objects.count(), 0)
+
+    def test_refuses_without_i_know(self):
+        with self.assertRaisesMessage(CommandError, "Run it against a copy of the database and pass --i-know."):
+            call_command("benchmark_reservation_queries", rooms=1, teams=1, users=1, days=1, repeat=1)
+        self.assertEqual(Room.objects.count(), 0)
@@ -0,0 +1,70 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from reservation.comments import comment_page, decode_cursor
+from reservation.models import Comment, Room
+
+User = get_user_model()
+
+
+class RoomCommentsTest(TestCase):
+    def setUp(self):
+        call_command("create_groups_and_permissions")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.other_room = Room.objects.create(name="Other Room", capacity=4)
+        now = timezone.now()
+        self.comments = []
+        for number in range(25):
+            user = User.objects.create_user(
+                username=f"user{number}",
+                password="password",
+                email=f"user{number}@a.com",
+                phone=f"091234567{number:02d}",
+                first_name="User",
+                last_name=str(number),
+            )
+            comment = Comment.objects.create(room=self.room, user=user, content=f"Comment {number}")
+            self.comments.append(comment)
+        # Every fifth comment shares a timestamp with the one before it, the id breaks the tie.
+        for number, comment in enumerate(self.comments):
+            comment.created_at = now - timedelta(minutes=number - number % 5 // 4)
+        Comment.objects.bulk_update(self.comments, ["created_at"])
+        Comment.objects.create(room=self.other_room, user=user, content="Elsewhere")
+        self.expected = [comment.id for comment in sorted(self.comments, key=lambda c: (c.created_at, c.id))][::-1]
+
+    def test_pages_follow_the_cursor(self):
+        ids, after = [], None
+        while True:
+            page, cursor = comment_page(self.room.id, after, limit=4)
+            ids.extend(comment.id for comment in page)
+            if cursor is None:
+                break
+            after = decode_cursor(cursor)
+        self.assertEqual(ids, self.expected)
+
+    def test_room_detail_renders_the_first_page(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("reservation:room_detail", kwargs={"pk": self.room.id}))
+        self.assertEqual([comment.id for comment in response.context["comments"]], self.expected[:20])
+        self.assertContains(response, "Load more comments")
+        # Rendered with the format of the comments loaded later.
+        comments = self.client.get(reverse("reservation:room_comments", kwargs={"pk": self.room.id})).json()
+        created_display = comments["comments"][0]["created_display"]
+        self.assertContains(response, f"Comment 0 - User 0 - {created_display}")
+
+    def test_comments_view(self):
+        url = reverse("reservation:room_comments", kwargs={"pk": self.room.id})
+        with self.assertNumQueries(2):
+            data = self.client.get(url, {"limit": 10}).json()
+        self.assertEqual([comment["id"] for comment in data["comments"]], self.expected[:10])
+        self.assertEqual(data["comments"][0]["user"], "User 0")
+        data = self.client.get(url, {"cursor": data["next"]}).json()
+        self.assertEqual([comment["id"] for comment in data["comments"]], self.expected[10:])
+        self.assertIsNone(data["next"])
+
+        self.assertEqual(self.client.get(url, {"cursor": "not a cursor"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"limit": 101}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("reservation:room_comments", kwargs={"pk": 0})).status_code, 404)
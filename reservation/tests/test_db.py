@@ -0,0 +1,35 @@
+from django.db import OperationalError
+from django.test import TransactionTestCase, override_settings
+from reservation.db import run_with_retry
+
+
+class DatabaseError(Exception):
+    def __init__(self, sqlstate):
+        self.sqlstate = sqlstate
+
+
+def database_error(sqlstate):
+    error = OperationalError()
+    error.__cause__ = DatabaseError(sqlstate)
+    return error
+
+
+class RunWithRetryTest(TransactionTestCase):
+    @override_settings(RESERVATION_BOOKING_RETRY_DELAY=0)
+    def test_retry(self):
+        errors = [database_error("40001"), database_error("40P01")]
+
+        def book():
+            if errors:
+                raise errors.pop(0)
+            return True
+
+        self.assertTrue(run_with_retry(book))
+        errors = [database_error("40001")] * 3
+        with self.assertRaises(OperationalError):
+            run_with_retry(book)
+        self.assertEqual(len(errors), 0)
+        errors = [database_error("57014"), None]
+        with self.assertRaises(OperationalError):
+            run_with_retry(book)
+        self.assertEqual(len(errors), 1)
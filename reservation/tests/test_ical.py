@@ -0,0 +1,108 @@
+from datetime import date, datetime, time
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from reservation.ical import ics_component, ics_escape
+from reservation.models import RecurringReservation, Reservation, Room
+from users.models import Team
+
+User = get_user_model()
+
+
+def at(day, hour):
+    return timezone.make_aware(datetime(2030, 1, day, hour))
+
+
+class IcsFormattingTest(TestCase):
+    def test_escape(self):
+        self.assertEqual(ics_escape("Tea; cake, and\nmore \\ stuff"), "Tea\\; cake\\, and\\nmore \\\\ stuff")
+        self.assertEqual(ics_escape(None), "")
+
+    def test_lines_are_folded(self):
+        component = ics_component("VEVENT", "DESCRIPTION:" + "é" * 80)
+        lines = component.split("\r\n")
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        self.assertTrue(lines[2].startswith(" "))
+        self.assertEqual("".join(line[1:] if line.startswith(" ") else line for line in lines[1:4]).count("é"), 80)
+
+
+class ReservationIcsFeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command("create_groups_and_permissions")
+        self.team = Team.objects.create(name="Team")
+        self.other_team = Team.objects.create(name="Other Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.user = User.objects.create_user(
+            username="user", password="password", email="user@a.com", phone="09123456789", team=self.team
+        )
+        self.reservation = Reservation.objects.create(
+            room=self.room, team=self.team, reserver_user=self.user, start_date=at(7, 9), end_date=at(7, 10), note="Tea"
+        )
+        Reservation.objects.create(
+            room=self.room, team=self.other_team, reserver_user=self.user, start_date=at(7, 11), end_date=at(7, 12)
+        )
+        self.series = RecurringReservation.objects.create(
+            room=self.room,
+            team=self.team,
+            reserver_user=self.user,
+            weekdays=[0, 2],
+            start_time=time(14),
+            end_time=time(15),
+            first_date=date(2030, 1, 7),
+            until=date(2030, 3, 1),
+            exdates=[date(2030, 1, 9), date(2030, 1, 14)],
+            materialized_until=date(2030, 1, 8),
+        )
+
+    def get_feed(self, name, pk, **headers):
+        response = self.client.get(reverse(f"reservation:{name}", kwargs={"pk": pk}), **headers)
+        return response, b"".join(response.streaming_content).decode() if response.status_code == 200 else ""
+
+    def test_team_feed(self):
+        response, content = self.get_feed("team_ics", self.team.id)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        self.assertTrue(content.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertTrue(content.endswith("END:VCALENDAR\r\n"))
+        self.assertEqual(content.count("BEGIN:VEVENT"), 2)
+        self.assertIn(f"UID:reservation-{self.reservation.id}@unchained\r\n", content)
+        self.assertIn("DTSTART:20300107T090000Z\r\nDTEND:20300107T100000Z\r\nSUMMARY:Team\r\n", content)
+        self.assertIn("DTSTART:20300116T140000Z\r\nDTEND:20300116T150000Z\r\n", content)
+        self.assertIn("RRULE:FREQ=WEEKLY;INTERVAL=1;BYDAY=MO,WE;UNTIL=20300301T235959Z\r\n", content)
+        self.assertNotIn("EXDATE", content)
+
+    def test_room_feed(self):
+        self.series.exdates = [date(2030, 1, 9), date(2030, 1, 16)]
+        self.series.save()
+        _, content = self.get_feed("room_ics", self.room.id)
+        self.assertEqual(content.count("BEGIN:VEVENT"), 3)
+        self.assertIn("SUMMARY:Other Team\r\n", content)
+        self.assertIn("DTSTART:20300114T140000Z\r\n", content)
+        self.assertIn("EXDATE:20300116T140000Z\r\n", content)
+        self.assertNotIn("TZID", content)
+
+    async def test_asgi_feed_is_streamed(self):
+        response = await self.async_client.get(reverse("reservation:room_ics", kwargs={"pk": self.room.id}))
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertTrue(content.endswith("END:VCALENDAR\r\n"))
+        self.assertEqual(content.count("BEGIN:VEVENT"), 3)
+
+    def test_conditional_get(self):
+        response, _ = self.get_feed("room_ics", self.room.id)
+        with self.assertNumQueries(2):
+            not_modified, _ = self.get_feed("room_ics", self.room.id, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reservation.note = "Coffee"
+            self.reservation.save()
+        response, content = self.get_feed("room_ics", self.room.id, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("DESCRIPTION:Coffee\r\n", content)
+
+    def test_unknown_room(self):
+        response, _ = self.get_feed("room_ics", 0)
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,132 @@
+import json
+import tempfile
+from datetime import date, datetime, time
+from io import StringIO
+from pathlib import Path
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from reservation.models import (
+    RecurringReservation,
+    Reservation,
+    ReservationChange,
+    Room,
+    RoomOccupancy,
+    RoomUtilization,
+)
+from users.models import Team
+
+User = get_user_model()
+
+
+def at(hour, minute=0, day=7):
+    return timezone.make_aware(datetime(2030, 1, day, hour, minute))
+
+
+class ImportReservationsCommandTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command("create_groups_and_permissions")
+        self.team = Team.objects.create(name="Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.inactive_room = Room.objects.create(name="Closed", capacity=10, is_active=False)
+        self.user = User.objects.create_user(
+            username="user", password="password", email="user@a.com", phone="09123456789", team=self.team
+        )
+        Reservation.objects.create(room=self.room, team=self.team, start_date=at(9), end_date=at(10))
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def run_import(self, name, content, *args):
+        path = Path(self.directory.name) / name
+        path.write_text(content)
+        out, err = StringIO(), StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_reservations", str(path), *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_import(self):
+        rows = [
+            (self.room.id, self.team.id, self.user.id, at(10), at(11), "Tea"),
+            (self.room.id, self.team.id, "", at(11), at(12), ""),
+            (self.room.id, self.team.id, "", at(9, 15), at(9, 45), "Overlaps stored"),
+            (self.room.id, self.team.id, "", at(11, 30), at(13), "Overlaps line 3"),
+            (self.room.id, self.team.id, "", at(6), at(8), "Too early"),
+            (self.room.id, self.team.id, "", at(20), at(9, day=8), "Two days"),
+            (self.inactive_room.id, self.team.id, "", at(10), at(11), "Inactive"),
+            (self.room.id, 0, "", at(14), at(15), "No team"),
+            ("x", self.team.id, "", at(14), at(15), "Bad room"),
+            (self.room.id, self.team.id, "", "soon", at(15), "Bad date"),
+        ]
+        content = "room,team,reserver_user,start_date,end_date,note\n" + "".join(
+            ",".join(str(value) for value in row) + "\n" for row in rows
+        )
+        with self.assertNumQueries(16):
+            out, err = self.run_import("reservations.csv", content)
+        self.assertIn("2 reservations imported, 8 rows rejected.", out)
+        self.assertIn("Line 4 rejected: Overlaps an existing reservation.", err)
+        self.assertIn("Line 5 rejected: Overlaps the reservation on line 3.", err)
+        self.assertIn("Line 6 rejected: Reservations must be between 07:00 and 22:00.", err)
+        self.assertIn("Line 7 rejected: Start and end dates must be on the same day.", err)
+        self.assertIn(f"Line 8 rejected: Room {self.inactive_room.id} does not exist or is not active.", err)
+        self.assertIn("Line 9 rejected: Team 0 does not exist.", err)
+        self.assertIn("Line 10 rejected: Room, team and reserver user must be ids.", err)
+        self.assertIn("Line 11 rejected:", err)
+
+        imported = Reservation.objects.filter(start_date__gte=at(10)).order_by("start_date")
+        self.assertEqual(list(imported.values_list("reserver_user", "note")), [(self.user.id, "Tea"), (None, "")])
+        self.assertEqual(
+            set(
+                ReservationChange.objects.filter(action=ReservationChange.CREATED).values_list(
+                    "reservation_id", flat=True
+                )
+            ),
+            set(Reservation.objects.values_list("id", flat=True)),
+        )
+        self.assertEqual(
+            list(RoomUtilization.objects.filter(room=self.room).order_by("hour").values_list("hour", "minutes")),
+            [(9, 60), (10, 60), (11, 60)],
+        )
+        occupancy = RoomOccupancy.objects.get(room=self.room, date=date(2030, 1, 7))
+        self.assertEqual(f"{occupancy.slots:0180b}", "0" * 24 + "1" * 36 + "0" * 120)
+
+    def test_jsonl_dry_run(self):
+        content = (
+            json.dumps({"room": self.room.id, "team": self.team.id, "start_date": str(at(12)), "end_date": str(at(13))})
+            + "\n\nnot json\n"
+        )
+        out, err = self.run_import("reservations.jsonl", content, "--dry-run")
+        self.assertIn("1 reservations would be imported, 1 rows rejected.", out)
+        self.assertIn("Line 3 rejected: Not a JSON object.", err)
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(ReservationChange.objects.count(), 1)
+
+    def test_jsonl_dates_must_be_strings(self):
+        content = "\n".join(
+            json.dumps({"room": self.room.id, "team": self.team.id, "start_date": start, "end_date": end})
+            for start, end in [(str(at(12)), str(at(13))), (1893484800, str(at(15))), (str(at(16)), None)]
+        )
+        out, err = self.run_import("reservations.jsonl", content)
+        self.assertIn("1 reservations imported, 2 rows rejected.", out)
+        self.assertIn("Line 2 rejected: Enter a valid date/time.", err)
+        self.assertIn("Line 3 rejected: Start and end dates are required.", err)
+
+    def test_overlaps_series_past_horizon(self):
+        RecurringReservation.objects.create(
+            room=self.room,
+            team=self.team,
+            frequency=RecurringReservation.DAILY,
+            start_time=time(14),
+            end_time=time(15),
+            first_date=date(2030, 1, 1),
+        )
+        content = "\n".join(
+            json.dumps({"room": self.room.id, "team": self.team.id, "start_date": str(start), "end_date": str(end)})
+            for start, end in [(at(14, 30), at(15, 30)), (at(15, 30), at(16))]
+        )
+        out, err = self.run_import("reservations.jsonl", content)
+        self.assertIn("1 reservations imported, 1 rows rejected.", out)
+        self.assertIn("Line 1 rejected: Overlaps an occurrence of a recurring reservation.", err)
+        self.assertTrue(Reservation.objects.filter(start_date=at(15, 30)).exists())
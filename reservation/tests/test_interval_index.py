@@ -0,0 +1,184 @@
+import threading
+from datetime import datetime, timedelta
+from time import monotonic
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+from reservation.forms import ReservationForm
+from reservation.interval_index import DayIntervals, RoomIntervalIndex, reservation_index
+from reservation.models import Reservation, Room
+from users.models import Team
+
+User = get_user_model()
+
+
+def at(hour, minute=0):
+    return timezone.make_aware(datetime(2030, 1, 7, hour, minute))
+
+
+class DayIntervalsTest(TestCase):
+    def setUp(self):
+        self.intervals = DayIntervals([(1, at(9), at(10)), (2, at(13), at(15)), (3, at(11), at(12))])
+
+    def test_sorted_by_start(self):
+        self.assertEqual(self.intervals.ids, [1, 3, 2])
+        self.assertEqual(self.intervals.max_ends, [at(10), at(12), at(15)])
+
+    def test_overlaps(self):
+        self.assertTrue(self.intervals.overlaps(at(9, 30), at(10, 30)))
+        self.assertTrue(self.intervals.overlaps(at(8), at(9, 1)))
+        self.assertTrue(self.intervals.overlaps(at(13, 30), at(14)))
+
+    def test_containing_interval_overlaps(self):
+        self.assertTrue(self.intervals.overlaps(at(8), at(16)))
+        self.assertTrue(self.intervals.overlaps(at(10, 30), at(12, 30)))
+
+    def test_adjacent_intervals_do_not_overlap(self):
+        self.assertFalse(self.intervals.overlaps(at(10), at(11)))
+        self.assertFalse(self.intervals.overlaps(at(12), at(13)))
+        self.assertFalse(self.intervals.overlaps(at(7), at(9)))
+        self.assertFalse(self.intervals.overlaps(at(15), at(22)))
+
+    def test_exclude_id(self):
+        self.assertFalse(self.intervals.overlaps(at(13, 30), at(14), exclude_id=2))
+        self.assertTrue(self.intervals.overlaps(at(11, 30), at(14), exclude_id=2))
+
+    def test_add_and_discard(self):
+        self.intervals.add(4, at(16), at(17))
+        self.assertTrue(self.intervals.overlaps(at(16, 30), at(18)))
+        self.intervals.discard(2)
+        self.assertFalse(self.intervals.overlaps(at(13), at(15, 30)))
+        self.assertEqual(self.intervals.max_ends, [at(10), at(12), at(17)])
+
+
+class ConcurrentIndexTest(SimpleTestCase):
+    def test_commit_during_overlap_check(self):
+        index = RoomIntervalIndex(ttl=60)
+        intervals = [(number, at(7, number), at(8, number)) for number in range(1, 50)]
+        index._buckets[(1, at(0).date())] = (monotonic(), DayIntervals(intervals))
+        index.update(100, 1, at(7), at(21))
+        truncated, resume = threading.Event(), threading.Event()
+        writer = threading.Thread(target=index.discard, args=(100,))
+        get_bucket, refresh_max_ends = index._bucket, DayIntervals._refresh_max_ends
+
+        def paused_refresh_max_ends(bucket, position):
+            del bucket.max_ends[position:]
+            truncated.set()
+            resume.wait(5)
+            refresh_max_ends(bucket, position)
+
+        def bucket_then_commit(room_id, day):
+            # Another thread's commit starts changing the bucket once this check holds it.
+            bucket = get_bucket(room_id, day)
+            writer.start()
+            truncated.wait(5)
+            threading.Timer(0.1, resume.set).start()
+            return bucket
+
+        with (
+            mock.patch.object(DayIntervals, "_refresh_max_ends", paused_refresh_max_ends),
+            mock.patch.object(index, "_bucket", bucket_then_commit),
+        ):
+            self.assertFalse(index.overlaps(1, at(8, 55), at(22), exclude_id=100))
+            writer.join()
+
+
+class ReservationFormOverlapTest(TestCase):
+    def setUp(self):
+        call_command("create_groups_and_permissions")
+        self.team = Team.objects.create(name="Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.user = User.objects.create_user(username="admin", password="password", is_superuser=True)
+        start = timezone.now().replace(hour=10, minute=0, second=0, microsecond=0) + timedelta(days=2)
+        self.reservation = Reservation.objects.create(
+            team=self.team, room=self.room, start_date=start, end_date=start + timedelta(hours=1)
+        )
+
+    def get_form(self, start, end):
+        data = {
+            "room": self.room.id,
+            "team": self.team.id,
+            "reserver_user": self.user.id,
+            "start_date": start.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_date": end.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        return ReservationForm(data, user=self.user)
+
+    def test_containing_reservation_is_rejected(self):
+        start = self.reservation.start_date - timedelta(minutes=30)
+        form = self.get_form(start, start + timedelta(hours=2))
+        self.assertFalse(form.is_valid())
+        self.assertIn("Overlapping Reservation!", form.non_field_errors())
+
+    def test_adjacent_reservation_is_accepted(self):
+        form = self.get_form(self.reservation.end_date, self.reservation.end_date + timedelta(hours=1))
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_concurrent_overlap_is_reported_on_save(self):
+        start = self.reservation.end_date
+        form = self.get_form(start, start + timedelta(hours=1))
+        self.assertTrue(form.is_valid(), form.errors)
+        Reservation.objects.create(
+            team=self.team, room=self.room, start_date=start, end_date=start + timedelta(hours=1)
+        )
+        self.assertIsNone(form.save())
+        self.assertIn("Overlapping Reservation!", form.non_field_errors())
+
+
+class RoomIntervalIndexTest(TransactionTestCase):
+    def setUp(self):
+        reservation_index.clear()
+        self.team = Team.objects.create(name="Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+
+    def tearDown(self):
+        reservation_index.clear()
+
+    def test_cold_bucket_is_loaded_and_kept_current_by_signals(self):
+        index = reservation_index
+        reservation = Reservation.objects.create(team=self.team, room=self.room, start_date=at(9), end_date=at(10))
+        self.assertTrue(index.overlaps(self.room.id, at(9, 30), at(11)))
+        with self.assertNumQueries(0):
+            self.assertFalse(index.overlaps(self.room.id, at(10), at(11)))
+
+        other = Reservation.objects.create(team=self.team, room=self.room, start_date=at(10), end_date=at(11))
+        reservation.start_date, reservation.end_date = at(14), at(15)
+        reservation.save()
+        with self.assertNumQueries(0):
+            self.assertTrue(index.overlaps(self.room.id, at(10, 30), at(12)))
+            self.assertFalse(index.overlaps(self.room.id, at(9), at(10)))
+            self.assertTrue(index.overlaps(self.room.id, at(13), at(16)))
+
+        other.delete()
+        with self.assertNumQueries(0):
+            self.assertFalse(index.overlaps(self.room.id, at(10, 30), at(12)))
+
+    def test_string_dates_are_indexed(self):
+        self.assertFalse(reservation_index.overlaps(self.room.id, at(9), at(10)))
+        reservation = Reservation.objects.create(
+            team=self.team, room=self.room, start_date=at(9).isoformat(), end_date=at(10).isoformat()
+        )
+        with self.assertNumQueries(0):
+            self.assertTrue(reservation_index.overlaps(self.room.id, at(9, 30), at(11)))
+            self.assertFalse(reservation_index.overlaps(self.room.id, at(9), at(10), exclude_id=reservation.id))
+
+    def test_least_recently_used_buckets_are_evicted(self):
+        index = RoomIntervalIndex(size=2)
+        days = [at(9) + timedelta(days=offset) for offset in range(3)]
+        index.overlaps(self.room.id, days[0], days[0] + timedelta(hours=1))
+        index.overlaps(self.room.id, days[1], days[1] + timedelta(hours=1))
+        index.overlaps(self.room.id, days[0], days[0] + timedelta(hours=1))
+        index.overlaps(self.room.id, days[2], days[2] + timedelta(hours=1))
+        self.assertEqual(list(index._buckets), [(self.room.id, days[0].date()), (self.room.id, days[2].date())])
+        with self.assertNumQueries(1):
+            index.overlaps(self.room.id, days[1], days[1] + timedelta(hours=1))
+
+    def test_expired_bucket_is_reloaded(self):
+        index = RoomIntervalIndex(ttl=0)
+        self.assertFalse(index.overlaps(self.room.id, at(9), at(10)))
+        Reservation.objects.bulk_create(
+            [Reservation(team=self.team, room=self.room, start_date=at(9), end_date=at(10))]
+        )
+        self.assertTrue(index.overlaps(self.room.id, at(9), at(10)))
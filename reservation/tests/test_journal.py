@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from reservation.journal import compact_changes
+from reservation.models import Reservation, ReservationChange, Room
+from users.models import Team
+
+User = get_user_model()
+
+
+def number_changes_immediately():
+    # Test cases never commit, so journal entries are numbered after each statement instead of at the commit.
+    with connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS reservation_change_sequence IMMEDIATE")
+
+
+def at(hour):
+    return timezone.make_aware(datetime(2030, 1, 7, hour))
+
+
+class ReservationChangeJournalTest(TestCase):
+    def setUp(self):
+        number_changes_immediately()
+        call_command("create_groups_and_permissions")
+        self.team = Team.objects.create(name="Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.user = User.objects.create_user(
+            username="user", password="password", email="user@a.com", phone="09123456789", team=self.team
+        )
+        self.first = Reservation.objects.create(
+            room=self.room, team=self.team, reserver_user=self.user, start_date=at(9), end_date=at(10)
+        )
+        self.second = Reservation.objects.create(
+            room=self.room, team=self.team, reserver_user=self.user, start_date=at(11), end_date=at(12)
+        )
+        self.first.note = "Moved"
+        self.first.save()
+        self.second_id = self.second.id
+        self.second.delete()
+
+    def get_changes(self, **params):
+        return self.client.get(reverse("reservation:reservation_changes"), params)
+
+    def test_changes_are_recorded(self):
+        self.assertEqual(
+            list(ReservationChange.objects.order_by("id").values_list("reservation_id", "action")),
+            [
+                (self.first.id, ReservationChange.CREATED),
+                (self.second_id, ReservationChange.CREATED),
+                (self.first.id, ReservationChange.UPDATED),
+                (self.second_id, ReservationChange.DELETED),
+            ],
+        )
+
+    def test_latest_change_per_reservation(self):
+        with self.assertNumQueries(3):
+            data = self.get_changes(since=0).json()
+        self.assertEqual(
+            [(change["id"], change["action"]) for change in data["changes"]],
+            [(self.first.id, ReservationChange.UPDATED), (self.second_id, ReservationChange.DELETED)],
+        )
+        self.assertEqual(data["changes"][0]["event"]["extendedProps"]["note"], "Moved")
+        self.assertIsNone(data["changes"][1]["event"])
+        self.assertFalse(data["has_more"])
+        self.assertEqual(data["next"], ReservationChange.objects.latest("sequence").sequence)
+        self.assertEqual(self.get_changes(since=data["next"]).json()["changes"], [])
+
+    def test_paging(self):
+        data = self.get_changes(since=0, limit=2).json()
+        self.assertTrue(data["has_more"])
+        self.assertEqual([change["id"] for change in data["changes"]], [self.first.id, self.second_id])
+        self.assertEqual([change["action"] for change in data["changes"]], ["created", "deleted"])
+        data = self.get_changes(since=data["next"], limit=2).json()
+        self.assertFalse(data["has_more"])
+        self.assertEqual(len(data["changes"]), 2)
+
+    def test_compaction(self):
+        changes = self.get_changes(since=0).json()["changes"]
+        self.assertEqual(compact_changes(), 2)
+        self.assertEqual(self.get_changes(since=0).json()["changes"], changes)
+
+        ReservationChange.objects.update(created_at=timezone.now() - timedelta(days=31))
+        out = StringIO()
+        call_command("compact_reservation_changes", tombstone_days=30, stdout=out)
+        self.assertIn("1 reservation change journal entries compacted.", out.getvalue())
+        response = self.get_changes(since=0)
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.json()["next"], changes[0]["sequence"])
+        self.assertEqual(self.get_changes(since=changes[1]["sequence"]).status_code, 200)
+
+    def test_invalid_since(self):
+        self.assertEqual(self.get_changes(since=-1).status_code, 400)
@@ -1,10 +1,12 @@
-from datetime import date
+from datetime import date, datetime
 from django.core.management import call_command
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
-from reservation.models import Reservation, Room, Rating, Comment
+from reservation.models import SLOTS_PER_DAY, Reservation, Room, RoomOccupancy, Rating, Comment
 from users.models import Team
 
 
@@ -196,3 +198,68 @@ class RatingModelTestCase(TestCase):
         # Test invalid rating value (greater than 5)
         with self.assertRaises(ValidationError):
             Rating(value=6, user=self.user, room=self.room).full_clean()
+
+
+class ReservationOverlapConstraintTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name="Test Room", capacity=5, description="Test room")
+        self.team = Team.objects.create(name="Test Team")
+        Reservation.objects.create(
+            room=self.room, team=self.team, start_date="2024-01-01 10:00:00", end_date="2024-01-01 11:00:00"
+        )
+
+    def test_overlapping_reservation_is_rejected(self):
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Reservation.objects.create(
+                    room=self.room, team=self.team, start_date="2024-01-01 09:00:00", end_date="2024-01-01 12:00:00"
+                )
+
+    def test_adjacent_and_other_room_reservations_are_allowed(self):
+        other_room = Room.objects.create(name="Other Room", capacity=5, description="Other room")
+        Reservation.objects.create(
+            room=self.room, team=self.team, start_date="2024-01-01 11:00:00", end_date="2024-01-01 12:00:00"
+        )
+        Reservation.objects.create(
+            room=other_room, team=self.team, start_date="2024-01-01 10:00:00", end_date="2024-01-01 11:00:00"
+        )
+        self.assertEqual(Reservation.objects.count(), 3)
+
+
+class RoomOccupancyTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name="Test Room", capacity=5, description="Test room")
+        self.team = Team.objects.create(name="Test Team")
+        self.day = date(2030, 1, 7)
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime(2030, 1, 7, hour, minute))
+
+    def slots(self):
+        return RoomOccupancy.objects.get(room=self.room, date=self.day).slots
+
+    def test_bitmap_follows_reservations(self):
+        reservation = Reservation.objects.create(
+            room=self.room, team=self.team, start_date=self.at(7), end_date=self.at(7, 10)
+        )
+        self.assertEqual(self.slots(), 0b11 << (SLOTS_PER_DAY - 2))
+
+        Reservation.objects.create(room=self.room, team=self.team, start_date=self.at(21, 52), end_date=self.at(22))
+        self.assertEqual(self.slots(), 0b11 << (SLOTS_PER_DAY - 2) | 0b11)
+
+        reservation.start_date, reservation.end_date = self.at(8), self.at(8, 5)
+        reservation.save()
+        self.assertEqual(self.slots(), 1 << (SLOTS_PER_DAY - 13) | 0b11)
+
+        Reservation.objects.all().delete()
+        self.assertFalse(RoomOccupancy.objects.exists())
+
+    def test_moving_reservation_to_another_room(self):
+        other_room = Room.objects.create(name="Other Room", capacity=5, description="Other room")
+        reservation = Reservation.objects.create(
+            room=self.room, team=self.team, start_date=self.at(9), end_date=self.at(10)
+        )
+        reservation.room = other_room
+        reservation.save()
+        self.assertFalse(RoomOccupancy.objects.filter(room=self.room).exists())
+        self.assertTrue(RoomOccupancy.objects.filter(room=other_room, date=self.day).exists())
@@ -0,0 +1,89 @@
+from datetime import date, datetime
+from io import StringIO
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+from reservation.models import OVERLAPPING_RESERVATIONS_CONSTRAINT, Reservation, Room
+from reservation.partitions import ARCHIVE_SCHEMA, archive_partitions, get_partition_months
+from users.models import Team
+
+
+def at(hour, day=7, month=1):
+    return timezone.make_aware(datetime(2020, month, day, hour))
+
+
+def count_rows(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+class ReservationPartitionTest(TestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name="Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.january = Reservation.objects.create(room=self.room, team=self.team, start_date=at(9), end_date=at(10))
+        self.february = Reservation.objects.create(
+            room=self.room, team=self.team, start_date=at(9, month=2), end_date=at(10, month=2)
+        )
+
+    def test_partitions_are_created(self):
+        out = StringIO()
+        call_command("partition_reservations", ahead=1, stdout=out)
+        current = timezone.localdate().replace(day=1)
+        self.assertIn(f"Created the reservation partition of {current:%Y-%m}.", out.getvalue())
+        self.assertIn("Created the reservation partition of 2020-01.", out.getvalue())
+        self.assertIn(date(2020, 2, 1), get_partition_months())
+        self.assertEqual(count_rows("reservation_reservation_2020_01"), 1)
+        self.assertEqual(count_rows("reservation_reservation_default"), 0)
+
+        out = StringIO()
+        call_command("partition_reservations", ahead=1, stdout=out)
+        self.assertEqual(out.getvalue(), "")
+        self.assertEqual(Reservation.objects.get(end_date__lt=at(0, day=1, month=2)), self.january)
+
+    def test_overlaps_are_rejected_in_partitions(self):
+        call_command("partition_reservations", ahead=0, stdout=StringIO())
+        with self.assertRaisesMessage(IntegrityError, OVERLAPPING_RESERVATIONS_CONSTRAINT):
+            with transaction.atomic():
+                Reservation.objects.create(room=self.room, team=self.team, start_date=at(9), end_date=at(11))
+        self.january.end_date = at(9, day=8)
+        self.january.start_date = at(8, day=8)
+        self.january.save()
+        self.assertEqual(count_rows("reservation_reservation_2020_01"), 1)
+
+    def test_reservations_stay_within_one_month(self):
+        call_command("partition_reservations", ahead=0, stdout=StringIO())
+        with self.assertRaisesMessage(IntegrityError, "reservation_within_month"):
+            with transaction.atomic():
+                Reservation.objects.create(
+                    room=self.room, team=self.team, start_date=at(23, day=31), end_date=at(1, day=1, month=2)
+                )
+        reservation = Reservation(room=self.room, team=self.team, start_date=at(23, day=31), end_date=at(9, month=2))
+        with self.assertRaisesMessage(ValidationError, "Start and end dates must be in the same month."):
+            reservation.validate_constraints()
+
+    def test_overlaps_are_validated(self):
+        reservation = Reservation(room=self.room, team=self.team, start_date=at(9, month=2), end_date=at(11, month=2))
+        with self.assertRaisesMessage(ValidationError, "Overlapping Reservation!"):
+            reservation.validate_constraints()
+        reservation.room = Room.objects.create(name="Other", capacity=10)
+        reservation.validate_constraints()
+
+    def test_archive(self):
+        call_command("partition_reservations", ahead=0, stdout=StringIO())
+        self.assertEqual(archive_partitions(date(2020, 2, 1)), ["reservation_reservation_2020_01"])
+        self.assertEqual(list(Reservation.objects.all()), [self.february])
+        self.assertEqual(count_rows(f"{ARCHIVE_SCHEMA}.reservation_reservation_2020_01"), 1)
+        self.room.delete()
+        connection.check_constraints()
+        self.assertEqual(count_rows(f"{ARCHIVE_SCHEMA}.reservation_reservation_2020_01"), 1)
+
+    def test_archive_command_drop(self):
+        out = StringIO()
+        call_command("partition_reservations", ahead=0, archive_after=0, drop=True, stdout=out)
+        current = timezone.localdate().replace(day=1)
+        self.assertIn(f"2 reservation partitions before {current:%Y-%m} dropped.", out.getvalue())
+        self.assertEqual(Reservation.objects.count(), 0)
@@ -0,0 +1,118 @@
+import threading
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from reservation.models import Rating, Room
+from reservation.ratings import rate_room
+
+User = get_user_model()
+
+
+class RoomRatingAggregatesTest(TestCase):
+    def setUp(self):
+        call_command("create_groups_and_permissions")
+        self.room = Room.objects.create(name="Room", capacity=10, description="Room")
+        self.other_room = Room.objects.create(name="Other Room", capacity=4, description="Room")
+        self.user = User.objects.create_user(username="user", password="password", email="u@a.com", phone="09123456780")
+        self.other_user = User.objects.create_user(
+            username="other", password="password", email="o@a.com", phone="09123456781"
+        )
+
+    def aggregates(self, room):
+        room.refresh_from_db()
+        return room.rating_count, room.rating_sum
+
+    def rate(self, value):
+        self.client.login(username="user", password="password")
+        self.client.post(reverse("reservation:submit_rating", kwargs={"room_id": self.room.id}), {"value": value})
+
+    def test_rating_and_rerating(self):
+        self.rate(4)
+        Rating.objects.create(user=self.other_user, room=self.room, value=1)
+        self.assertEqual(self.aggregates(self.room), (2, 5))
+        self.rate(2)
+        self.assertEqual(self.aggregates(self.room), (2, 3))
+        self.assertEqual(self.room.avg_rating, 1.5)
+
+        rating = Rating.objects.get(user=self.other_user)
+        rating.room = self.other_room
+        rating.save()
+        self.assertEqual(self.aggregates(self.room), (1, 2))
+        self.assertEqual(self.aggregates(self.other_room), (1, 1))
+        self.user.delete()
+        self.assertEqual(self.aggregates(self.room), (0, 0))
+        self.assertEqual(self.room.avg_rating, 0)
+
+    def test_room_save_keeps_aggregates(self):
+        room = Room.objects.get(pk=self.room.pk)
+        self.rate(5)
+        room.name = "Renamed"
+        room.save()
+        self.assertEqual(self.aggregates(self.room), (1, 5))
+        self.assertEqual(self.room.name, "Renamed")
+
+    def test_detail_view_does_not_aggregate(self):
+        self.rate(3)
+        room = Room.objects.get(pk=self.room.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(room.avg_rating, 3)
+        response = self.client.get(reverse("reservation:room_detail", kwargs={"pk": self.room.pk}))
+        self.assertEqual(response.context["rate"], 3)
+
+    def test_reconcile_command(self):
+        Rating.objects.create(user=self.user, room=self.room, value=4)
+        Room.objects.filter(pk=self.room.pk).update(rating_count=7, rating_sum=1)
+        Rating.objects.bulk_create([Rating(user=self.other_user, room=self.other_room, value=2)])
+        out = StringIO()
+        call_command("reconcile_room_ratings", stdout=out)
+        self.assertIn("2 room rating aggregates repaired.", out.getvalue())
+        self.assertEqual(self.aggregates(self.room), (1, 4))
+        self.assertEqual(self.aggregates(self.other_room), (1, 2))
+
+    def test_json_response(self):
+        self.client.login(username="user", password="password")
+        url = reverse("reservation:submit_rating", kwargs={"room_id": self.room.id})
+        Rating.objects.create(user=self.other_user, room=self.room, value=2)
+        response = self.client.post(url, {"value": 5}, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.json(), {"value": 5, "rating_count": 2, "avg_rating": 3.5})
+        response = self.client.post(url, {"value": 3}, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.json(), {"value": 3, "rating_count": 2, "avg_rating": 2.5})
+        self.assertEqual(Rating.objects.get(user=self.user).value, 3)
+
+        response = self.client.post(url, {"value": 6}, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("value", response.json()["errors"])
+        url = reverse("reservation:submit_rating", kwargs={"room_id": 0})
+        self.assertEqual(self.client.post(url, {"value": 3}).status_code, 404)
+
+
+class ConcurrentRatingTest(TransactionTestCase):
+    def setUp(self):
+        call_command("create_groups_and_permissions")
+        self.room = Room.objects.create(name="Room", capacity=10, description="Room")
+        self.user = User.objects.create_user(username="user", password="password", email="u@a.com", phone="09123456780")
+
+    def test_concurrent_submits(self):
+        errors, barrier = [], threading.Barrier(4)
+
+        def submit(value):
+            try:
+                barrier.wait(5)
+                rate_room(Rating(user=self.user, room=self.room, value=value))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(value,)) for value in (1, 2, 3, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        rating = Rating.objects.get(user=self.user, room=self.room)
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.rating_count, self.room.rating_sum), (1, rating.value))
@@ -0,0 +1,239 @@
+from datetime import datetime, time, timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from mailer.models import QueuedEmail
+from reservation.availability import find_free_rooms
+from reservation.booking import book_reservation
+from reservation.forms import RecurringReservationForm
+from reservation.models import RecurringReservation, Reservation, Room, RoomOccupancy, RoomUtilization
+from reservation.recurrence import expand_series, find_series_conflicts, materialize_series
+from users.models import Team
+
+User = get_user_model()
+
+
+def next_monday(weeks=1):
+    today = timezone.localdate()
+    return today - timedelta(days=today.weekday()) + timedelta(weeks=weeks)
+
+
+def at(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+class RecurringReservationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command("create_groups_and_permissions")
+        self.team = Team.objects.create(name="Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.user = User.objects.create_user(
+            username="user", password="password", email="user@a.com", phone="09123456789", team=self.team
+        )
+        self.monday = next_monday()
+        self.series = RecurringReservation.objects.create(
+            room=self.room,
+            reserver_user=self.user,
+            team=self.team,
+            weekdays=[0, 2],
+            start_time=time(9),
+            end_time=time(9, 30),
+            first_date=self.monday,
+        )
+
+    def test_occurrences(self):
+        days = [day for day, _, _ in self.series.occurrences(self.monday, self.monday + timedelta(days=13))]
+        self.assertEqual(days, [self.monday + timedelta(days=offset) for offset in (0, 2, 7, 9)])
+        _, start, end = self.series.occurrences(self.monday, self.monday)[0]
+        self.assertEqual((start, end), (at(self.monday, 9), at(self.monday, 9, 30)))
+
+    def test_occurrences_interval_until_and_exdates(self):
+        self.series.frequency = RecurringReservation.DAILY
+        self.series.interval = 3
+        self.series.until = self.monday + timedelta(days=9)
+        self.series.exdates = [self.monday + timedelta(days=3)]
+        days = [day for day, _, _ in self.series.occurrences(self.monday, self.monday + timedelta(days=30))]
+        self.assertEqual(days, [self.monday, self.monday + timedelta(days=6), self.monday + timedelta(days=9)])
+
+    def test_weekly_defaults_to_first_date_weekday(self):
+        self.series.weekdays = []
+        self.series.interval = 2
+        days = [day for day, _, _ in self.series.occurrences(self.monday, self.monday + timedelta(days=27))]
+        self.assertEqual(days, [self.monday, self.monday + timedelta(days=14)])
+
+    def test_materialize_is_idempotent(self):
+        horizon_end = self.monday + timedelta(days=13)
+        created, skipped = materialize_series(self.series, horizon_end)
+        self.assertEqual((created, skipped), (4, []))
+        self.series.materialized_until = None
+        self.assertEqual(materialize_series(self.series, horizon_end)[0], 0)
+        self.assertEqual(self.series.reservations.count(), 4)
+        self.assertEqual(RecurringReservation.objects.get(pk=self.series.pk).materialized_until, horizon_end)
+        self.assertEqual(RoomOccupancy.objects.filter(room=self.room).count(), 4)
+        self.assertEqual(set(RoomUtilization.objects.filter(room=self.room).values_list("hour", "minutes")), {(9, 30)})
+        self.assertEqual(RoomUtilization.objects.filter(room=self.room).count(), 4)
+
+    def test_materialize_skips_conflicts(self):
+        Reservation.objects.create(
+            room=self.room,
+            team=self.team,
+            reserver_user=self.user,
+            start_date=at(self.monday, 9, 15),
+            end_date=at(self.monday, 10),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            created, skipped = materialize_series(self.series, self.monday + timedelta(days=6))
+        self.assertEqual((created, skipped), (1, [self.monday]))
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.exdates, [self.monday])
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.to, ["user@a.com"])
+        self.assertIn(str(self.monday), email.body)
+
+    def test_lazy_occurrences_block_bookings(self):
+        day = self.monday + timedelta(weeks=10)
+        other_room = Room.objects.create(name="Other Room", capacity=4)
+
+        def book(room, start, end):
+            return book_reservation(
+                Reservation(room=room, team=self.team, reserver_user=self.user, start_date=start, end_date=end)
+            )
+
+        self.assertFalse(book(self.room, at(day, 9, 15), at(day, 10)))
+        self.assertTrue(book(other_room, at(day, 9, 15), at(day, 10)))
+        self.assertTrue(book(self.room, at(day, 9, 30), at(day, 10)))
+
+    def test_lazy_occurrences_conflict_with_other_series(self):
+        other = RecurringReservation(
+            room=self.room,
+            reserver_user=self.user,
+            team=self.team,
+            weekdays=[0],
+            start_time=time(9, 15),
+            end_time=time(10),
+            first_date=self.monday + timedelta(weeks=8),
+            until=self.monday + timedelta(weeks=9),
+        )
+        self.assertEqual(
+            find_series_conflicts(other), [self.monday + timedelta(weeks=8), self.monday + timedelta(weeks=9)]
+        )
+
+    def test_free_rooms_skip_lazy_occurrences(self):
+        day = self.monday + timedelta(weeks=3)
+        self.assertEqual(find_free_rooms(1, 30, at(day, 9), at(day, 9, 30)), [])
+        self.assertEqual(find_free_rooms(1, 30, at(day, 9), at(day, 10))[0]["start"], at(day, 9, 30))
+
+    def test_find_series_conflicts(self):
+        self.assertEqual(find_series_conflicts(self.series), [])
+        wednesday = self.monday + timedelta(weeks=3, days=2)
+        Reservation.objects.create(
+            room=self.room,
+            team=self.team,
+            reserver_user=self.user,
+            start_date=at(wednesday, 8),
+            end_date=at(wednesday, 9, 1),
+        )
+        Reservation.objects.create(
+            room=self.room,
+            team=self.team,
+            reserver_user=self.user,
+            start_date=at(self.monday, 9, 30),
+            end_date=at(self.monday, 10),
+        )
+        self.assertEqual(find_series_conflicts(self.series), [wednesday])
+
+    def test_deleting_occurrence_adds_exdate(self):
+        materialize_series(self.series, self.monday + timedelta(days=6))
+        self.series.reservations.get(start_date=at(self.monday, 9)).delete()
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.exdates, [self.monday])
+        self.series.materialized_until = None
+        self.assertEqual(materialize_series(self.series, self.monday + timedelta(days=6)), (0, []))
+
+    def test_expand_series_skips_materialized_days(self):
+        materialize_series(self.series, self.monday + timedelta(days=6))
+        days = [day for _, day, _, _ in expand_series(self.monday, self.monday + timedelta(days=9))]
+        self.assertEqual(days, [self.monday + timedelta(days=7), self.monday + timedelta(days=9)])
+
+    def test_reservation_json_includes_lazy_occurrences(self):
+        day = self.monday + timedelta(weeks=10)
+        response = self.client.get(reverse("reservation:reservation_json"), {"date": str(day)})
+        self.assertEqual(
+            response.json()["events"],
+            [
+                {
+                    "id": f"series-{self.series.id}-{day}",
+                    "title": "Team",
+                    "room": "Room",
+                    "start": at(day, 9).isoformat(),
+                    "end": at(day, 9, 30).isoformat(),
+                    "resourceId": self.room.id,
+                    "extendedProps": {"note": None, "reserver": "user", "series": self.series.id},
+                    "backgroundColor": "green",
+                    "borderColor": "green",
+                }
+            ],
+        )
+
+    def test_materialize_command(self):
+        out = StringIO()
+        call_command("materialize_recurring_reservations", stdout=out)
+        horizon_end = timezone.localdate() + timedelta(weeks=4)
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.materialized_until, horizon_end)
+        self.assertEqual(
+            self.series.reservations.count(), len(self.series.occurrences(timezone.localdate(), horizon_end))
+        )
+        self.assertIn("reservations materialized", out.getvalue())
+
+
+class RecurringReservationFormTest(TestCase):
+    def setUp(self):
+        call_command("create_groups_and_permissions")
+        self.team = Team.objects.create(name="Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.user = User.objects.create_user(
+            username="user", password="password", email="user@a.com", phone="09123456789", team=self.team
+        )
+        self.monday = next_monday()
+        self.data = {
+            "room": self.room.id,
+            "team": self.team.id,
+            "frequency": RecurringReservation.WEEKLY,
+            "interval": 1,
+            "weekdays": ["0"],
+            "first_date": self.monday,
+            "until": self.monday + timedelta(weeks=2),
+            "start_time": "09:00",
+            "end_time": "10:00",
+        }
+
+    def test_save_materializes_series(self):
+        form = RecurringReservationForm(self.data, user=self.user)
+        self.assertTrue(form.is_valid(), form.errors)
+        series = form.save()
+        self.assertEqual(series.team, self.team)
+        self.assertEqual(series.reserver_user, self.user)
+        self.assertEqual(series.reservations.count(), 3)
+
+    def test_conflicting_series_is_invalid(self):
+        Reservation.objects.create(
+            room=self.room,
+            team=self.team,
+            reserver_user=self.user,
+            start_date=at(self.monday + timedelta(weeks=1), 9, 30),
+            end_date=at(self.monday + timedelta(weeks=1), 11),
+        )
+        form = RecurringReservationForm(self.data, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn(str(self.monday + timedelta(weeks=1)), form.non_field_errors()[0])
+
+    def test_times_outside_business_hours_are_invalid(self):
+        form = RecurringReservationForm({**self.data, "start_time": "06:00"}, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn("start_time", form.errors)
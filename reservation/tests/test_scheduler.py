@@ -0,0 +1,144 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+from mailer.models import QueuedEmail
+from reservation.models import Reservation, Room
+from reservation.scheduler import SCHEDULER_LOCK_ID, ReminderHeap, ReminderScheduler
+from reservation.tests.test_journal import number_changes_immediately
+from users.models import Team
+
+User = get_user_model()
+
+
+class ReminderHeapTest(SimpleTestCase):
+    def test_pops_due_reservations_in_order(self):
+        now = timezone.now()
+        heap = ReminderHeap()
+        heap.schedule(1, now + timedelta(minutes=5))
+        heap.schedule(2, now - timedelta(minutes=5))
+        heap.schedule(3, now)
+        self.assertEqual(heap.next_due(), now - timedelta(minutes=5))
+        self.assertEqual(heap.pop_due(now), [2, 3])
+        self.assertEqual(len(heap), 1)
+        self.assertEqual(heap.next_due(), now + timedelta(minutes=5))
+
+    def test_rescheduled_and_discarded_entries_are_skipped(self):
+        now = timezone.now()
+        heap = ReminderHeap()
+        heap.schedule(1, now - timedelta(minutes=5))
+        heap.schedule(2, now - timedelta(minutes=1))
+        heap.schedule(1, now + timedelta(minutes=5))
+        heap.discard(2)
+        self.assertEqual(heap.pop_due(now), [])
+        self.assertEqual(heap.pop_due(now + timedelta(minutes=5)), [1])
+        self.assertIsNone(heap.next_due())
+
+
+class ReminderSchedulerTest(TestCase):
+    def setUp(self):
+        number_changes_immediately()
+        call_command("create_groups_and_permissions")
+        self.room = Room.objects.create(name="Room1", capacity=10)
+        self.other_room = Room.objects.create(name="Room2", capacity=10)
+        self.team = Team.objects.create(name="Team")
+        self.user = User.objects.create_user(
+            username="user1", password="password", email="user1@example.com", phone="1", team=self.team
+        )
+        self.soon = self.reserve(hours=1)
+        self.later = self.reserve(hours=5, room=self.other_room)
+        self.scheduler = ReminderScheduler()
+        self.addCleanup(self.scheduler.resign)
+
+    def reserve(self, hours: float, room: Room | None = None) -> Reservation:
+        start_date = timezone.now() + timedelta(hours=hours)
+        return Reservation.objects.create(
+            room=room or self.room,
+            reserver_user=self.user,
+            team=self.team,
+            start_date=start_date,
+            end_date=start_date + timedelta(hours=1),
+        )
+
+    def run_due(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.scheduler.run_due(timezone.now())
+
+    def test_sends_reminders_as_they_become_due(self):
+        self.assertTrue(self.scheduler.try_lead())
+        self.assertEqual(len(self.scheduler.heap), 2)
+        self.assertEqual(self.run_due(), (1, 0))
+        self.assertIsNone(self.run_due())
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+
+        self.later.start_date = timezone.now() + timedelta(minutes=90)
+        self.later.end_date = self.later.start_date + timedelta(hours=1)
+        self.later.save()
+        self.assertIsNone(self.run_due())
+        self.scheduler.refresh()
+        self.assertEqual(self.run_due(), (1, 0))
+        self.assertEqual(QueuedEmail.objects.count(), 2)
+
+    def test_follows_new_and_deleted_reservations(self):
+        self.scheduler.try_lead()
+        added = self.reserve(hours=3)
+        self.later.delete()
+        self.scheduler.refresh()
+        self.assertEqual(set(self.scheduler.heap.due_at), {self.soon.pk, added.pk})
+
+    def test_only_one_scheduler_leads(self):
+        results = []
+
+        def other_scheduler():
+            # A connection of its own, closing it gives the lock up.
+            try:
+                results.append(ReminderScheduler().try_lead())
+            finally:
+                connection.close()
+
+        self.assertTrue(self.scheduler.try_lead())
+        for _ in range(2):
+            thread = threading.Thread(target=other_scheduler)
+            thread.start()
+            thread.join()
+            self.scheduler.resign()
+        self.assertEqual(results, [False, True])
+
+
+class RunSchedulerCommandTest(TransactionTestCase):
+    def test_recovers_from_errors(self):
+        failures = [OperationalError("server closed the connection unexpectedly")] * 2
+        refresh = ReminderScheduler.refresh
+        sleeps = []
+
+        def failing_refresh(scheduler):
+            if failures:
+                raise failures.pop()
+            refresh(scheduler)
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 3:
+                raise KeyboardInterrupt
+
+        out, err = StringIO(), StringIO()
+        with (
+            mock.patch.object(ReminderScheduler, "refresh", failing_refresh),
+            mock.patch("reservation.management.commands.run_scheduler.time.sleep", sleep),
+        ):
+            call_command("run_scheduler", interval=5, stdout=out, stderr=err)
+        # Each failure closed the connection, the lock with it, and the next round led again.
+        self.assertEqual(out.getvalue(), "Leading, 0 reminders scheduled.\n" * 3)
+        self.assertEqual(err.getvalue().count("server closed the connection unexpectedly"), 2)
+        self.assertEqual(sleeps, [1, 2, 5])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM pg_locks WHERE locktype = 'advisory' AND objid = %s", [SCHEDULER_LOCK_ID]
+            )
+            self.assertEqual(cursor.fetchone()[0], 0)
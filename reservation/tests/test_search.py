@@ -0,0 +1,93 @@
+import threading
+import time
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from reservation.models import Comment, Room
+from reservation.search import search_rooms
+
+User = get_user_model()
+
+
+class RoomSearchTest(TestCase):
+    def setUp(self):
+        call_command("create_groups_and_permissions")
+        self.user = User.objects.create_superuser(
+            username="admin", password="password", email="admin@a.com", phone="09123456789"
+        )
+        self.projector_room = Room.objects.create(name="Projector Room", capacity=10, description="Large screen")
+        self.quiet_room = Room.objects.create(name="Library", capacity=4, description="A quiet place to focus")
+        self.comment = Comment.objects.create(
+            room=self.quiet_room, user=self.user, content="The projectors here are brand new"
+        )
+
+    def found(self, text):
+        return list(search_rooms(text).values_list("id", flat=True))
+
+    def test_ranking(self):
+        self.assertEqual(self.found("projector"), [self.projector_room.id, self.quiet_room.id])
+        self.assertEqual(self.found("quiet focus"), [self.quiet_room.id])
+        self.assertEqual(self.found("projector -screen"), [self.quiet_room.id])
+        self.assertEqual(self.found("whiteboard"), [])
+
+    def test_vectors_are_kept_current(self):
+        self.comment.room = self.projector_room
+        self.comment.content = "Brand new whiteboard"
+        self.comment.save()
+        self.assertEqual(self.found("whiteboard"), [self.projector_room.id])
+        self.assertEqual(self.found("projector"), [self.projector_room.id])
+
+        self.comment.delete()
+        self.assertEqual(self.found("whiteboard"), [])
+        self.quiet_room.description = "Whiteboards on every wall"
+        self.quiet_room.save()
+        self.assertEqual(self.found("whiteboard"), [self.quiet_room.id])
+
+    def test_rebuild_command(self):
+        Room.objects.update(search_vector=None)
+        out = StringIO()
+        call_command("rebuild_room_search", stdout=out)
+        self.assertIn("2 room search vectors rebuilt.", out.getvalue())
+        self.assertEqual(self.found("brand"), [self.quiet_room.id])
+
+    def test_search_view(self):
+        Room.objects.create(name="Old Projector Room", capacity=10, description="Closed", is_active=False)
+        response = self.client.get(reverse("reservation:room_text_search"), {"q": "projector", "limit": 1})
+        rooms = response.json()["rooms"]
+        self.assertEqual([room["id"] for room in rooms], [self.projector_room.id])
+        self.assertEqual(set(rooms[0]), {"id", "name", "capacity", "rank"})
+        self.assertEqual(self.client.get(reverse("reservation:room_text_search")).status_code, 400)
+
+    def test_admin_search(self):
+        self.client.login(username="admin", password="password")
+        response = self.client.get("/admin/reservation/room/", {"q": "focus"})
+        self.assertContains(response, "Library")
+        self.assertNotContains(response, "Projector Room")
+
+
+class ConcurrentSearchVectorTest(TransactionTestCase):
+    def test_concurrent_comments_are_both_indexed(self):
+        call_command("create_groups_and_permissions")
+        user = User.objects.create_user(username="user", password="password", email="user@a.com", phone="09123456789")
+        room = Room.objects.create(name="Library", capacity=4)
+        commented = threading.Event()
+
+        def comment_and_wait():
+            try:
+                with transaction.atomic():
+                    Comment.objects.create(room=room, user=user, content="zebra")
+                    commented.set()
+                    time.sleep(0.3)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=comment_and_wait)
+        thread.start()
+        commented.wait(5)
+        # Waits for the other transaction, which holds the room.
+        Comment.objects.create(room=room, user=user, content="walrus")
+        thread.join()
+        self.assertEqual(list(search_rooms("zebra walrus").values_list("id", flat=True)), [room.id])
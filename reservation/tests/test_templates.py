@@ -175,6 +175,7 @@ class IndexTemplateTestCase(TestCase):
         self.team1 = Team.objects.create(name="Team One")
         self.team2 = Team.objects.create(name="Team Two")
         self.room = Room.objects.create(name="Room", capacity=10)
+        self.room2 = Room.objects.create(name="Room2", capacity=10)
         self.reservation1 = Reservation.objects.create(
             team=self.team1,
             room=self.room,
@@ -183,7 +184,7 @@ class IndexTemplateTestCase(TestCase):
         )
         self.reservation2 = Reservation.objects.create(
             team=self.team2,
-            room=self.room,
+            room=self.room2,
             start_date=datetime.now(),
             end_date=datetime.now() + timedelta(days=1),
         )
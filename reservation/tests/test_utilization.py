@@ -0,0 +1,134 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from reservation.models import Reservation, Room, RoomUtilization
+from reservation.utilization import hourly_minutes
+from users.models import Team
+
+User = get_user_model()
+
+
+def at(hour, minute=0, day=7):
+    return timezone.make_aware(datetime(2030, 1, day, hour, minute))
+
+
+class RoomUtilizationTest(TestCase):
+    def setUp(self):
+        call_command("create_groups_and_permissions")
+        self.team = Team.objects.create(name="Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.other_room = Room.objects.create(name="Other Room", capacity=4)
+        self.reservation = Reservation.objects.create(
+            room=self.room, team=self.team, start_date=at(9, 30), end_date=at(11, 15)
+        )
+
+    def rollup(self):
+        return set(RoomUtilization.objects.values_list("room_id", "date", "hour", "minutes"))
+
+    def test_hourly_minutes(self):
+        self.assertEqual(
+            hourly_minutes(at(9, 30), at(11, 15)),
+            {(date(2030, 1, 7), 9): 30, (date(2030, 1, 7), 10): 60, (date(2030, 1, 7), 11): 15},
+        )
+        # Seconds add up across segments and are rounded once per hour.
+        self.assertEqual(
+            hourly_minutes(at(9, 59) + timedelta(seconds=20), at(10, 1) + timedelta(seconds=10)),
+            {(date(2030, 1, 7), 9): 1, (date(2030, 1, 7), 10): 1},
+        )
+        with timezone.override("Asia/Tehran"):
+            self.assertEqual(
+                hourly_minutes(
+                    datetime(2030, 1, 7, 6, tzinfo=dt_timezone.utc), datetime(2030, 1, 7, 7, tzinfo=dt_timezone.utc)
+                ),
+                {(date(2030, 1, 7), 9): 30, (date(2030, 1, 7), 10): 30},
+            )
+
+    def test_rollup_is_maintained(self):
+        day = date(2030, 1, 7)
+        self.assertEqual(
+            self.rollup(), {(self.room.id, day, 9, 30), (self.room.id, day, 10, 60), (self.room.id, day, 11, 15)}
+        )
+        Reservation.objects.create(room=self.room, team=self.team, start_date=at(11, 15), end_date=at(11, 45))
+        self.assertIn((self.room.id, day, 11, 45), self.rollup())
+
+        self.reservation.room = self.other_room
+        self.reservation.start_date = at(10)
+        self.reservation.save()
+        self.assertEqual(
+            self.rollup(),
+            {(self.room.id, day, 11, 30), (self.other_room.id, day, 10, 60), (self.other_room.id, day, 11, 15)},
+        )
+        self.reservation.delete()
+        self.assertEqual(self.rollup(), {(self.room.id, day, 11, 30)})
+
+    def test_seconds_are_removed_with_their_reservation(self):
+        reservation = Reservation.objects.create(
+            room=self.other_room,
+            team=self.team,
+            start_date=at(12, 10) + timedelta(seconds=50),
+            end_date=at(13, 20) + timedelta(seconds=40),
+        )
+        self.assertIn((self.other_room.id, date(2030, 1, 7), 13, 21), self.rollup())
+        reservation.delete()
+        self.assertFalse(RoomUtilization.objects.filter(room=self.other_room).exists())
+
+    def test_rebuild_command(self):
+        expected = self.rollup()
+        RoomUtilization.objects.all().delete()
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command("rebuild_room_utilization", stdout=out)
+        self.assertIn("3 room utilization rows rebuilt.", out.getvalue())
+        statements = [query["sql"] for query in queries]
+        lock = next(position for position, sql in enumerate(statements) if sql.startswith("LOCK TABLE"))
+        reads = [position for position, sql in enumerate(statements) if 'FROM "reservation_reservation"' in sql]
+        self.assertTrue(reads and min(reads) > lock)
+        self.assertEqual(self.rollup(), expected)
+
+
+class RoomUtilizationJsonTest(TestCase):
+    def setUp(self):
+        call_command("create_groups_and_permissions")
+        self.team = Team.objects.create(name="Team")
+        self.room = Room.objects.create(name="Room", capacity=10)
+        self.other_room = Room.objects.create(name="Other Room", capacity=4)
+        Reservation.objects.create(room=self.room, team=self.team, start_date=at(9, 30), end_date=at(11, 15))
+        self.admin = User.objects.create_superuser(
+            username="admin", password="password", email="admin@a.com", phone="09123456789"
+        )
+        self.user = User.objects.create_user(
+            username="user", password="password", email="user@a.com", phone="09123456780", team=self.team
+        )
+
+    def get_report(self, **params):
+        return self.client.get(reverse("reservation:room_utilization"), params)
+
+    def test_report(self):
+        self.client.login(username="admin", password="password")
+        data = self.get_report(start="2030-01-06", end="2030-01-08").json()
+        self.assertEqual(data["hours"], list(range(7, 22)))
+        self.assertEqual(data["weeks"], ["2029-12-31", "2030-01-07"])
+        room, other_room = data["rooms"]
+        self.assertEqual(room["id"], self.room.id)
+        self.assertEqual(room["heatmap"][:6], [0.0, 0.0, 16.7, 33.3, 8.3, 0.0])
+        self.assertEqual(room["weekly"], [0.0, 5.8])
+        self.assertEqual(room["utilization"], 3.9)
+        self.assertEqual(other_room["utilization"], 0.0)
+
+        data = self.get_report(start="2030-01-07", end="2030-01-07", rooms=str(self.other_room.id)).json()
+        self.assertEqual([room["id"] for room in data["rooms"]], [self.other_room.id])
+
+    def test_invalid_window(self):
+        self.client.login(username="admin", password="password")
+        self.assertEqual(self.get_report(start="2030-01-08", end="2030-01-07").status_code, 400)
+        self.assertEqual(self.get_report(start="2030-01-01", end="2031-01-02").status_code, 400)
+
+    def test_permission(self):
+        self.client.login(username="user", password="password")
+        self.assertEqual(self.get_report().status_code, 403)
@@ -2,10 +2,12 @@ from datetime import datetime
 from warnings import filterwarnings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser, Group
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
 from django.core.management import call_command
 from django.test import TestCase, RequestFactory
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.timezone import timedelta
 from reservation.models import Reservation, Room, Comment, Rating
 from users.models import Team
@@ -179,6 +181,7 @@ class UserReservationListViewTestCase(TestCase):
         self.team1 = Team.objects.create(name="Team One")
         self.team2 = Team.objects.create(name="Team Two")
         self.room = Room.objects.create(name="Room", capacity=10)
+        self.room2 = Room.objects.create(name="Room2", capacity=10)
         self.reservation1 = Reservation.objects.create(
             team=self.team1,
             room=self.room,
@@ -187,7 +190,7 @@ class UserReservationListViewTestCase(TestCase):
         )
         self.reservation2 = Reservation.objects.create(
             team=self.team2,
-            room=self.room,
+            room=self.room2,
             start_date=datetime.now(),
             end_date=datetime.now() + timedelta(days=1),
         )
@@ -360,6 +363,7 @@ class ReservationListViewTestCase(TestCase):
 
 class ReservationListJsonTest(TestCase):
     def setUp(self):
+        cache.clear()
         call_command("create_groups_and_permissions")
         self.team1 = Team.objects.create(name="Test Team1")
         self.team2 = Team.objects.create(name="Test Team2")
@@ -406,6 +410,84 @@ class ReservationListJsonTest(TestCase):
         }
         self.assertEqual(response.json(), expected_data)
 
+    def test_date_range(self):
+        response = self.client.get(
+            reverse("reservation:reservation_json"), {"start": "2024-03-10", "end": "2024-03-12"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [event["extendedProps"]["note"] for event in response.json()["events"]], ["Test Note1", "Test Note2"]
+        )
+
+    def test_query_count_does_not_depend_on_event_count(self):
+        for hour in range(11, 21):
+            Reservation.objects.create(
+                team=self.team2,
+                room=self.room,
+                start_date=f"2024-3-10 {hour}:00:00",
+                end_date=f"2024-3-10 {hour}:30:00",
+                reserver_user=self.user,
+            )
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("reservation:reservation_json"), {"date": "2024-3-10"})
+        self.assertEqual(len(response.json()["events"]), 11)
+
+    def test_deleted_reserver(self):
+        self.user.delete()
+        response = self.client.get(reverse("reservation:reservation_json"), {"date": "2024-3-10"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["events"][0]["extendedProps"]["reserver"])
+
+    def test_conditional_get(self):
+        url = reverse("reservation:reservation_json")
+        response = self.client.get(url, {"date": "2024-3-10"})
+        etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+        # Only the version stamps are read.
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"date": "2024-3-10"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(url, {"date": "2024-3-10"}, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reservation.note = "Changed"
+            self.reservation.save()
+        response = self.client.get(url, {"date": "2024-3-10"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.json()["events"][0]["extendedProps"]["note"], "Changed")
+        response = self.client.get(url, {"date": "2024-3-11"}, HTTP_IF_NONE_MATCH=response.headers["ETag"])
+        self.assertEqual(response.status_code, 200)
+
+    def test_events_are_cached_per_day(self):
+        url = reverse("reservation:reservation_json")
+        self.client.get(url, {"start": "2024-03-10", "end": "2024-03-12"})
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"date": "2024-3-11"})
+        self.assertEqual([event["extendedProps"]["note"] for event in response.json()["events"]], ["Test Note2"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reservation.delete()
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {"start": "2024-03-10", "end": "2024-03-12"})
+        self.assertEqual([event["extendedProps"]["note"] for event in response.json()["events"]], ["Test Note2"])
+
+    def test_room_rename_changes_etag(self):
+        url = reverse("reservation:reservation_json")
+        etag = self.client.get(url, {"date": "2024-3-10"}).headers["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.name = "Renamed Room"
+            self.room.save()
+        response = self.client.get(url, {"date": "2024-3-10"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["events"][0]["room"], "Renamed Room")
+
+    def test_invalid_window(self):
+        response = self.client.get(
+            reverse("reservation:reservation_json"), {"start": "2024-03-10", "end": "2024-06-10"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("end", response.json()["errors"])
+
 
 class RoomManagementViewsTestCase(TestCase):
     def setUp(self):
@@ -493,3 +575,56 @@ class RoomManagementViewsTestCase(TestCase):
         response = RoomDeleteView.as_view()(request, pk=self.room.id)
         self.assertEqual(response.status_code, 302)
         self.assertFalse(Room.objects.filter(name=self.room.name).exists())
+
+
+class RoomSearchJsonTest(TestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name="Team")
+        self.small_room = Room.objects.create(name="Small Room", capacity=4)
+        self.big_room = Room.objects.create(name="Big Room", capacity=20)
+        Room.objects.create(name="Closed Room", capacity=20, is_active=False)
+        self.day = timezone.localdate() + timedelta(days=2)
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime(self.day.year, self.day.month, self.day.day, hour, minute))
+
+    def search(self, **params):
+        return self.client.get(reverse("reservation:room_search"), params)
+
+    def test_earliest_free_slot(self):
+        Reservation.objects.create(team=self.team, room=self.big_room, start_date=self.at(9), end_date=self.at(10))
+        Reservation.objects.create(team=self.team, room=self.big_room, start_date=self.at(10, 30), end_date=self.at(12))
+        response = self.search(capacity=10, duration=45, start=self.at(9).isoformat(), end=self.at(18).isoformat())
+        self.assertEqual(response.status_code, 200)
+        rooms = response.json()["rooms"]
+        self.assertEqual(len(rooms), 1)
+        self.assertEqual(rooms[0]["id"], self.big_room.id)
+        self.assertEqual(rooms[0]["start"], self.at(12).isoformat())
+        self.assertEqual(rooms[0]["end"], self.at(12, 45).isoformat())
+
+    def test_rooms_sorted_by_earliest_slot(self):
+        Reservation.objects.create(team=self.team, room=self.small_room, start_date=self.at(7), end_date=self.at(8))
+        response = self.search(capacity=2, duration=30, start=self.at(7).isoformat(), end=self.at(22).isoformat())
+        rooms = response.json()["rooms"]
+        self.assertEqual([room["id"] for room in rooms], [self.big_room.id, self.small_room.id])
+        self.assertEqual(rooms[1]["start"], self.at(8).isoformat())
+
+    def test_free_slot_does_not_cross_closing_time(self):
+        Reservation.objects.create(team=self.team, room=self.big_room, start_date=self.at(7), end_date=self.at(21))
+        response = self.search(
+            capacity=10, duration=120, start=self.at(7).isoformat(), end=(self.at(22) + timedelta(days=1)).isoformat()
+        )
+        rooms = response.json()["rooms"]
+        self.assertEqual(rooms[0]["start"], (self.at(7) + timedelta(days=1)).isoformat())
+
+    def test_no_free_room(self):
+        Reservation.objects.create(team=self.team, room=self.big_room, start_date=self.at(7), end_date=self.at(22))
+        response = self.search(capacity=10, duration=30, start=self.at(7).isoformat(), end=self.at(22).isoformat())
+        self.assertEqual(response.json(), {"rooms": []})
+
+    def test_invalid_search(self):
+        response = self.search(capacity=0, duration=30)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("capacity", response.json()["errors"])
+        response = self.search(capacity=1, duration=30, start=self.at(12).isoformat(), end=self.at(10).isoformat())
+        self.assertIn("end", response.json()["errors"])
@@ -1,13 +1,23 @@
 from django.urls import path
 from .views import (
+    BookingLockMetricsJson,
+    RecurringReservationCreateView,
+    ReservationChangesJson,
     ReservationDeleteView,
     ReservationDetailView,
+    ReservationEventStream,
     ReservationListView,
     ReservationListJson,
+    RoomCommentsJson,
     RoomCreateView,
     RoomDeleteView,
+    RoomIcsFeed,
     RoomListView,
+    RoomSearchJson,
+    RoomTextSearchJson,
     RoomUpdateView,
+    RoomUtilizationJson,
+    TeamIcsFeed,
     CommentSubmissionView,
     RatingSubmissionView,
     RoomDetailView,
@@ -28,11 +38,21 @@ urlpatterns = [
     ),
     path("room/create", RoomCreateView.as_view(), name="room_create"),
     path("room/list", RoomListView.as_view(), name="room_list"),
+    path("room/search/", RoomSearchJson.as_view(), name="room_search"),
+    path("room/search/text/", RoomTextSearchJson.as_view(), name="room_text_search"),
+    path("room/utilization/", RoomUtilizationJson.as_view(), name="room_utilization"),
     path("room/<int:pk>", RoomDetailView.as_view(), name="room_detail"),
     path("room/<int:pk>/update", RoomUpdateView.as_view(), name="room_update"),
     path("room/<int:pk>/delete", RoomDeleteView.as_view(), name="room_delete"),
+    path("room/<int:pk>/comments/", RoomCommentsJson.as_view(), name="room_comments"),
+    path("room/<int:pk>/calendar.ics", RoomIcsFeed.as_view(), name="room_ics"),
+    path("team/<int:pk>/calendar.ics", TeamIcsFeed.as_view(), name="team_ics"),
     path("json/", ReservationListJson.as_view(), name="reservation_json"),
+    path("events/", ReservationEventStream.as_view(), name="reservation_events"),
+    path("changes/", ReservationChangesJson.as_view(), name="reservation_changes"),
+    path("metrics/booking-locks/", BookingLockMetricsJson.as_view(), name="booking_lock_metrics"),
     path("list/", ReservationListView.as_view(), name="reservation_list"),
+    path("recurring/create", RecurringReservationCreateView.as_view(), name="recurring_reservation_create"),
     path(
         "<int:pk>",
         ReservationDetailView.as_view(),
@@ -0,0 +1,123 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from django.db import connection
+from django.utils import timezone
+
+from .models import CLOSING_TIME, OPENING_TIME, RoomUtilization
+
+BUSINESS_HOURS = list(range(OPENING_TIME.hour, CLOSING_TIME.hour))
+
+
+def hourly_minutes(start: datetime, end: datetime, current_timezone=None) -> dict[tuple[date, int], int]:
+    """Minutes of `[start, end)` falling in each local (day, hour), rounded to the nearest minute."""
+    current_timezone = current_timezone or timezone.get_current_timezone()
+    durations = {}
+    cursor = start
+    while cursor < end:
+        local = cursor.astimezone(current_timezone)
+        # Step to the next local hour in absolute time, so offsets that are not whole hours work too.
+        hour_end = cursor + timedelta(minutes=60 - local.minute, seconds=-local.second, microseconds=-local.microsecond)
+        segment_end = min(end, hour_end)
+        key = (local.date(), local.hour)
+        durations[key] = durations.get(key, timedelta()) + (segment_end - cursor)
+        cursor = segment_end
+    minutes = {key: round(duration / timedelta(minutes=1)) for key, duration in durations.items()}
+    return {key: booked for key, booked in minutes.items() if booked}
+
+
+def utilization_deltas(changes) -> dict[tuple[int, date, int], int]:
+    """Sum `(room id, start, end, sign)` changes into booked-minute deltas per (room id, day, hour)."""
+    current_timezone = timezone.get_current_timezone()
+    deltas = {}
+    for room_id, start, end, sign in changes:
+        for (day, hour), minutes in hourly_minutes(start, end, current_timezone).items():
+            deltas[(room_id, day, hour)] = deltas.get((room_id, day, hour), 0) + sign * minutes
+    return {key: minutes for key, minutes in deltas.items() if minutes}
+
+
+def apply_utilization_changes(changes, batch_size: int = 1000):
+    """Add the booked minutes of `(room id, start, end, sign)` changes to the rollup.
+
+    Each delta is an atomic increment, so concurrent writers to the same room and
+    hour do not lose each other's minutes. Keys are written in a fixed order to
+    keep such writers from deadlocking.
+    """
+    deltas = sorted(utilization_deltas(changes).items())
+    if not deltas:
+        return
+    table = RoomUtilization._meta.db_table
+    with connection.cursor() as cursor:
+        for position in range(0, len(deltas), batch_size):
+            batch = deltas[position : position + batch_size]
+            cursor.execute(
+                f"INSERT INTO {table} (room_id, date, hour, minutes) VALUES "
+                + ", ".join(["(%s, %s, %s, %s)"] * len(batch))
+                + f" ON CONFLICT (room_id, date, hour) DO UPDATE SET minutes = {table}.minutes + EXCLUDED.minutes",
+                [value for (room_id, day, hour), minutes in batch for value in (room_id, day, hour, minutes)],
+            )
+    removed = [key for key, minutes in deltas if minutes < 0]
+    if removed:
+        RoomUtilization.objects.filter(
+            room_id__in={room_id for room_id, _, _ in removed},
+            date__in={day for _, day, _ in removed},
+            minutes__lte=0,
+        ).delete()
+
+
+def rollup_minutes(reservations) -> dict[tuple[int, date, int], int]:
+    """Booked minutes per (room id, day, hour) for `(room id, start, end)` rows."""
+    return utilization_deltas((room_id, start, end, 1) for room_id, start, end in reservations)
+
+
+def utilization_report(rooms: list[dict], first_day: date, last_day: date) -> dict:
+    """Room by business-hour heatmaps and weekly utilization between two days, both included.
+
+    Percentages are booked minutes over the business-hour minutes of the period.
+    """
+    day_count = (last_day - first_day).days + 1
+    booked = np.zeros((len(rooms), day_count, len(BUSINESS_HOURS)), dtype=np.int64)
+    rows = list(
+        RoomUtilization.objects.filter(
+            room_id__in=[room["id"] for room in rooms],
+            date__gte=first_day,
+            date__lte=last_day,
+            hour__gte=BUSINESS_HOURS[0],
+            hour__lte=BUSINESS_HOURS[-1],
+        ).values_list("room_id", "date", "hour", "minutes")
+    )
+    if rows:
+        positions = {room["id"]: position for position, room in enumerate(rooms)}
+        room_ids, days, hours, minutes = zip(*rows)
+        booked[
+            [positions[room_id] for room_id in room_ids],
+            [(day - first_day).days for day in days],
+            np.asarray(hours) - BUSINESS_HOURS[0],
+        ] = minutes
+
+    # Weeks start on Monday; the first and last ones may be partial.
+    weeks = (np.arange(day_count) + first_day.weekday()) // 7
+    days_per_week = np.bincount(weeks)
+    weekly = np.zeros((len(rooms), len(days_per_week)), dtype=np.int64)
+    np.add.at(weekly.T, weeks, booked.sum(axis=2).T)
+    heatmap = booked.sum(axis=1) / (day_count * 60) * 100
+    weekly = weekly / (days_per_week * len(BUSINESS_HOURS) * 60) * 100
+    overall = booked.sum(axis=(1, 2)) / (day_count * len(BUSINESS_HOURS) * 60) * 100
+    week_starts = [
+        first_day - timedelta(days=first_day.weekday()) + timedelta(weeks=week) for week in range(len(days_per_week))
+    ]
+    return {
+        "start": first_day.isoformat(),
+        "end": last_day.isoformat(),
+        "hours": BUSINESS_HOURS,
+        "weeks": [week_start.isoformat() for week_start in week_starts],
+        "rooms": [
+            {
+                **room,
+                "utilization": round(float(overall[position]), 1),
+                "heatmap": np.round(heatmap[position], 1).tolist(),
+                "weekly": np.round(weekly[position], 1).tolist(),
+            }
+            for position, room in enumerate(rooms)
+        ],
+    }
@@ -1,17 +1,55 @@
 import datetime
+import json
+import time
 from typing import Any
+from django.conf import settings
 from django.contrib.auth import get_user
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
 from django.utils import timezone
-from django.http import JsonResponse
-from django.shortcuts import redirect, render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.formats import date_format
+from django.utils.http import http_date, quote_etag
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.views import View
 from django.views.generic import CreateView, DeleteView, DetailView, ListView, UpdateView
 
 from users.models import Team
-from .models import Comment, Reservation, Room, Rating
-from .forms import RoomCreateForm, SubmitCommentForm, SubmitRatingForm, ReservationForm
+from .models import Comment, RecurringReservation, Reservation, ReservationChange, Room, Rating
+from .availability import days_between, find_free_rooms
+from .booking import get_lock_wait_metrics
+from .comments import COMMENT_DATE_FORMAT, comment_page
+from .broker import get_broker
+from .calendar_feed import (
+    feed_etag,
+    feed_last_modified,
+    get_day_events,
+    get_feed_versions,
+    get_version_stamps,
+    room_scope,
+    team_scope,
+)
+from .ical import ics_calendar, iterate_in_chunks
+from .journal import get_changes, get_journal_floor, get_latest_sequence
+from .forms import (
+    RecurringReservationForm,
+    RoomCommentsForm,
+    RoomCreateForm,
+    RoomSearchForm,
+    RoomTextSearchForm,
+    RoomUtilizationForm,
+    SubmitCommentForm,
+    SubmitRatingForm,
+    ReservationChangesForm,
+    ReservationEventStreamForm,
+    ReservationFeedForm,
+    ReservationForm,
+)
+from .recurrence import expand_series
+from .search import search_rooms
+from .utilization import utilization_report
 
 
 class RoomDetailView(DetailView):
@@ -20,9 +58,9 @@ class RoomDetailView(DetailView):
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        avg_rating = self.object.get_avg_rating()
-        context["rate"] = avg_rating
-        context["comments"] = Comment.objects.filter(room=self.object).all()
+        context["rate"] = self.object.avg_rating
+        context["comments"], context["comments_next"] = comment_page(self.object.pk)
+        context["comment_date_format"] = COMMENT_DATE_FORMAT
         context["room_id"] = self.kwargs.get("pk")
         user = self.request.user
         if not user.is_anonymous:
@@ -36,11 +74,20 @@ class RatingSubmissionView(LoginRequiredMixin, View):
     def post(self, request, *args, **kwargs):
         user = get_user(request)
         room_id = kwargs.get("room_id")
-        room = Room.objects.get(id=room_id)
-        rate = Rating(user=user, room=room)
+        rate = Rating(user=user, room_id=room_id)
         rating_form = SubmitRatingForm(request.POST, instance=rate)
+        wants_json = request.headers.get("Accept", "").startswith("application/json")
         if rating_form.is_valid():
-            rating_form.save()
+            try:
+                rate = rating_form.save()
+            except Room.DoesNotExist:
+                raise Http404("Room does not exist.")
+            if wants_json:
+                return JsonResponse(
+                    {"value": rate.value, "rating_count": rate.room.rating_count, "avg_rating": rate.room.avg_rating}
+                )
+        elif wants_json:
+            return JsonResponse({"errors": rating_form.errors}, status=400)
         return redirect("reservation:room_detail", pk=room_id)
 
 
@@ -98,31 +145,320 @@ class RoomDeleteView(PermissionRequiredMixin, DeleteView):
     template_name = "shared/confirm_delete.html"
 
 
+def day_start(day: datetime.date) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+RESERVATION_EVENT_FIELDS = (
+    "id",
+    "note",
+    "start_date",
+    "end_date",
+    "room_id",
+    "room__name",
+    "team__name",
+    "reserver_user__username",
+)
+
+
+def reservation_event(reservation: dict) -> dict:
+    return {
+        "id": reservation["id"],
+        "title": reservation["team__name"],
+        "room": reservation["room__name"],
+        "start": reservation["start_date"].isoformat(),
+        "end": reservation["end_date"].isoformat(),
+        "resourceId": reservation["room_id"],
+        "extendedProps": {
+            "note": reservation["note"],
+            "reserver": reservation["reserver_user__username"],
+        },
+        "backgroundColor": "green",
+        "borderColor": "green",
+    }
+
+
+def build_day_events(days: list[datetime.date]) -> dict[datetime.date, list[dict]]:
+    events_by_day = {day: [] for day in days}
+    reservations = (
+        Reservation.objects.filter(
+            start_date__lt=day_start(days[-1] + datetime.timedelta(days=1)), end_date__gt=day_start(days[0])
+        )
+        .order_by("start_date", "id")
+        .values(*RESERVATION_EVENT_FIELDS)
+    )
+    for reservation in reservations:
+        event = reservation_event(reservation)
+        for day in days_between(reservation["start_date"], reservation["end_date"]):
+            if day in events_by_day:
+                events_by_day[day].append(event)
+    for series, day, occurrence_start, occurrence_end in expand_series(days[0], days[-1]):
+        if day in events_by_day:
+            events_by_day[day].append(
+                {
+                    "id": f"series-{series.id}-{day}",
+                    "title": series.team.name,
+                    "room": series.room.name,
+                    "start": occurrence_start.isoformat(),
+                    "end": occurrence_end.isoformat(),
+                    "resourceId": series.room_id,
+                    "extendedProps": {
+                        "note": series.note,
+                        "reserver": series.reserver_user.username if series.reserver_user else None,
+                        "series": series.id,
+                    },
+                    "backgroundColor": "green",
+                    "borderColor": "green",
+                }
+            )
+    return events_by_day
+
+
 class ReservationListJson(View):
     def get(self, request, *args, **kwargs):
-        today = datetime.datetime.now().date()
-        date = request.GET.get("date")
-        if not date:
-            date = today
-        reservations = Reservation.objects.filter(start_date__date=date)
-        events = [
+        form = ReservationFeedForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        start, end = form.cleaned_data["start"], form.cleaned_data["end"]
+        first_day, last_day = timezone.localdate(start), timezone.localdate(end - datetime.timedelta(microseconds=1))
+        # Read the version stamps before the reservations, so a change committed in between can only make the
+        # response look older than it is.
+        versions = get_feed_versions(first_day, last_day)
+        etag, last_modified = feed_etag(versions, start.isoformat(), end.isoformat()), feed_last_modified(versions)
+        response = get_conditional_response(request, etag=quote_etag(etag), last_modified=last_modified)
+        if response is not None:
+            return response
+
+        days = [first_day + datetime.timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+        events_by_day = get_day_events(days, versions, build_day_events)
+        # Events spanning midnight are listed under every day they touch.
+        events = list({event["id"]: event for day in days for event in events_by_day[day]}.values())
+        if start != day_start(first_day) or end != day_start(last_day + datetime.timedelta(days=1)):
+            events = [
+                event
+                for event in events
+                if datetime.datetime.fromisoformat(event["start"]) < end
+                and datetime.datetime.fromisoformat(event["end"]) > start
+            ]
+        response = JsonResponse({"events": events}, safe=False)
+        response.headers["ETag"] = quote_etag(etag)
+        response.headers["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+async def reservation_event_stream(subscription, lifetime: float, keepalive: float):
+    try:
+        yield "retry: 5000\n\n"
+        deadline = time.monotonic() + lifetime
+        while time.monotonic() < deadline and not subscription.overflowed:
+            message = await subscription.get(timeout=min(keepalive, max(deadline - time.monotonic(), 0)))
+            if message is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: reservation\ndata: {json.dumps(message)}\n\n"
+        if subscription.overflowed:
+            yield "event: reload\ndata: {}\n\n"
+    finally:
+        subscription.close()
+
+
+def event_stream_enabled(request) -> bool:
+    """Whether `request` can be answered with an event stream.
+
+    Only under ASGI, a WSGI server would spend a worker thread on every stream
+    for its whole lifetime.
+    """
+    return getattr(settings, "RESERVATION_EVENT_STREAM", True) and isinstance(request, ASGIRequest)
+
+
+class ReservationEventStream(View):
+    """Server-sent events for reservation changes on the requested days and rooms.
+
+    Streams end after `RESERVATION_EVENT_STREAM_LIFETIME` seconds and browsers
+    reconnect on their own, which bounds how long a vanished client is kept
+    subscribed. Without an ASGI server, or with `RESERVATION_EVENT_STREAM` off,
+    it answers 204, which tells browsers not to reconnect.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        form = ReservationEventStreamForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        if not event_stream_enabled(request):
+            return HttpResponse(status=204)
+        subscription = get_broker().subscribe(days=form.cleaned_data["days"], rooms=form.cleaned_data["rooms"] or ())
+        response = StreamingHttpResponse(
+            reservation_event_stream(
+                subscription,
+                lifetime=getattr(settings, "RESERVATION_EVENT_STREAM_LIFETIME", 300),
+                keepalive=getattr(settings, "RESERVATION_EVENT_STREAM_KEEPALIVE", 15),
+            ),
+            content_type="text/event-stream",
+        )
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
+
+class ReservationChangesJson(View):
+    def get(self, request, *args, **kwargs):
+        form = ReservationChangesForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        since = form.cleaned_data["since"]
+        if since < get_journal_floor():
+            # Deletions after `since` may have been compacted away, the client has to reload everything.
+            return JsonResponse({"reset": True, "next": get_latest_sequence()}, status=410)
+        changes, has_more = get_changes(since, form.cleaned_data["limit"] or ReservationChangesForm.MAX_LIMIT)
+        reservations = {
+            reservation["id"]: reservation
+            for reservation in Reservation.objects.filter(
+                id__in=[change.reservation_id for change in changes if change.action != ReservationChange.DELETED]
+            ).values(*RESERVATION_EVENT_FIELDS)
+        }
+        return JsonResponse(
             {
-                "id": reservation.id,
-                "title": reservation.team.name,
-                "room": reservation.room.name,
-                "start": reservation.start_date.isoformat(),
-                "end": reservation.end_date.isoformat(),
-                "resourceId": reservation.room.id,
-                "extendedProps": {
-                    "note": reservation.note,
-                    "reserver": reservation.reserver_user.username,
-                },
-                "backgroundColor": "green",
-                "borderColor": "green",
+                "changes": [
+                    {
+                        "sequence": change.sequence,
+                        "id": change.reservation_id,
+                        # A reservation deleted after this change is reported as deleted right away.
+                        "action": change.action if change.reservation_id in reservations else ReservationChange.DELETED,
+                        "event": reservation_event(reservations[change.reservation_id])
+                        if change.reservation_id in reservations
+                        else None,
+                    }
+                    for change in changes
+                ],
+                "next": changes[-1].sequence if changes else since,
+                "has_more": has_more,
             }
-            for reservation in reservations
+        )
+
+
+class ReservationIcsFeed(View):
+    """iCalendar subscription feed of the reservations of a room or a team.
+
+    Reservations are streamed from a server-side cursor, so memory use does not
+    grow with the history of the room or team. Under ASGI the events are read in
+    chunks from the sync thread, which keeps the server from buffering the feed.
+    """
+
+    model = None
+    scope = None
+    chunk_size = 500
+
+    def get(self, request, *args, **kwargs):
+        obj = get_object_or_404(self.model, pk=kwargs["pk"])
+        versions = get_version_stamps([self.scope(obj.pk)])
+        etag, last_modified = feed_etag(versions, self.scope(obj.pk)), feed_last_modified(versions)
+        response = get_conditional_response(request, etag=quote_etag(etag), last_modified=last_modified)
+        if response is not None:
+            return response
+
+        filters = {f"{self.model._meta.model_name}_id": obj.pk}
+        reservations = (
+            Reservation.objects.filter(**filters)
+            .order_by()
+            .values(*RESERVATION_EVENT_FIELDS)
+            .iterator(chunk_size=self.chunk_size)
+        )
+        series_list = RecurringReservation.objects.filter(**filters).select_related("room", "team")
+        content = ics_calendar(str(obj), reservations, series_list)
+        if isinstance(request, ASGIRequest):
+            content = iterate_in_chunks(content, self.chunk_size)
+        response = StreamingHttpResponse(content, content_type="text/calendar; charset=utf-8")
+        response.headers["Content-Disposition"] = f'inline; filename="{self.scope(obj.pk)}.ics"'
+        response.headers["ETag"] = quote_etag(etag)
+        response.headers["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class RoomIcsFeed(ReservationIcsFeed):
+    model = Room
+    scope = staticmethod(room_scope)
+
+
+class TeamIcsFeed(ReservationIcsFeed):
+    model = Team
+    scope = staticmethod(team_scope)
+
+
+class RoomSearchJson(View):
+    def get(self, request, *args, **kwargs):
+        form = RoomSearchForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        rooms = [
+            {
+                "id": room["id"],
+                "name": room["name"],
+                "capacity": room["capacity"],
+                "start": room["start"].isoformat(),
+                "end": room["end"].isoformat(),
+            }
+            for room in find_free_rooms(**form.cleaned_data)
         ]
-        return JsonResponse({"events": events}, safe=False)
+        return JsonResponse({"rooms": rooms})
+
+
+class RoomTextSearchJson(View):
+    def get(self, request, *args, **kwargs):
+        form = RoomTextSearchForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        rooms = search_rooms(form.cleaned_data["q"], Room.objects.filter(is_active=True))
+        rooms = rooms.values("id", "name", "capacity", "rank")[: form.cleaned_data["limit"]]
+        return JsonResponse({"rooms": [{**room, "rank": round(room["rank"], 4)} for room in rooms]})
+
+
+class RoomCommentsJson(View):
+    def get(self, request, *args, **kwargs):
+        room = get_object_or_404(Room, pk=kwargs["pk"])
+        form = RoomCommentsForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        comments, next_cursor = comment_page(room.pk, form.cleaned_data["cursor"], form.cleaned_data["limit"])
+        return JsonResponse(
+            {
+                "comments": [
+                    {
+                        "id": comment.id,
+                        "content": comment.content,
+                        "user": str(comment.user),
+                        "created_at": comment.created_at.isoformat(),
+                        "created_display": date_format(timezone.localtime(comment.created_at), COMMENT_DATE_FORMAT),
+                    }
+                    for comment in comments
+                ],
+                "next": next_cursor,
+            }
+        )
+
+
+class RoomUtilizationJson(PermissionRequiredMixin, View):
+    permission_required = "reservation.view_room"
+
+    def get(self, request, *args, **kwargs):
+        form = RoomUtilizationForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        rooms = Room.objects.order_by("id")
+        if form.cleaned_data["rooms"]:
+            rooms = rooms.filter(id__in=form.cleaned_data["rooms"])
+        report = utilization_report(
+            list(rooms.values("id", "name", "capacity")), form.cleaned_data["start"], form.cleaned_data["end"]
+        )
+        return JsonResponse(report)
+
+
+class BookingLockMetricsJson(PermissionRequiredMixin, View):
+    permission_required = "reservation.view_reservation"
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(get_lock_wait_metrics())
 
 
 class ReservationListView(UserPassesTestMixin, View):
@@ -137,6 +473,12 @@ class ReservationListView(UserPassesTestMixin, View):
             return False
         return True
 
+    def get_update_context(self) -> dict:
+        return {
+            "event_stream": event_stream_enabled(self.request),
+            "calendar_poll_interval": getattr(settings, "RESERVATION_CALENDAR_POLL_INTERVAL", 30),
+        }
+
     def get_data(self):
         resources = Room.objects.filter(is_active=True)
         resources = [{"id": room.id, "title": room.name} for room in resources]
@@ -158,6 +500,7 @@ class ReservationListView(UserPassesTestMixin, View):
             context = {"resources": data, "form": form, "user": request.user}
         else:
             context = {"resources": data, "user": request.user}
+        context.update(self.get_update_context())
         return render(request, "reservation/reservation_list.html", context=context)
 
     def post(self, request, *args, **kwargs):
@@ -165,10 +508,28 @@ class ReservationListView(UserPassesTestMixin, View):
         if form.is_valid():
             form.save()
         data = self.get_data()
-        context = {"resources": data, "form": form, "user": request.user}
+        context = {"resources": data, "form": form, "user": request.user, **self.get_update_context()}
         return render(request, "reservation/reservation_list.html", context=context)
 
 
+class RecurringReservationCreateView(UserPassesTestMixin, CreateView):
+    model = RecurringReservation
+    template_name = "reservation/recurring_reservation_create.html"
+    form_class = RecurringReservationForm
+    success_url = reverse_lazy("reservation:reservation_list")
+
+    def test_func(self) -> bool | None:
+        user = self.request.user
+        return user.has_perm("reservation.add_reservation") or (
+            user.has_perm("reservation.add_reservation_self_team") and user.team is not None
+        )
+
+    def get_form_kwargs(self) -> dict[str, Any]:
+        kwargs = super().get_form_kwargs()
+        kwargs["user"] = self.request.user
+        return kwargs
+
+
 class ReservationDetailView(PermissionRequiredMixin, DetailView): ...
 
 
@@ -38,9 +38,11 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # local
     "users",
     "reservation",
+    "mailer",
     "django_crontab",
 ]
 
@@ -88,6 +90,12 @@ DATABASES = {
         "PORT": os.getenv("DB_PORT"),
     }
 }
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -137,14 +145,50 @@ TEAM_LEADERS_GROUP_NAME = "Team Leaders"
 LOGIN_URL = "users:login_with_username"
 LOGIN_REDIRECT_URL = "index"
 LOGOUT_REDIRECT_URL = "users:login_with_username"
-EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+# mailer.backends.EmailBackend sends over a pool of persistent SMTP connections.
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "25"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS") == "True"
 REMINDER_EMAIL_LOG_FILE = os.path.join(BASE_DIR, "reminder_email.log")
+# Reminders are sent by the run_scheduler command.
 CRONJOBS = [
     (
-        "*/59 * * * *",
+        "30 0 * * *",
         "django.core.management.call_command",
-        ["reservation_email_reminder"],
+        ["materialize_recurring_reservations"],
         {},
         f">> {REMINDER_EMAIL_LOG_FILE} 2>&1",
-    )
+    ),
+    (
+        "0 1 * * *",
+        "django.core.management.call_command",
+        ["compact_reservation_changes"],
+        {"tombstone_days": 30},
+        f">> {REMINDER_EMAIL_LOG_FILE} 2>&1",
+    ),
+    (
+        "0 2 * * *",
+        "django.core.management.call_command",
+        ["partition_reservations"],
+        {"archive_after": 12},
+        f">> {REMINDER_EMAIL_LOG_FILE} 2>&1",
+    ),
 ]
+RESERVATION_INTERVAL_INDEX_TTL = 60
+RESERVATION_INTERVAL_INDEX_SIZE = 10_000
+RESERVATION_BOOKING_ATTEMPTS = 3
+RESERVATION_BOOKING_RETRY_DELAY = 0.05
+RESERVATION_BOOKING_RETRY_MAX_DELAY = 0.5
+RECURRING_RESERVATION_HORIZON_WEEKS = 4
+RESERVATION_PARTITION_MONTHS_AHEAD = 3
+RESERVATION_FEED_CACHE_TIMEOUT = 60 * 60
+RESERVATION_EVENT_BROKER = "reservation.broker.LocalBroker"
+# Server-sent events are only used under ASGI, otherwise the calendar polls every
+# RESERVATION_CALENDAR_POLL_INTERVAL seconds.
+RESERVATION_EVENT_STREAM = True
+RESERVATION_CALENDAR_POLL_INTERVAL = 30
+RESERVATION_EVENT_STREAM_LIFETIME = 300
+RESERVATION_EVENT_STREAM_KEEPALIVE = 15
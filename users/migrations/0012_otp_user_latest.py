@@ -0,0 +1,16 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0011_alter_customuser_first_name_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="otp",
+            index=models.Index(fields=["user", "-created_at"], name="otp_user_latest"),
+        ),
+    ]
@@ -34,5 +34,8 @@ class OTP(models.Model):
     otp = models.CharField(max_length=6, default=generate_otp)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "-created_at"], name="otp_user_latest")]
+
     def __str__(self):
         return f"{self.user.email} - OTP: {self.otp}"
@@ -1,4 +1,3 @@
-from django.core.mail import send_mail
 from django.http import JsonResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse, reverse_lazy
@@ -7,6 +6,7 @@ from django.views.generic import DeleteView, DetailView, ListView, UpdateView, C
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.auth.views import PasswordChangeView
 from django.contrib.auth import get_user_model, login
+from mailer.queue import enqueue_mail
 from .models import Team
 from .forms import (
     CustomPasswordChangeForm,
@@ -153,7 +153,7 @@ class RequestOTPView(UserNotAuthenticatedMixin, View):
         if form.is_valid():
             otp = form.save()
             if context["email"]:
-                send_mail(
+                enqueue_mail(
                     "OTP Code for unChained",
                     message=f"Your otp code is: {otp.otp}",
                     from_email="noreply@unchained.com",
@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class BitStringField(models.Field):
+    """Fixed-width PostgreSQL `bit(n)` column exposed as a Python int, bit 0 being the leftmost one."""
+
+    description = "Fixed-width bit string"
+
+    def __init__(self, *args, length: int, **kwargs):
+        self.length = length
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["length"] = self.length
+        return name, path, args, kwargs
+
+    def db_type(self, connection):
+        return f"bit({self.length})"
+
+    def from_db_value(self, value, expression, connection):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, int):
+            return value
+        return int(value, 2)
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        return format(value, f"0{self.length}b")